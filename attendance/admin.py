@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from django.urls import reverse
 from .models import (
@@ -12,6 +13,9 @@ from .models import (
     SectionAccess,
     FeatureAccess,
 )
+from .caching import bump_sf2_generation
+from .notifications import rebuild_unread_counters, recount_unread
+from .rollups import refresh_daily_rollup
 
 
 @admin.register(SchoolYear)
@@ -62,6 +66,28 @@ class AttendanceSessionRecordAdmin(admin.ModelAdmin):
     )
     date_hierarchy = "date"
 
+    # Keep the DailyAttendance rollup and SF2 cache in step with admin edits
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            refresh_daily_rollup([obj.enrollment_id], [obj.date])
+        bump_sf2_generation(obj.enrollment.school_year_id, obj.date.year, obj.date.month)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            refresh_daily_rollup([obj.enrollment_id], [obj.date])
+        bump_sf2_generation(obj.enrollment.school_year_id, obj.date.year, obj.date.month)
+
+    def delete_queryset(self, request, queryset):
+        keys = set(queryset.values_list('enrollment_id', 'enrollment__school_year_id', 'date'))
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            # One refresh over every touched learner and date; untouched pairs are rebuilt unchanged
+            refresh_daily_rollup({eid for eid, _, _ in keys}, {d for _, _, d in keys})
+        for sy_id, year, month in {(sy_id, d.year, d.month) for _, sy_id, d in keys}:
+            bump_sf2_generation(sy_id, year, month)
+
 
 @admin.register(NonSchoolDay)
 class NonSchoolDayAdmin(admin.ModelAdmin):
@@ -78,6 +104,20 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ("message", "user__username", "user__first_name", "user__last_name")
     date_hierarchy = "created"
 
+    # Keep the unread badge counter in step with admin edits
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        recount_unread(obj.user_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        recount_unread(obj.user_id)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        super().delete_queryset(request, queryset)
+        rebuild_unread_counters(user_ids)
+
 
 @admin.register(SectionAccess)
 class SectionAccessAdmin(admin.ModelAdmin):
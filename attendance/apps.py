@@ -6,3 +6,6 @@ class AttendanceConfig(AppConfig):
     name = 'attendance'
     verbose_name = 'Classroom Attendance'
 
+
+    def ready(self):
+        from . import signals  # noqa: F401
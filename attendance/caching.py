@@ -0,0 +1,191 @@
+"""Shared-cache helpers for report data, school calendars, user capabilities and the active school year."""
+import copy
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Writes bump the month's generation instead of deleting keys, so cached
+# summaries can live much longer than the old 300 seconds.
+SF2_CACHE_TIMEOUT = getattr(settings, 'SF2_CACHE_TIMEOUT', 60 * 60 * 24)
+# Capability maps are versioned per user the same way
+CAPS_CACHE_TIMEOUT = getattr(settings, 'CAPS_CACHE_TIMEOUT', 60 * 60)
+
+
+def _generation_key(sy_id, year, month):
+    return f"sf2gen:{sy_id}:{year}:{month}"
+
+
+def _seed():
+    # Clock-based seed with a random tail: every generation is a value never
+    # used before, so old keys never revive, even if the counter is evicted.
+    return time.time_ns() * 1000 + random.randrange(1000)
+
+
+def _generation(key):
+    gen = cache.get(key)
+    if gen is None:
+        gen = _seed()
+        if not cache.add(key, gen, timeout=None):
+            gen = cache.get(key, gen)
+    return gen
+
+
+def _bump(key):
+    # A plain set of a fresh value rather than incr(): the file and database
+    # backends implement incr() as get-then-set, so two concurrent bumps could
+    # both write g+1 and one invalidation would be lost. Fresh values never
+    # collide, so every bump retires whatever was cached before it.
+    cache.set(key, _seed(), timeout=None)
+
+
+def bump_after_commit(fn, *args):
+    """Run a cache bump now and again once the surrounding transaction commits.
+
+    A bump before commit alone lets a concurrent request read the old rows
+    and cache them under the new version. The second bump after commit
+    retires anything cached in between. The first bump keeps the writing
+    request itself consistent. Outside a transaction it runs once.
+    """
+    fn(*args)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: fn(*args))
+
+
+def sf2_generation(sy_id, year, month):
+    return _generation(_generation_key(sy_id, year, month))
+
+
+def bump_sf2_generation(sy_id, year, month):
+    """Invalidate every cached SF2 summary scope for one school year month."""
+    _bump(_generation_key(sy_id, year, month))
+
+
+def bump_sf2_school_year(*sy_ids):
+    """Invalidate every cached SF2 summary of whole school years.
+
+    For changes that touch all months at once: enrollments, section
+    assignments, learner details and the school year's own dates.
+    """
+    for sy_id in sy_ids:
+        _bump(f"sf2gen:{sy_id}")
+
+
+def sf2_cache_key(sy_id, year, month, scope):
+    sy_gen = _generation(f"sf2gen:{sy_id}")
+    return f"sf2:{sy_id}:{year}:{month}:g{sf2_generation(sy_id, year, month)}.{sy_gen}:{scope}"
+
+
+def _count(name):
+    # Counters live in the shared cache so every worker adds to the same totals.
+    # File and database backends increment with get+set, so they are approximate.
+    key = f"sf2stats:{name}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def sf2_cache_stats():
+    hits = cache.get('sf2stats:hit', 0)
+    misses = cache.get('sf2stats:miss', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total * 100.0, 1) if total else 0.0,
+    }
+
+
+def reset_sf2_cache_stats():
+    cache.delete_many(['sf2stats:hit', 'sf2stats:miss'])
+
+
+def cached_sf2_summary(sy_id, year, month, scope, compute, count=True):
+    """Return the cached summary for this scope, computing and storing it on a miss."""
+    key = sf2_cache_key(sy_id, year, month, scope)
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute()
+        cache.set(key, summary, timeout=SF2_CACHE_TIMEOUT)
+        if count:
+            _count('miss')
+    elif count:
+        _count('hit')
+    return summary
+
+
+def dashboard_panel_key(panel, sy_id, period, scope, month=None):
+    """Cache key for a dashboard panel.
+
+    Every panel follows the school year's SF2 generation (enrollments, learner
+    details, section moves). Passing ``month`` as (year, month) also ties it to
+    that month's generation, which attendance saves and NSD changes bump.
+    """
+    gen = str(_generation(f"sf2gen:{sy_id}"))
+    if month:
+        gen = f"{sf2_generation(sy_id, *month)}.{gen}"
+    return f"panel:{panel}:{sy_id}:{period}:g{gen}:{scope}"
+
+
+def cached_panel(key, compute):
+    """Return (value, hit) for a dashboard panel, computing and storing it on a miss."""
+    value = cache.get(key)
+    if value is not None:
+        return value, True
+    value = compute()
+    cache.set(key, value, timeout=SF2_CACHE_TIMEOUT)
+    return value, False
+
+
+def school_calendar_key(sy_id):
+    return f"schoolcal:{sy_id}:g{_generation(f'schoolcalgen:{sy_id}')}"
+
+
+def bump_school_calendar(*sy_ids):
+    """Invalidate the cached school-day calendars of the given school years."""
+    for sy_id in sy_ids:
+        _bump(f"schoolcalgen:{sy_id}")
+
+
+def caps_cache_key(user_id):
+    return f"caps:{user_id}:v{_generation(f'capsver:{user_id}')}"
+
+
+def bump_user_caps(*user_ids):
+    """Invalidate the cached capability maps of the given users."""
+    for uid in user_ids:
+        _bump(f"capsver:{uid}")
+
+
+# The active school year is held per process and checked against a shared
+# version, so each lookup costs one cache read instead of a query.
+_ACTIVE_SY_VERSION = 'activesy:ver'
+_active_sy_local = (None, None)
+
+
+def active_school_year():
+    """Return the active SchoolYear (or None), cached in memory and in the shared cache."""
+    global _active_sy_local
+    from .models import SchoolYear
+
+    version = _generation(_ACTIVE_SY_VERSION)
+    local_version, sy = _active_sy_local
+    if local_version != version:
+        key = f"activesy:v{version}"
+        hit = cache.get(key)
+        if hit is None:
+            # Stored as a 1-tuple so "no active year" can be cached too
+            hit = (SchoolYear.objects.filter(is_active=True).order_by('-start_date').first(),)
+            cache.set(key, hit, timeout=60 * 60 * 24)
+        sy = hit[0]
+        _active_sy_local = (version, sy)
+    # Callers get their own copy so edits never leak into the shared one
+    return copy.copy(sy)
+
+
+def invalidate_active_school_year():
+    _bump(_ACTIVE_SY_VERSION)
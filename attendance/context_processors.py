@@ -1,18 +1,19 @@
-from .models import SchoolYear, Notification
+from .caching import active_school_year
+from .notifications import unread_count
 from .permissions import caps_for
 
 
 def active_sy(request):
     """Expose the active school year to all templates for navbar links."""
     try:
-        sy = SchoolYear.objects.filter(is_active=True).first()
+        sy = active_school_year()
     except Exception:
         sy = None
     # Unread notifications for the navbar badge
     unread = 0
     try:
         if getattr(request, 'user', None) and request.user.is_authenticated:
-            unread = Notification.objects.filter(user=request.user, is_read=False).count()
+            unread = unread_count(request.user)
     except Exception:
         unread = 0
     caps = {}
@@ -0,0 +1,109 @@
+"""SF2 Excel export writers built on a :class:`~attendance.reports.MonthGrid`."""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+SUMMARY_LINES = (
+    ("Enrolment as of 1st Friday", 'enrol_first_friday'),
+    ("Late enrolment during the month (beyond cut-off)", 'late_enrol'),
+    ("Registered learners as of end of month", 'registered_eom'),
+    ("% of enrolment as of end of month", 'pct_enrol_eom'),
+    ("Average Daily Attendance", 'ada'),
+    ("% of attendance for the month", 'pct_attendance'),
+    ("Students absent for 5 consecutive days", 'absent5'),
+)
+
+
+def sf2_filename(grid):
+    return f"SF2_{grid.sy.name}_{grid.year}-{grid.month:02d}.xlsx".replace('/', '-')
+
+
+def _headers(grid):
+    return ['LRN', 'Learner\'s Name', 'Sex', 'Birthdate'] + [str(d.day) for d in grid.days] + ['Present', 'Absent', 'Late', 'Excused']
+
+
+def _column_width(length):
+    return max(10, min(25, length + 2))
+
+
+def _named_styles():
+    header = NamedStyle(name='sf2_header', font=Font(bold=True), alignment=Alignment(horizontal='center'))
+    bold = NamedStyle(name='sf2_bold', font=Font(bold=True))
+    nsd = NamedStyle(name='sf2_nsd', fill=PatternFill(start_color='DDDDDD', end_color='DDDDDD', fill_type='solid'))
+    return header, bold, nsd
+
+
+def _column_widths(grid):
+    """Column widths matching the legacy auto-width heuristic, from a cheap pass over the grid.
+
+    Day, count and per-day total cells are at most a few characters wide,
+    so those columns always get the minimum width.
+    """
+    rows = grid.rows
+    labels = ['Male present per day', 'Female present per day', 'Combined present per day']
+    widths = [
+        max([len('LRN')] + [len(str(r['lrn'])) for r in rows if r['lrn']]),
+        max([len("Learner's Name")] + [len(x) for x in labels] + [len(str(r['name'])) for r in rows]),
+        len('Sex'),
+        len('Birthdate') if not any(r['birthdate'] for r in rows) else len('YYYY-MM-DD'),
+    ]
+    widths += [0] * (len(grid.days) + 4)
+    return [_column_width(n) for n in widths]
+
+
+def write_sf2_workbook(grid, fileobj):
+    """Write the SF2 sheet to ``fileobj`` using openpyxl's write-only mode.
+
+    Column widths are worked out from the grid up front (write-only sheets
+    emit their column definitions before the first row); rows are then
+    appended straight from the grid. Styles are shared named styles.
+    """
+    wb = Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+    ws = wb.create_sheet(f"SF2 {grid.year}-{grid.month:02d}")
+
+    for c, width in enumerate(_column_widths(grid), 1):
+        ws.column_dimensions[get_column_letter(c)].width = width
+
+    def styled(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    nsd_dates = set(grid.nsd_dates)
+    nsd_cols = [i for i, d in enumerate(grid.days) if d in nsd_dates]
+
+    ws.append([styled(v, 'sf2_header') for v in _headers(grid)])
+
+    def group(members, per_day, label):
+        for r in members:
+            b = r['birthdate']
+            counts = r['counts']
+            marks = list(r['day_marks'])
+            for i in nsd_cols:
+                marks[i] = styled(marks[i], 'sf2_nsd')
+            ws.append(
+                [r['lrn'], r['name'], r['sex'], b.strftime('%Y-%m-%d') if b else '']
+                + marks
+                + [counts['P'], counts['A'], counts['L'], counts['E']]
+            )
+        ws.append([None, styled(f"{label} present per day", 'sf2_bold'), None, None] + list(per_day))
+        ws.append([])
+
+    group(grid.rows_m, grid.mpd, 'Male')
+    group(grid.rows_f, grid.fpd, 'Female')
+    ws.append([None, styled('Combined present per day', 'sf2_bold'), None, None] + list(grid.cpd))
+
+    summary = grid.summary()
+    for _ in range(3):
+        ws.append([])
+    ws.append([styled('Monthly Summary (SF2)', 'sf2_bold')])
+    ws.append(['No. of School Days in month', summary['school_days']])
+    ws.append([None, styled('M', 'sf2_bold'), styled('F', 'sf2_bold'), styled('TOTAL', 'sf2_bold')])
+    for label, key in SUMMARY_LINES:
+        ws.append([label, summary['by']['M'][key], summary['by']['F'][key], summary['by']['T'][key]])
+    wb.save(fileobj)
@@ -0,0 +1,440 @@
+"""Streaming bulk imports: learners from CSV or XLSX, and past attendance from SF2 workbooks."""
+import csv
+import re
+from datetime import date, datetime
+from io import TextIOWrapper
+from itertools import islice
+
+from django.db import transaction
+from openpyxl import load_workbook
+
+from .caching import bump_after_commit, bump_school_calendar, bump_sf2_generation, bump_sf2_school_year
+from .models import AttendanceSessionRecord, Enrollment, NonSchoolDay, STATUS_CHOICES, Section, Student
+from .records import upsert_session_records
+from .rollups import refresh_daily_rollup
+
+STUDENT_COLUMNS = (
+    'lrn', 'last_name', 'first_name', 'middle_name', 'sex', 'birthdate',
+    'guardian_name', 'guardian_phone', 'section',
+)
+CHUNK_SIZE = 500
+# Row errors kept for the report; later ones are only counted
+MAX_ERRORS = 20
+
+_SEX = {'m': 'M', 'male': 'M', 'f': 'F', 'female': 'F'}
+SESSION_STATUSES = {code for code, _ in STATUS_CHOICES}
+
+
+def _header(cells):
+    return [str(c or '').strip().lower().replace(' ', '_') for c in cells]
+
+
+def iter_rows(fileobj, filename):
+    """Yield one dict per data row of a binary CSV or XLSX file, keyed by lower-cased header.
+
+    Both formats are read a row at a time (openpyxl in read-only mode), so
+    memory does not grow with the file.
+    """
+    if filename.lower().endswith('.xlsx'):
+        wb = load_workbook(fileobj, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = _header(next(rows, ()))
+            for cells in rows:
+                if any(c not in (None, '') for c in cells):
+                    yield dict(zip(header, cells))
+        finally:
+            wb.close()
+        return
+    reader = csv.reader(TextIOWrapper(fileobj, encoding='utf-8-sig', newline=''))
+    header = _header(next(reader, ()))
+    for cells in reader:
+        if any(c.strip() for c in cells):
+            yield dict(zip(header, cells))
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _parse_birthdate(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = _text(value)
+    return date.fromisoformat(value) if value else None
+
+
+def parse_student_row(row):
+    """Validate one import row; returns (Student, section name) or raises ValueError."""
+    last_name = _text(row.get('last_name'))
+    first_name = _text(row.get('first_name'))
+    if not last_name or not first_name:
+        raise ValueError('last_name and first_name are required')
+    sex = _SEX.get(_text(row.get('sex')).lower())
+    if not sex:
+        raise ValueError('sex must be M or F')
+    try:
+        birthdate = _parse_birthdate(row.get('birthdate'))
+    except ValueError:
+        raise ValueError('birthdate must be YYYY-MM-DD')
+    lrn = _text(row.get('lrn'))
+    if lrn.endswith('.0'):
+        # Spreadsheets often store LRNs as numbers
+        lrn = lrn[:-2]
+    student = Student(
+        lrn=lrn or None,
+        last_name=last_name[:100],
+        first_name=first_name[:100],
+        middle_name=_text(row.get('middle_name'))[:100],
+        sex=sex,
+        birthdate=birthdate,
+        guardian_name=_text(row.get('guardian_name'))[:150],
+        guardian_phone=_text(row.get('guardian_phone'))[:30],
+    )
+    student.set_derived_fields()
+    return student, _text(row.get('section'))
+
+
+def _identity(student):
+    # LRN when present, otherwise normalized name plus birthdate
+    return ('lrn', student.lrn) if student.lrn else ('name', student.search_name, student.birthdate)
+
+
+def _existing_ids(students):
+    """Map identity -> id for learners already in the database: one query per key kind."""
+    found = {}
+    lrns = {s.lrn for s in students if s.lrn}
+    if lrns:
+        for pk, lrn in Student.objects.filter(lrn__in=lrns).values_list('pk', 'lrn'):
+            found.setdefault(('lrn', lrn), pk)
+    names = {s.search_name for s in students if not s.lrn}
+    if names:
+        rows = Student.objects.filter(search_name__in=names).values_list('pk', 'search_name', 'birthdate')
+        for pk, name, birthdate in rows:
+            found.setdefault(('name', name, birthdate), pk)
+    return found
+
+
+def import_students(rows, school_year=None, enroll=False, chunk_size=CHUNK_SIZE):
+    """Create learners from ``rows`` (dicts as yielded by ``iter_rows``), a chunk at a time.
+
+    Learners already on file (same LRN, or same name and birthdate when there
+    is no LRN) are not created again. With ``enroll`` every imported or
+    matched learner is enrolled in ``school_year`` and, when the row names one
+    of its sections, assigned to it. Each chunk commits on its own.
+
+    Returns a dict of counts plus up to MAX_ERRORS (row number, message) pairs.
+    """
+    result = {
+        'created': 0, 'existing': 0, 'skipped': 0,
+        'enrolled': 0, 'already_enrolled': 0, 'assigned': 0, 'unknown_section': 0,
+        'errors': [],
+    }
+    enroll = bool(enroll and school_year)
+    sections = dict(Section.objects.filter(school_year=school_year).values_list('name', 'pk')) if enroll else {}
+    rows = iter(rows)
+    line = 1  # header
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        parsed = []
+        # Repeats across chunks are caught by the lookup, since earlier chunks are committed
+        seen = set()
+        for row in chunk:
+            line += 1
+            try:
+                student, section = parse_student_row(row)
+            except ValueError as exc:
+                result['skipped'] += 1
+                if len(result['errors']) < MAX_ERRORS:
+                    result['errors'].append((line, str(exc)))
+                continue
+            key = _identity(student)
+            if key in seen:
+                # Repeated in the file itself
+                result['existing'] += 1
+                continue
+            seen.add(key)
+            parsed.append((key, student, section))
+        with transaction.atomic():
+            _import_chunk(parsed, school_year if enroll else None, sections, result)
+    if enroll and (result['enrolled'] or result['assigned']):
+        # bulk_create and update() send no signals
+        try:
+            bump_sf2_school_year(school_year.id)
+        except Exception:
+            pass
+    return result
+
+
+def _import_chunk(parsed, school_year, sections, result):
+    existing = _existing_ids([student for _, student, _ in parsed])
+    new = [student for key, student, _ in parsed if key not in existing]
+    Student.objects.bulk_create(new, batch_size=CHUNK_SIZE)
+    result['created'] += len(new)
+    result['existing'] += len(parsed) - len(new)
+    if not school_year:
+        return
+
+    by_section = {}
+    for key, student, section in parsed:
+        sid = existing.get(key, student.pk)
+        section_id = sections.get(section) if section else None
+        if section and section_id is None:
+            result['unknown_section'] += 1
+        by_section.setdefault(section_id, []).append(sid)
+    student_ids = [sid for ids in by_section.values() for sid in ids]
+    enrolled = Enrollment.objects.filter(school_year=school_year, student_id__in=student_ids)
+    already = set(enrolled.values_list('student_id', flat=True))
+    Enrollment.objects.bulk_create(
+        [
+            Enrollment(student_id=sid, school_year=school_year, section_id=section_id)
+            for section_id, ids in by_section.items() for sid in ids if sid not in already
+        ],
+        ignore_conflicts=True,
+        batch_size=CHUNK_SIZE,
+    )
+    result['enrolled'] += enrolled.count() - len(already)
+    result['already_enrolled'] += len(already)
+    # Learners who were already enrolled move to the section named in the file
+    for section_id, ids in by_section.items():
+        if section_id is not None:
+            moved = [sid for sid in ids if sid in already]
+            if moved:
+                result['assigned'] += enrolled.filter(student_id__in=moved).exclude(section_id=section_id).update(section_id=section_id)
+
+
+# Historical attendance in the SF2 layout written by attendance.exports
+
+SF2_CHUNK_ROWS = 200
+_SF2_TITLE = re.compile(r'(\d{4})-(\d{1,2})')
+_SF2_END_OF_DAYS = 'present'
+
+
+def _sf2_marks(value):
+    """Split an SF2 day cell into (am, pm) statuses: 'P/A' -> ('P', 'A'), 'A/' -> ('A', ''), 'L' -> ('L', 'L')."""
+    text = _text(value).upper().replace(' ', '')
+    if not text:
+        return '', ''
+    if '/' in text:
+        am, _, pm = text.partition('/')
+    else:
+        am = pm = text
+    for status in (am, pm):
+        if status and status not in SESSION_STATUSES:
+            raise ValueError(f'unknown mark "{value}"')
+    return am, pm
+
+
+def _sf2_days(header, year, month):
+    """(column index, date) for the day columns of an SF2 header row."""
+    days = []
+    for i, cell in enumerate(header[4:], 4):
+        label = _text(cell)
+        if label.lower() == _SF2_END_OF_DAYS:
+            break
+        try:
+            days.append((i, date(year, month, int(float(label)))))
+        except ValueError:
+            raise ValueError(f'"{label}" is not a day of {year}-{month:02d}')
+    return days
+
+
+def import_sf2_attendance(school_year, fileobj, month=None, chunk_rows=SF2_CHUNK_ROWS, progress=None):
+    """Upsert AM/PM session records from an SF2 workbook, one sheet per month.
+
+    The month comes from each sheet title ("SF2 2025-09", as exported) or from
+    ``month`` given as (year, month). Learner rows are matched to enrollments
+    in ``school_year`` by LRN, with one query for every LRN not seen on an
+    earlier sheet. Each chunk of ``chunk_rows`` learners is written with one
+    bulk upsert and a rollup refresh in its own transaction. ``progress`` is
+    called with (sheet title, learner rows done) after every chunk.
+
+    Returns a dict of counts plus up to MAX_ERRORS (sheet, row, message) triples.
+    """
+    result = {'sheets': 0, 'learners': 0, 'records': 0, 'skipped': 0, 'errors': []}
+    enrollment_by_lrn = {}
+    months = set()
+
+    def error(sheet, line, message):
+        result['skipped'] += 1
+        if len(result['errors']) < MAX_ERRORS:
+            result['errors'].append((sheet, line, message))
+
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            found = _SF2_TITLE.search(ws.title)
+            year, mon = month or ((int(found.group(1)), int(found.group(2))) if found else (None, None))
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header or _text(header[0]).upper() != 'LRN':
+                continue
+            if not year:
+                error(ws.title, 1, 'sheet title has no YYYY-MM; give the month explicitly')
+                continue
+            try:
+                days = _sf2_days(header, year, mon)
+            except ValueError as exc:
+                error(ws.title, 1, str(exc))
+                continue
+            days = [(i, d) for i, d in days if school_year.start_date <= d <= school_year.end_date]
+            result['sheets'] += 1
+            months.add((year, mon))
+            line = 1
+            done = 0
+            ended = False
+            while not ended:
+                learners = []
+                read = 0
+                for cells in islice(rows, chunk_rows):
+                    read += 1
+                    line += 1
+                    first = _text(cells[0] if cells else None)
+                    if first.lower().startswith('monthly summary'):
+                        # Everything below is the summary block
+                        ended = True
+                        break
+                    if first.endswith('.0'):
+                        first = first[:-2]
+                    if first:
+                        learners.append((line, first, cells))
+                    elif len(cells) > 2 and _text(cells[2]):
+                        # Per-day total and blank rows have no sex column
+                        error(ws.title, line, 'learner row has no LRN')
+                ended = ended or read < chunk_rows
+                if not learners:
+                    continue
+                missing = {lrn for _, lrn, _ in learners} - enrollment_by_lrn.keys()
+                if missing:
+                    enrollment_by_lrn.update(dict.fromkeys(missing))
+                    pairs = Enrollment.objects.filter(school_year=school_year, student__lrn__in=missing).values_list('student__lrn', 'id')
+                    for lrn, eid in pairs:
+                        # The same LRN on two learners cannot be resolved
+                        enrollment_by_lrn[lrn] = eid if enrollment_by_lrn[lrn] is None else False
+                records = []
+                for n, lrn, cells in learners:
+                    eid = enrollment_by_lrn.get(lrn)
+                    if not eid:
+                        error(ws.title, n, f'LRN {lrn} is {"shared by several learners" if eid is False else "not enrolled"} in {school_year.name}')
+                        continue
+                    try:
+                        marks = [(day, _sf2_marks(cells[i] if i < len(cells) else None)) for i, day in days]
+                    except ValueError as exc:
+                        error(ws.title, n, str(exc))
+                        continue
+                    records += [
+                        AttendanceSessionRecord(enrollment_id=eid, date=day, session=session, status=status)
+                        for day, (am, pm) in marks
+                        for session, status in (('AM', am), ('PM', pm)) if status
+                    ]
+                    result['learners'] += 1
+                with transaction.atomic():
+                    upsert_session_records(records, update_fields=('status',))
+                    refresh_daily_rollup({r.enrollment_id for r in records}, {r.date for r in records})
+                result['records'] += len(records)
+                done += len(learners)
+                if progress:
+                    progress(ws.title, done)
+    finally:
+        wb.close()
+    for year, mon in sorted(months):
+        try:
+            bump_sf2_generation(school_year.id, year, mon)
+        except Exception:
+            pass
+    return result
+
+
+# Non-school days (holidays and class suspensions) from CSV
+
+NSD_KINDS = {
+    'hol': 'HOL', 'holiday': 'HOL', 'h': 'HOL',
+    'sus': 'SUS', 'suspension': 'SUS', 'class suspension': 'SUS', 'c': 'SUS',
+}
+NSD_FIELDS = ('kind', 'title', 'notes')
+
+
+def parse_non_school_days(rows, school_year):
+    """Validate every CSV row up front.
+
+    Returns (entries, skipped): entries maps date -> {'kind', 'title', 'notes'}
+    (a later row for the same date replaces an earlier one), skipped is a
+    list of (row number, reason).
+    """
+    entries = {}
+    skipped = []
+    for line, row in enumerate(rows, 2):
+        raw_date = _text(row.get('date'))
+        title = _text(row.get('title'))[:150]
+        if not raw_date or not title:
+            skipped.append((line, 'date and title are required'))
+            continue
+        try:
+            day = date.fromisoformat(raw_date)
+        except ValueError:
+            skipped.append((line, f'"{raw_date}" is not a YYYY-MM-DD date'))
+            continue
+        if not school_year.start_date <= day <= school_year.end_date:
+            skipped.append((line, f'{day} is outside {school_year.name}'))
+            continue
+        if day in entries:
+            skipped.append((entries[day]['line'], f'{day} appears again on row {line}'))
+        entries[day] = {
+            'line': line,
+            'kind': NSD_KINDS.get(_text(row.get('kind')).lower(), 'HOL'),
+            'title': title,
+            'notes': _text(row.get('notes'))[:255],
+        }
+    return entries, skipped
+
+
+def plan_non_school_days(school_year, entries):
+    """Diff parsed entries against the school year's saved days with one query.
+
+    Returns (create, update, unchanged): unsaved NonSchoolDay objects to insert,
+    (saved object with new values applied, old values) pairs, and the number
+    of entries that match what is saved.
+    """
+    saved = {nsd.date: nsd for nsd in NonSchoolDay.objects.filter(school_year=school_year, date__in=list(entries))}
+    create, update, unchanged = [], [], 0
+    for day in sorted(entries):
+        values = {f: entries[day][f] for f in NSD_FIELDS}
+        nsd = saved.get(day)
+        if nsd is None:
+            create.append(NonSchoolDay(school_year=school_year, date=day, **values))
+            continue
+        old = {f: getattr(nsd, f) for f in NSD_FIELDS}
+        if old == values:
+            unchanged += 1
+            continue
+        for f, v in values.items():
+            setattr(nsd, f, v)
+        update.append((nsd, old))
+    return create, update, unchanged
+
+
+def apply_non_school_days(school_year, entries):
+    """Write a plan with one bulk insert and one bulk update, then bump the touched months.
+
+    Returns (created, updated, unchanged).
+    """
+    with transaction.atomic():
+        create, update, unchanged = plan_non_school_days(school_year, entries)
+        NonSchoolDay.objects.bulk_create(create)
+        NonSchoolDay.objects.bulk_update([nsd for nsd, _ in update], list(NSD_FIELDS))
+    # Bulk writes send no signals; only the months that changed are invalidated
+    for year, month in sorted({(n.date.year, n.date.month) for n in create + [nsd for nsd, _ in update]}):
+        try:
+            bump_sf2_generation(school_year.id, year, month)
+        except Exception:
+            pass
+    if create or update:
+        try:
+            bump_after_commit(bump_school_calendar, school_year.id)
+        except Exception:
+            pass
+    return len(create), len(update), unchanged
@@ -0,0 +1,181 @@
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Font, PatternFill
+
+from attendance.exports import SUMMARY_LINES, _column_width, _headers, write_sf2_workbook
+from attendance.models import AttendanceSessionRecord, Enrollment, SchoolYear, Student
+from attendance.reports import MonthGrid
+
+
+def build_sf2_workbook(grid):
+    """The original in-memory SF2 exporter, kept as the benchmark baseline."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = f"SF2 {grid.year}-{grid.month:02d}"
+    days = grid.days
+
+    for c, h in enumerate(_headers(grid), 1):
+        cell = ws.cell(row=1, column=c, value=h)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center')
+
+    # Non-school days for shading
+    nsd_dates = set(grid.nsd_dates)
+    nsd_fill = PatternFill(start_color='DDDDDD', end_color='DDDDDD', fill_type='solid')
+
+    def write_group(group, per_day, label):
+        nonlocal row
+        for r in group:
+            ws.cell(row=row, column=1, value=r['lrn'])
+            ws.cell(row=row, column=2, value=r['name'])
+            ws.cell(row=row, column=3, value=r['sex'])
+            ws.cell(row=row, column=4, value=r['birthdate'].strftime('%Y-%m-%d') if r['birthdate'] else '')
+            col = 5
+            for d, mark in zip(days, r['day_marks']):
+                c = ws.cell(row=row, column=col, value=mark)
+                if d in nsd_dates:
+                    c.fill = nsd_fill
+                col += 1
+            counts = r['counts']
+            ws.cell(row=row, column=col, value=counts['P']); col += 1
+            ws.cell(row=row, column=col, value=counts['A']); col += 1
+            ws.cell(row=row, column=col, value=counts['L']); col += 1
+            ws.cell(row=row, column=col, value=counts['E']); col += 1
+            row += 1
+
+        # Totals row for present per day
+        ws.cell(row=row, column=2, value=f"{label} present per day").font = Font(bold=True)
+        col = 5
+        for v in per_day:
+            ws.cell(row=row, column=col, value=v); col += 1
+        row += 2
+
+    row = 2
+    write_group(grid.rows_m, grid.mpd, 'Male')
+    write_group(grid.rows_f, grid.fpd, 'Female')
+    # Combined row
+    ws.cell(row=row, column=2, value='Combined present per day').font = Font(bold=True)
+    col = 5
+    for v in grid.cpd:
+        ws.cell(row=row, column=col, value=v); col += 1
+    row += 2
+
+    # Auto width (simple heuristic)
+    for column_cells in ws.columns:
+        length = max(len(str(cell.value)) if cell.value is not None else 0 for cell in column_cells)
+        ws.column_dimensions[column_cells[0].column_letter].width = _column_width(length)
+
+    # Append SF2 monthly summary block
+    summary = grid.summary()
+    row += 2
+    ws.cell(row=row, column=1, value='Monthly Summary (SF2)').font = Font(bold=True)
+    row += 1
+    ws.cell(row=row, column=1, value='No. of School Days in month')
+    ws.cell(row=row, column=2, value=summary['school_days'])
+    row += 1
+    ws.cell(row=row, column=2, value='M').font = Font(bold=True)
+    ws.cell(row=row, column=3, value='F').font = Font(bold=True)
+    ws.cell(row=row, column=4, value='TOTAL').font = Font(bold=True)
+    row += 1
+    for label, key in SUMMARY_LINES:
+        ws.cell(row=row, column=1, value=label)
+        ws.cell(row=row, column=2, value=summary['by']['M'][key])
+        ws.cell(row=row, column=3, value=summary['by']['F'][key])
+        ws.cell(row=row, column=4, value=summary['by']['T'][key])
+        row += 1
+    return wb
+
+
+def _in_memory(grid):
+    out = BytesIO()
+    build_sf2_workbook(grid).save(out)
+    return len(out.getvalue())
+
+
+def _streaming(grid):
+    with tempfile.TemporaryFile() as tmp:
+        write_sf2_workbook(grid, tmp)
+        return tmp.tell()
+
+
+class Command(BaseCommand):
+    help = "Compare peak memory and wall time of the in-memory and write-only SF2 Excel exporters."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schoolyear', type=int, help='School year id (defaults to the active one)')
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--month', type=int)
+        parser.add_argument('--section', type=int, help='Limit to one section id')
+        parser.add_argument('--synthetic', type=int, default=0, metavar='N',
+                            help='Benchmark N generated learners in a rolled-back transaction instead of real data')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **opts):
+        if opts['synthetic']:
+            with transaction.atomic():
+                sy, year, month = self._generate(opts['synthetic'])
+                self._run(sy, year, month, Enrollment.objects.filter(school_year=sy), opts['repeat'])
+                transaction.set_rollback(True)
+            return
+
+        if opts['schoolyear']:
+            sy = SchoolYear.objects.filter(pk=opts['schoolyear']).first()
+        else:
+            sy = SchoolYear.objects.filter(is_active=True).first()
+        if not sy:
+            raise CommandError('School year not found.')
+        today = date.today()
+        year = opts['year'] or today.year
+        month = opts['month'] or today.month
+        enrollments = Enrollment.objects.filter(school_year=sy, active=True)
+        if opts['section']:
+            enrollments = enrollments.filter(section_id=opts['section'])
+        self._run(sy, year, month, enrollments, opts['repeat'])
+
+    def _generate(self, n):
+        rng = random.Random(0)
+        sy = SchoolYear.objects.create(name='bench-sf2', start_date=date(2030, 6, 3), end_date=date(2031, 3, 28))
+        students = Student.objects.bulk_create([
+            Student(last_name=f'Learner{i:05d}', first_name='Bench', sex=rng.choice('MF'), lrn=f'{i:012d}')
+            for i in range(n)
+        ])
+        enrollments = Enrollment.objects.bulk_create([
+            Enrollment(student=s, school_year=sy, date_enrolled=sy.start_date) for s in students
+        ])
+        days = [date(2030, 7, 1) + timedelta(i) for i in range(31)]
+        statuses = 'PPPPPPPPALE'
+        recs = [
+            AttendanceSessionRecord(enrollment=e, date=d, session=session, status=rng.choice(statuses))
+            for e in enrollments for d in days if d.weekday() < 5 for session in ('AM', 'PM')
+        ]
+        AttendanceSessionRecord.objects.bulk_create(recs, batch_size=2000)
+        return sy, 2030, 7
+
+    def _run(self, sy, year, month, enrollments, repeat):
+        grid = MonthGrid(sy, year, month, enrollments.select_related('student'))
+        grid.summary()
+        self.stdout.write(f"{sy.name} {year}-{month:02d}: {len(grid.enrollments)} learners x {len(grid.days)} days")
+        for label, fn in (('in-memory', _in_memory), ('write-only', _streaming)):
+            times = []
+            peak = 0
+            size = 0
+            for _ in range(max(1, repeat)):
+                tracemalloc.start()
+                t0 = time.perf_counter()
+                size = fn(grid)
+                times.append(time.perf_counter() - t0)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            self.stdout.write(
+                f"  {label:<10}  best {min(times) * 1000:8.1f} ms  "
+                f"peak {peak / (1024 * 1024):7.1f} MiB  size {size / 1024:7.1f} KiB"
+            )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.importers import SF2_CHUNK_ROWS, import_sf2_attendance
+from attendance.models import SchoolYear
+
+
+def _month(value):
+    y, m = [int(x) for x in value.split('-')]
+    return y, m
+
+
+class Command(BaseCommand):
+    help = "Backfill AM/PM session records from an SF2 workbook (one sheet per month)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='SF2 .xlsx file, laid out like the monthly export')
+        parser.add_argument('--schoolyear', type=int, help='School year id (defaults to the active one)')
+        parser.add_argument('--month', type=_month, help='YYYY-MM for sheets whose title has no month')
+        parser.add_argument('--chunk-rows', type=int, default=SF2_CHUNK_ROWS, help='Learner rows per transaction')
+
+    def handle(self, *args, **opts):
+        if opts['schoolyear']:
+            sy = SchoolYear.objects.filter(pk=opts['schoolyear']).first()
+        else:
+            sy = SchoolYear.objects.filter(is_active=True).first()
+        if not sy:
+            raise CommandError('School year not found.')
+
+        def progress(sheet, done):
+            self.stdout.write(f"{sheet}: {done} learner row(s)")
+
+        try:
+            with open(opts['path'], 'rb') as fh:
+                result = import_sf2_attendance(sy, fh, month=opts['month'], chunk_rows=opts['chunk_rows'], progress=progress)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        for sheet, line, error in result['errors']:
+            self.stderr.write(f"{sheet}, row {line}: {error}")
+        self.stdout.write(
+            f"{sy.name}: {result['records']} record(s) for {result['learners']} learner row(s) "
+            f"from {result['sheets']} sheet(s), skipped {result['skipped']}"
+        )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.importers import CHUNK_SIZE, import_students, iter_rows
+from attendance.models import SchoolYear
+
+
+class Command(BaseCommand):
+    help = "Import learners from a CSV or XLSX file, optionally enrolling them in a school year."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (UTF-8) or XLSX file with a header row')
+        parser.add_argument('--schoolyear', type=int, help='Enroll every learner in this school year id')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows validated and inserted per transaction')
+
+    def handle(self, *args, **opts):
+        sy = None
+        if opts['schoolyear']:
+            sy = SchoolYear.objects.filter(pk=opts['schoolyear']).first()
+            if not sy:
+                raise CommandError('School year not found.')
+        try:
+            with open(opts['path'], 'rb') as fh:
+                result = import_students(
+                    iter_rows(fh, opts['path']), school_year=sy, enroll=sy is not None, chunk_size=opts['chunk_size'],
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+        for line, error in result['errors']:
+            self.stderr.write(f"row {line}: {error}")
+        self.stdout.write(
+            f"created {result['created']}, already on file {result['existing']}, skipped {result['skipped']}"
+        )
+        if sy:
+            self.stdout.write(
+                f"{sy.name}: enrolled {result['enrolled']}, already enrolled {result['already_enrolled']}, "
+                f"moved section {result['assigned']}, unknown section {result['unknown_section']}"
+            )
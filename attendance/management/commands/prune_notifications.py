@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from attendance.notifications import MAX_PER_USER, RETENTION_DAYS, prune_notifications
+
+
+class Command(BaseCommand):
+    help = "Delete old notifications by age and per-user count, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=RETENTION_DAYS, help=f'Delete notifications older than this many days (default {RETENTION_DAYS}; 0 disables)')
+        parser.add_argument('--keep', type=int, default=MAX_PER_USER, help=f'Keep at most this many per user (default {MAX_PER_USER}; 0 disables)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction')
+
+    def handle(self, *args, **opts):
+        by_age, by_count = prune_notifications(opts['days'], opts['keep'], batch_size=opts['batch_size'])
+        self.stdout.write(f"Deleted {by_age} notification(s) past retention and {by_count} over the per-user limit")
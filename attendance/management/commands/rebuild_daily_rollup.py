@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from attendance.models import SchoolYear
+from attendance.rollups import rebuild_daily_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyAttendance rollup and its running totals from session records for one or all school years."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schoolyear', type=int, help='School year id (defaults to the active one)')
+        parser.add_argument('--all', action='store_true', help='Rebuild every school year')
+
+    def handle(self, *args, **opts):
+        if opts['all']:
+            years = list(SchoolYear.objects.all())
+        elif opts['schoolyear']:
+            years = list(SchoolYear.objects.filter(pk=opts['schoolyear']))
+        else:
+            years = list(SchoolYear.objects.filter(is_active=True)[:1])
+        if not years:
+            raise CommandError('School year not found.')
+        for sy in years:
+            with transaction.atomic():
+                n = rebuild_daily_rollup(sy)
+            self.stdout.write(f"{sy.name}: {n} learner-day row(s)")
@@ -0,0 +1,44 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from attendance.caching import bump_sf2_generation
+from attendance.models import SchoolYear
+from attendance.records import rebuild_sessions_from_periods
+from attendance.rollups import refresh_daily_rollup
+
+
+class Command(BaseCommand):
+    help = "Recompute AM/PM session records from period records for a date range."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schoolyear', type=int, help='School year id (defaults to the active one)')
+        parser.add_argument('--start', type=date.fromisoformat, help='First date, YYYY-MM-DD (defaults to the school year start)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date, YYYY-MM-DD (defaults to the school year end)')
+
+    def handle(self, *args, **opts):
+        if opts['schoolyear']:
+            sy = SchoolYear.objects.filter(pk=opts['schoolyear']).first()
+        else:
+            sy = SchoolYear.objects.filter(is_active=True).first()
+        if not sy:
+            raise CommandError('School year not found.')
+        start = opts['start'] or sy.start_date
+        end = opts['end'] or sy.end_date
+        if start > end:
+            raise CommandError('--start must not be after --end.')
+
+        with transaction.atomic():
+            keys = rebuild_sessions_from_periods(sy, start, end)
+            by_date = {}
+            for eid, day in keys:
+                by_date.setdefault(day, set()).add(eid)
+            for day, eids in by_date.items():
+                refresh_daily_rollup(eids, [day])
+        for year, month in sorted({(d.year, d.month) for d in by_date}):
+            try:
+                bump_sf2_generation(sy.id, year, month)
+            except Exception:
+                pass
+        self.stdout.write(f"{sy.name}: rebuilt {len(keys)} learner-day(s) across {len(by_date)} date(s)")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from attendance.notifications import rebuild_unread_counters
+
+
+class Command(BaseCommand):
+    help = "Recount the per-user unread notification counters from the Notification table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help='User id (repeatable; defaults to every user)')
+
+    def handle(self, *args, **opts):
+        with transaction.atomic():
+            rebuild_unread_counters(opts['users'])
+        scope = f"{len(opts['users'])} user(s)" if opts['users'] else 'all users'
+        self.stdout.write(f"Unread notification counters recounted for {scope}")
@@ -0,0 +1,67 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.caching import cached_sf2_summary, reset_sf2_cache_stats, sf2_cache_stats
+from attendance.models import Enrollment, SchoolYear, Section
+from attendance.reports import MonthGrid
+
+
+def _months(sy):
+    y, m = sy.start_date.year, sy.start_date.month
+    while (y, m) <= (sy.end_date.year, sy.end_date.month):
+        yield y, m
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+
+
+class Command(BaseCommand):
+    help = "Precompute cached SF2 summaries for every report scope, and show cache hit/miss counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schoolyear', type=int, help='School year id (defaults to the active one)')
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--month', type=int)
+        parser.add_argument('--all-months', action='store_true', help='Warm every month of the school year')
+        parser.add_argument('--stats', action='store_true', help='Only print the hit/miss counters')
+        parser.add_argument('--reset-stats', action='store_true', help='Reset the hit/miss counters')
+
+    def handle(self, *args, **opts):
+        if opts['reset_stats']:
+            reset_sf2_cache_stats()
+        if opts['stats'] or opts['reset_stats']:
+            self._print_stats()
+            return
+
+        if opts['schoolyear']:
+            sy = SchoolYear.objects.filter(pk=opts['schoolyear']).first()
+        else:
+            sy = SchoolYear.objects.filter(is_active=True).first()
+        if not sy:
+            raise CommandError('School year not found.')
+        if opts['all_months']:
+            months = list(_months(sy))
+        else:
+            today = date.today()
+            months = [(opts['year'] or today.year, opts['month'] or today.month)]
+
+        base = Enrollment.objects.filter(school_year=sy, active=True).select_related('student')
+        sections = list(Section.objects.filter(school_year=sy))
+        scopes = [('section:all', base)]
+        scopes += [(f'section:{s.id}', base.filter(section_id=s.id)) for s in sections]
+        scopes += [(f'user:{aid}', base.filter(section__adviser_id=aid)) for aid in sorted({s.adviser_id for s in sections})]
+
+        warmed = 0
+        for year, month in months:
+            for scope, enrollments in scopes:
+                cached_sf2_summary(
+                    sy.id, year, month, scope,
+                    lambda: MonthGrid(sy, year, month, enrollments).summary(),
+                    count=False,
+                )
+                warmed += 1
+        self.stdout.write(f"{sy.name}: {warmed} summary scope(s) cached across {len(months)} month(s)")
+        self._print_stats()
+
+    def _print_stats(self):
+        stats = sf2_cache_stats()
+        self.stdout.write(f"SF2 cache: {stats['hits']} hit(s), {stats['misses']} miss(es), {stats['hit_rate']}% hit rate")
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_daily_attendance(apps, schema_editor):
+    AttendanceSessionRecord = apps.get_model('attendance', 'AttendanceSessionRecord')
+    DailyAttendance = apps.get_model('attendance', 'DailyAttendance')
+    fields = {'present': 'P', 'absent': 'A', 'late': 'L', 'excused': 'E'}
+    rows = (
+        AttendanceSessionRecord.objects.values('enrollment_id', 'date')
+        .annotate(**{f: Count('id', filter=Q(status=code)) for f, code in fields.items()})
+        .order_by()
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(DailyAttendance(**row))
+        if len(batch) >= 2000:
+            DailyAttendance.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        DailyAttendance.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0016_merge_20250909_1852'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present', models.PositiveSmallIntegerField(default=0)),
+                ('absent', models.PositiveSmallIntegerField(default=0)),
+                ('late', models.PositiveSmallIntegerField(default=0)),
+                ('excused', models.PositiveSmallIntegerField(default=0)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_attendance', to='attendance.enrollment')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='idx_daily_date')],
+                'unique_together': {('enrollment', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_attendance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_notification_counters(apps, schema_editor):
+    Notification = apps.get_model('attendance', 'Notification')
+    NotificationCounter = apps.get_model('attendance', 'NotificationCounter')
+    rows = Notification.objects.values('user_id').annotate(unread=Count('id', filter=Q(is_read=False))).order_by()
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=row['user_id'], unread=row['unread']) for row in rows],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0017_dailyattendance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_notification_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0018_notificationcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created', '-id'], name='idx_notif_user_created_id'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def backfill_birthday_keys(apps, schema_editor):
+    Student = apps.get_model('attendance', 'Student')
+    Student.objects.filter(birthdate__isnull=False).update(
+        birthday_key=ExtractMonth('birthdate') * 100 + ExtractDay('birthdate'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0019_notification_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='birthday_key',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_birthday_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:20
+
+from django.db import migrations, models
+
+from attendance.search import search_names
+
+
+def backfill_search_names(apps, schema_editor):
+    Student = apps.get_model('attendance', 'Student')
+    batch = []
+    for s in Student.objects.only('last_name', 'first_name', 'middle_name').iterator(chunk_size=2000):
+        s.search_name, s.search_name_rev = search_names(s.last_name, s.first_name, s.middle_name)
+        batch.append(s)
+        if len(batch) >= 2000:
+            Student.objects.bulk_update(batch, ['search_name', 'search_name_rev'])
+            batch = []
+    Student.objects.bulk_update(batch, ['search_name', 'search_name_rev'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0020_student_birthday_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=310),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='search_name_rev',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=310),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='idx_student_name_id'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['lrn'], name='idx_student_lrn'),
+        ),
+        migrations.RunPython(backfill_search_names, migrations.RunPython.noop),
+    ]
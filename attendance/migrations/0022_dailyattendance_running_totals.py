@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:31
+
+from django.db import migrations, models
+
+FIELDS = ('present', 'absent', 'late', 'excused')
+
+
+def backfill_running_totals(apps, schema_editor):
+    DailyAttendance = apps.get_model('attendance', 'DailyAttendance')
+    rows = DailyAttendance.objects.order_by('enrollment_id', 'date').only('enrollment_id', 'date', *FIELDS)
+    batch = []
+    current, totals = None, None
+    for row in rows.iterator(chunk_size=2000):
+        if row.enrollment_id != current:
+            current, totals = row.enrollment_id, dict.fromkeys(FIELDS, 0)
+        for field in FIELDS:
+            totals[field] += getattr(row, field)
+            setattr(row, f'cum_{field}', totals[field])
+        batch.append(row)
+        if len(batch) >= 2000:
+            DailyAttendance.objects.bulk_update(batch, [f'cum_{field}' for field in FIELDS])
+            batch = []
+    DailyAttendance.objects.bulk_update(batch, [f'cum_{field}' for field in FIELDS])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0021_student_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyattendance',
+            name='cum_absent',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailyattendance',
+            name='cum_excused',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailyattendance',
+            name='cum_late',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailyattendance',
+            name='cum_present',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_running_totals, migrations.RunPython.noop),
+    ]
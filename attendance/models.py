@@ -3,6 +3,8 @@ from django.conf import settings
 from django.utils import timezone
 from django.conf import settings as dj_settings
 
+from .search import search_names
+
 # Shared status choices for attendance
 STATUS_CHOICES = (
     ("P", "Present"),
@@ -53,13 +55,43 @@ class Student(models.Model):
     is_active = models.BooleanField(default=True)
     guardian_name = models.CharField(max_length=150, blank=True)
     guardian_phone = models.CharField(max_length=30, blank=True, help_text="Parent/guardian mobile (e.g., 09171234567 or +639171234567)")
+    # month * 100 + day of birthdate, indexed for the dashboard's upcoming-birthday window
+    birthday_key = models.PositiveSmallIntegerField(null=True, blank=True, editable=False, db_index=True)
+    # Normalized "last first middle" and "first middle last" for indexed prefix search
+    search_name = models.CharField(max_length=310, blank=True, editable=False, db_index=True)
+    search_name_rev = models.CharField(max_length=310, blank=True, editable=False, db_index=True)
 
     class Meta:
         ordering = ["last_name", "first_name"]
+        indexes = [
+            models.Index(fields=["last_name", "first_name", "id"], name="idx_student_name_id"),
+            models.Index(fields=["lrn"], name="idx_student_lrn"),
+        ]
 
     def __str__(self):
         return f"{self.last_name}, {self.first_name}"
 
+    @staticmethod
+    def birthday_key_for(birthdate):
+        return birthdate.month * 100 + birthdate.day if birthdate else None
+
+    def set_derived_fields(self):
+        """Fill birthday_key and the search columns; bulk writers call this before bulk_create/bulk_update."""
+        self.birthday_key = self.birthday_key_for(self.birthdate)
+        self.search_name, self.search_name_rev = search_names(self.last_name, self.first_name, self.middle_name)
+
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'birthdate' in update_fields:
+                update_fields.add('birthday_key')
+            if update_fields & {'last_name', 'first_name', 'middle_name'}:
+                update_fields |= {'search_name', 'search_name_rev'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
 
 class Enrollment(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="enrollments")
@@ -96,6 +128,34 @@ class AttendanceSessionRecord(models.Model):
         return f"{self.enrollment} - {self.date} {self.session}: {self.get_status_display()}"
 
 
+class DailyAttendance(models.Model):
+    """Per learner-day rollup of AttendanceSessionRecord, counted in half-days.
+
+    The cum_* fields are running totals of the enrollment's rows up to and
+    including this date, so a date-range total is the difference of two rows.
+    """
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name="daily_attendance")
+    date = models.DateField()
+    present = models.PositiveSmallIntegerField(default=0)
+    absent = models.PositiveSmallIntegerField(default=0)
+    late = models.PositiveSmallIntegerField(default=0)
+    excused = models.PositiveSmallIntegerField(default=0)
+    cum_present = models.PositiveIntegerField(default=0)
+    cum_absent = models.PositiveIntegerField(default=0)
+    cum_late = models.PositiveIntegerField(default=0)
+    cum_excused = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("enrollment", "date")
+        ordering = ["-date"]
+        indexes = [
+            models.Index(fields=["date"], name="idx_daily_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.enrollment} - {self.date}: P{self.present} A{self.absent} L{self.late} E{self.excused}"
+
+
 class NonSchoolDay(models.Model):
     TYPE_CHOICES = (
         ("HOL", "Holiday"),
@@ -131,12 +191,22 @@ class Notification(models.Model):
         ordering = ["-created"]
         indexes = [
             models.Index(fields=["user", "is_read", "-created"], name="idx_notif_user_read_created"),
+            models.Index(fields=["user", "-created", "-id"], name="idx_notif_user_created_id"),
         ]
 
     def __str__(self):
         return f"{self.user}: {self.message}"
 
 
+class NotificationCounter(models.Model):
+    """Unread Notification count per user, kept in step with the table for the navbar badge."""
+    user = models.OneToOneField(dj_settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="notification_counter")
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user}: {self.unread} unread"
+
+
 class Period(models.Model):
     HALF_CHOICES = (
         ("AM", "AM"),
@@ -0,0 +1,194 @@
+"""In-app notifications raised while saving attendance, and the per-user unread counter."""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Notification, NotificationCounter, STATUS_CHOICES
+
+# Statuses that raise a notification when new or changed
+NOTIFY_STATUSES = {'A', 'L', 'E'}
+STATUS_WORDS = dict(STATUS_CHOICES)
+
+# Retention used by prune_notifications; 0 disables that rule
+RETENTION_DAYS = getattr(settings, 'NOTIFY_RETENTION_DAYS', 90)
+MAX_PER_USER = getattr(settings, 'NOTIFY_MAX_PER_USER', 500)
+
+PAGE_SIZE = 50
+
+# Newest ids returned by the badge endpoint
+BADGE_LATEST = 5
+
+_MESSAGE_MAX = Notification._meta.get_field('message').max_length
+
+
+def _message(student, day, sessions):
+    statuses = {status for _, status in sessions}
+    if len(statuses) == 1:
+        halves = ', '.join(session for session, _ in sessions)
+        detail = f"{STATUS_WORDS.get(sessions[0][1], sessions[0][1])} ({halves})"
+    else:
+        detail = ', '.join(f"{STATUS_WORDS.get(status, status)} ({session})" for session, status in sessions)
+    return f"{student.last_name}, {student.first_name} is {detail} on {day}"[:_MESSAGE_MAX]
+
+
+def attendance_notifications(user, changes, url, coalesce=None):
+    """Build unsaved notifications for ``changes``: (student, date, session, status) tuples.
+
+    Only statuses in NOTIFY_STATUSES are reported; the caller filters out
+    rows whose status did not change. By default AM and PM changes for the
+    same learner and day are merged, per settings.NOTIFY_COALESCE_SESSIONS.
+    """
+    if coalesce is None:
+        coalesce = getattr(settings, 'NOTIFY_COALESCE_SESSIONS', True)
+    grouped = {}
+    for student, day, session, status in changes:
+        if status not in NOTIFY_STATUSES:
+            continue
+        key = (student.pk, day) if coalesce else (student.pk, day, session)
+        grouped.setdefault(key, (student, day, []))[2].append((session, status))
+    return [
+        Notification(user=user, message=_message(student, day, sessions), url=url)
+        for student, day, sessions in grouped.values()
+    ]
+
+
+def notify_attendance_changes(user, changes, url, coalesce=None):
+    """Create the notifications for ``changes`` with a single bulk insert."""
+    notes = attendance_notifications(user, changes, url, coalesce=coalesce)
+    if notes:
+        Notification.objects.bulk_create(notes)
+        adjust_unread(user.pk, len(notes))
+    return len(notes)
+
+
+def recount_unread(user_id):
+    """Recount one user's unread notifications from the table and store the result."""
+    n = Notification.objects.filter(user_id=user_id, is_read=False).count()
+    NotificationCounter.objects.update_or_create(user_id=user_id, defaults={'unread': n})
+    return n
+
+
+def adjust_unread(user_id, delta):
+    """Atomically add ``delta`` to a user's unread counter, creating it from a recount if missing."""
+    if not delta:
+        return
+    if not NotificationCounter.objects.filter(user_id=user_id).update(unread=Greatest(F('unread') + delta, 0)):
+        # No counter yet: the recount already includes this change
+        recount_unread(user_id)
+
+
+def unread_count(user):
+    """Unread notifications for the navbar badge: one primary-key read."""
+    n = NotificationCounter.objects.filter(user_id=user.pk).values_list('unread', flat=True).first()
+    if n is None:
+        n = recount_unread(user.pk)
+    return n
+
+
+def badge_state(user, latest=BADGE_LATEST):
+    """Unread count and newest notification ids for the navbar badge, plus an ETag for them.
+
+    Two indexed reads: the counter row and the head of (user, -created, -id).
+    """
+    unread = unread_count(user)
+    ids = list(
+        Notification.objects.filter(user=user).order_by('-created', '-id').values_list('id', flat=True)[:latest]
+    )
+    etag = '"n{}-{}"'.format(unread, '.'.join(map(str, ids)))
+    return {'unread': unread, 'latest': ids}, etag
+
+
+def mark_read(user, ids=None):
+    """Mark the user's unread notifications (or just those in ``ids``) as read."""
+    qs = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    n = qs.update(is_read=True)
+    adjust_unread(user.pk, -n)
+    return n
+
+
+def rebuild_unread_counters(user_ids=None):
+    """Recount unread notifications for all users (or just ``user_ids``) in bulk."""
+    counters = NotificationCounter.objects.all()
+    rows = Notification.objects.values('user_id').annotate(unread=Count('id', filter=Q(is_read=False))).order_by()
+    if user_ids is not None:
+        counters = counters.filter(user_id__in=user_ids)
+        rows = rows.filter(user_id__in=user_ids)
+    counters.update(unread=0)
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=row['user_id'], unread=row['unread']) for row in rows],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['unread'],
+        batch_size=2000,
+    )
+
+
+def encode_cursor(n):
+    return f"{n.created.isoformat()}_{n.pk}"
+
+
+def decode_cursor(value):
+    """Parse an ``encode_cursor`` value into (created, id), or None if malformed."""
+    try:
+        created, pk = value.rsplit('_', 1)
+        return datetime.fromisoformat(created), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def notifications_page(user, cursor=None, size=PAGE_SIZE):
+    """One page of a user's notifications, newest first, using a (created, id) keyset.
+
+    Returns (items, next_cursor, applied_cursor). next_cursor is None on the
+    last page; applied_cursor is None when ``cursor`` was missing or malformed.
+    """
+    qs = Notification.objects.filter(user=user).order_by('-created', '-id')
+    key = decode_cursor(cursor) if cursor else None
+    if key:
+        created, pk = key
+        qs = qs.filter(Q(created__lt=created) | Q(created=created, id__lt=pk))
+    items = list(qs[:size + 1])
+    next_cursor = encode_cursor(items[size - 1]) if len(items) > size else None
+    return items[:size], next_cursor, (cursor if key else None)
+
+
+def _delete_in_batches(qs, batch_size):
+    """Delete ``qs`` a batch at a time, each in its own short transaction, fixing counters."""
+    deleted = 0
+    while True:
+        ids = list(qs.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            batch = Notification.objects.filter(id__in=ids)
+            unread = batch.filter(is_read=False).values('user_id').annotate(n=Count('id')).order_by()
+            for row in unread:
+                adjust_unread(row['user_id'], -row['n'])
+            deleted += batch.delete()[0]
+
+
+def prune_notifications(days=None, keep=None, batch_size=1000):
+    """Delete notifications older than ``days`` and beyond the newest ``keep`` per user.
+
+    Returns (deleted_by_age, deleted_by_count).
+    """
+    days = RETENTION_DAYS if days is None else days
+    keep = MAX_PER_USER if keep is None else keep
+    by_age = by_count = 0
+    if days:
+        cutoff = timezone.now() - timedelta(days=days)
+        by_age = _delete_in_batches(Notification.objects.filter(created__lt=cutoff), batch_size)
+    if keep:
+        over = Notification.objects.values('user_id').annotate(n=Count('id')).filter(n__gt=keep).order_by()
+        for row in list(over):
+            mine = Notification.objects.filter(user_id=row['user_id'])
+            created, pk = mine.order_by('-created', '-id').values_list('created', 'id')[keep - 1]
+            older = mine.filter(Q(created__lt=created) | Q(created=created, id__lt=pk))
+            by_count += _delete_in_batches(older, batch_size)
+    return by_age, by_count
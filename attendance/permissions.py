@@ -1,4 +1,6 @@
-from django.contrib.auth.models import Group
+from django.core.cache import cache
+
+from .caching import CAPS_CACHE_TIMEOUT, caps_cache_key
 from .models import FeatureAccess
 
 
@@ -16,55 +18,83 @@ FEATURES = {
     'manage_reports',
 }
 
+# Map legacy staff to Admin-like access for backward compatibility
+STAFF_FEATURES = {
+    'dashboard', 'take_attendance', 'view_reports', 'manage_schoolyears',
+    'enroll_students', 'manage_periods', 'assign_section',
+    'manage_students', 'view_student_history', 'manage_reports',
+}
+ADVISER_FEATURES = {
+    'dashboard', 'take_attendance', 'view_reports', 'manage_schoolyears',
+    'enroll_students', 'manage_periods', 'assign_section', 'view_student_history',
+}
+OFFICER_FEATURES = {'dashboard', 'take_attendance', 'view_student_history'}
+DEFAULT_FEATURES = {'dashboard'}
+
+# Attribute used to memoize the map on the user object, which Django builds per request
+_MEMO_ATTR = '_attendance_caps'
 
-def _in_group(user, name: str) -> bool:
+
+def _role_features(user, groups):
+    if getattr(user, 'is_staff', False):
+        return STAFF_FEATURES
+    # Group-based roles
+    if 'Admin' in groups or 'SchoolAdmin' in groups:
+        return FEATURES
+    if 'Adviser' in groups:
+        return ADVISER_FEATURES
+    if 'StudentOfficer' in groups:
+        return OFFICER_FEATURES
+    # Default minimal
+    return DEFAULT_FEATURES
+
+
+def resolve_caps(user):
+    """Compute the full capability map with one query for overrides and one for groups."""
     try:
-        return user.groups.filter(name=name).exists()
+        overrides = dict(FeatureAccess.objects.filter(user=user).values_list('feature', 'allow'))
     except Exception:
-        return False
+        overrides = {}
+    groups = set()
+    if not getattr(user, 'is_staff', False):
+        try:
+            groups = set(user.groups.values_list('name', flat=True))
+        except Exception:
+            pass
+    allowed = _role_features(user, groups)
+    # Per-user override takes precedence
+    return {key: bool(overrides[key]) if key in overrides else key in allowed for key in FEATURES}
 
 
-def has_feature(user, feature: str) -> bool:
+def caps_for(user):
     if not getattr(user, 'is_authenticated', False):
-        return False
+        return {key: False for key in FEATURES}
     if getattr(user, 'is_superuser', False):
-        return True
-    # Per-user override takes precedence
+        return {key: True for key in FEATURES}
+    caps = getattr(user, _MEMO_ATTR, None)
+    if caps is not None:
+        return caps
+    key = None
+    try:
+        key = caps_cache_key(user.pk)
+        caps = cache.get(key)
+    except Exception:
+        caps = None
+    if caps is None:
+        caps = resolve_caps(user)
+        if key is not None:
+            try:
+                cache.set(key, caps, timeout=CAPS_CACHE_TIMEOUT)
+            except Exception:
+                pass
     try:
-        fa = FeatureAccess.objects.filter(user=user, feature=feature).first()
-        if fa is not None:
-            return bool(fa.allow)
+        setattr(user, _MEMO_ATTR, caps)
     except Exception:
         pass
-    # Map legacy staff to Admin-like access for backward compatibility
-    if getattr(user, 'is_staff', False):
-        admin_like = {
-            'dashboard', 'take_attendance', 'view_reports', 'manage_schoolyears',
-            'enroll_students', 'manage_periods', 'assign_section',
-            'manage_students', 'view_student_history', 'manage_reports',
-        }
-        return feature in admin_like
+    return caps
 
-    # Group-based roles
-    is_admin = _in_group(user, 'Admin') or _in_group(user, 'SchoolAdmin')
-    is_adviser = _in_group(user, 'Adviser')
-    is_officer = _in_group(user, 'StudentOfficer')
 
-    if is_admin:
+def has_feature(user, feature: str) -> bool:
+    if getattr(user, 'is_authenticated', False) and getattr(user, 'is_superuser', False):
         return True
-    if is_adviser:
-        adviser_feats = {
-            'dashboard', 'take_attendance', 'view_reports', 'manage_schoolyears',
-            'enroll_students', 'manage_periods', 'assign_section', 'view_student_history',
-        }
-        return feature in adviser_feats
-    if is_officer:
-        officer_feats = {'dashboard', 'take_attendance', 'view_student_history'}
-        return feature in officer_feats
-
-    # Default minimal
-    return feature in {'dashboard'}
-
-
-def caps_for(user):
-    return {key: has_feature(user, key) for key in FEATURES}
+    return caps_for(user).get(feature, False)
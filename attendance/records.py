@@ -0,0 +1,96 @@
+"""Bulk write helpers for attendance records."""
+from .models import AttendancePeriodRecord, AttendanceSessionRecord
+
+
+def session_changes(existing, rows):
+    """Return unsaved AttendanceSessionRecord objects for rows that differ from ``existing``.
+
+    ``existing`` maps (enrollment_id, session) to saved records; ``rows`` yields
+    (enrollment_id, date, session, status, remarks) tuples.
+    """
+    changed = []
+    for eid, day, session, status, remarks in rows:
+        prev = existing.get((eid, session))
+        if prev is not None and prev.status == status and prev.remarks == remarks:
+            continue
+        changed.append(AttendanceSessionRecord(
+            enrollment_id=eid, date=day, session=session, status=status, remarks=remarks,
+        ))
+    return changed
+
+
+def upsert_session_records(records, update_fields=('status', 'remarks')):
+    """Insert or update session records in as few statements as the backend allows.
+
+    Conflicts on the (enrollment, date, session) unique key update ``update_fields``.
+    """
+    if not records:
+        return 0
+    AttendanceSessionRecord.objects.bulk_create(
+        records,
+        update_conflicts=True,
+        unique_fields=['enrollment', 'date', 'session'],
+        update_fields=list(update_fields),
+    )
+    return len(records)
+
+
+def session_status(statuses):
+    """Roll one half-day's period statuses up into a session status.
+
+    Absent for at least half the periods counts as Absent; otherwise any Late
+    makes it Late, then any Excused makes it Excused.
+    """
+    n = len(statuses)
+    if n == 0:
+        return 'P'
+    if statuses.count('A') * 2 >= n:
+        return 'A'
+    if 'L' in statuses:
+        return 'L'
+    if 'E' in statuses:
+        return 'E'
+    return 'P'
+
+
+def session_rows_from_periods(period_statuses):
+    """Build AM/PM session records from {(enrollment_id, date): {'AM': [...], 'PM': [...]}}."""
+    return [
+        AttendanceSessionRecord(
+            enrollment_id=eid, date=day, session=half,
+            status=session_status(halves.get(half, [])),
+        )
+        for (eid, day), halves in period_statuses.items()
+        for half in ('AM', 'PM')
+    ]
+
+
+def upsert_period_records(records):
+    """Insert or update period records, keyed on (enrollment, date, period)."""
+    if not records:
+        return 0
+    AttendancePeriodRecord.objects.bulk_create(
+        records,
+        update_conflicts=True,
+        unique_fields=['enrollment', 'date', 'period'],
+        update_fields=['status', 'time_in'],
+    )
+    return len(records)
+
+
+def rebuild_sessions_from_periods(school_year, start, end, batch_size=2000):
+    """Recompute session records from active-period records between two dates (inclusive).
+
+    Returns the set of (enrollment_id, date) pairs that were written.
+    """
+    qs = AttendancePeriodRecord.objects.filter(
+        enrollment__school_year=school_year, period__is_active=True,
+        date__gte=start, date__lte=end,
+    ).values_list('enrollment_id', 'date', 'period__half', 'status').order_by()
+    grouped = {}
+    for eid, day, half, status in qs.iterator(chunk_size=batch_size):
+        grouped.setdefault((eid, day), {}).setdefault(half, []).append(status)
+    rows = session_rows_from_periods(grouped)
+    for i in range(0, len(rows), batch_size):
+        upsert_session_records(rows[i:i + batch_size], update_fields=('status',))
+    return set(grouped)
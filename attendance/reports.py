@@ -0,0 +1,122 @@
+"""Shared month grid used by the SF2 report views and the Excel export."""
+from calendar import monthrange
+from datetime import date, timedelta
+from operator import add
+
+from .models import AttendanceSessionRecord
+from .school_calendar import school_calendar
+from .sf2 import MISSING, StatusMatrix, summarize
+
+
+def _code(c):
+    return '' if c == MISSING else chr(c)
+
+
+# (am byte, pm byte) -> cell text such as 'P/A', 'A/' or ''
+_MARKS = {}
+for _a in b'-PALE':
+    for _p in b'-PALE':
+        _MARKS[(_a, _p)] = f"{_code(_a)}/{_code(_p)}" if (_a != MISSING or _p != MISSING) else ''
+
+
+def month_range(sy, year: int, month: int):
+    """The part of the given month that falls inside the school year."""
+    first_day = date(year, month, 1)
+    last_day = date(year, month, monthrange(year, month)[1])
+    return max(first_day, sy.start_date), min(last_day, sy.end_date)
+
+
+class MonthGrid:
+    """One month of session statuses for a list of enrollments.
+
+    Records are loaded as ``(enrollment_id, date, session, status)`` tuples
+    into a :class:`~attendance.sf2.StatusMatrix`; per-learner rows, per-day
+    present totals and the SF2 summary are all derived from that matrix.
+    """
+
+    def __init__(self, sy, year: int, month: int, enrollments):
+        self.sy = sy
+        self.year = year
+        self.month = month
+        self.enrollments = list(enrollments)
+        self.range_start, self.range_end = month_range(sy, year, month)
+        if self.range_start <= self.range_end:
+            n = (self.range_end - self.range_start).days + 1
+            self.days = [self.range_start + timedelta(i) for i in range(n)]
+        else:
+            self.days = []
+
+        self.calendar = school_calendar(sy)
+        if self.days:
+            self.non_school_days = self.calendar.non_school_days_between(self.range_start, self.range_end)
+            self.school_days = self.calendar.school_days(self.range_start, self.range_end)
+        else:
+            self.non_school_days = []
+            self.school_days = []
+        self.nsd_dates = [n.date for n in self.non_school_days]
+
+        ids = [e.id for e in self.enrollments]
+        records = []
+        if ids and self.days:
+            records = AttendanceSessionRecord.objects.filter(
+                enrollment_id__in=ids,
+                date__gte=self.range_start,
+                date__lte=self.range_end,
+            ).values_list('enrollment_id', 'date', 'session', 'status')
+        self.matrix = StatusMatrix.from_rows(ids, self.days, records)
+        self._summary = None
+        self._build_rows()
+
+    def _build_rows(self):
+        m = self.matrix
+        width = len(self.days)
+        m_halves = [0] * width
+        f_halves = [0] * width
+        self.rows_m, self.rows_f = [], []
+        for e in self.enrollments:
+            s = e.student
+            r = m.rows[e.id]
+            am, pm = m.am[r], m.pm[r]
+            day_marks = [_MARKS[pair] for pair in zip(am, pm)]
+            present = m.present_per_day(e.id)
+            counts = {
+                'P': sum(present) * 0.5,
+                'A': (am.count(b'A') + pm.count(b'A')) * 0.5,
+                'L': (am.count(b'L') + pm.count(b'L')) * 0.5,
+                'E': (am.count(b'E') + pm.count(b'E')) * 0.5,
+            }
+            if s.sex == 'M':
+                m_halves = list(map(add, m_halves, present))
+            else:
+                f_halves = list(map(add, f_halves, present))
+            row = {
+                'enrollment': e,
+                'lrn': s.lrn or '',
+                'name': f"{s.last_name}, {s.first_name}",
+                'sex': s.sex,
+                'birthdate': s.birthdate,
+                'day_marks': day_marks,
+                'day_pairs': [{'day': d, 'mark': mark} for d, mark in zip(self.days, day_marks)],
+                'counts': counts,
+            }
+            (self.rows_m if s.sex == 'M' else self.rows_f).append(row)
+        self.mpd = [h / 2.0 for h in m_halves]
+        self.fpd = [h / 2.0 for h in f_halves]
+        self.cpd = [(m_halves[i] + f_halves[i]) / 2.0 for i in range(width)]
+
+    @property
+    def rows(self):
+        return self.rows_m + self.rows_f
+
+    @property
+    def total_cols(self):
+        return len(self.days) + 8
+
+    def summary(self):
+        """SF2 monthly summary over the school days of this grid."""
+        if self._summary is None:
+            matrix = self.matrix.select(self.school_days)
+            self._summary = summarize(
+                self.sy, self.year, self.month, matrix, self.enrollments, self.calendar.first_friday,
+            )
+        return self._summary
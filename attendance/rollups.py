@@ -0,0 +1,145 @@
+"""Maintenance of the DailyAttendance rollup table and its running totals."""
+from datetime import timedelta
+
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+
+from .models import AttendanceSessionRecord, DailyAttendance, Enrollment
+
+# Rollup field -> session status it counts
+ROLLUP_FIELDS = {
+    'present': 'P',
+    'absent': 'A',
+    'late': 'L',
+    'excused': 'E',
+}
+
+# Rollup field -> running total of that field
+CUMULATIVE_FIELDS = {field: f'cum_{field}' for field in ROLLUP_FIELDS}
+
+
+def _aggregate(records):
+    """Group session records into (enrollment_id, date) rows of half-day counts."""
+    return records.values('enrollment_id', 'date').annotate(**{
+        field: Count('id', filter=Q(status=code)) for field, code in ROLLUP_FIELDS.items()
+    }).order_by()
+
+
+def _row(values):
+    return DailyAttendance(
+        enrollment_id=values['enrollment_id'], date=values['date'],
+        **{field: values[field] for field in ROLLUP_FIELDS},
+    )
+
+
+def _running_totals(rows, base):
+    """Fill in the cum_* fields of ``rows``, continuing from ``base`` rows keyed by enrollment id.
+
+    Returns the saved rows (those with a pk) whose running totals changed.
+    """
+    totals = {
+        eid: {field: getattr(row, cum) for field, cum in CUMULATIVE_FIELDS.items()}
+        for eid, row in base.items()
+    }
+    moved = []
+    for row in sorted(rows, key=lambda r: (r.enrollment_id, r.date)):
+        running = totals.setdefault(row.enrollment_id, dict.fromkeys(ROLLUP_FIELDS, 0))
+        changed = False
+        for field, cum in CUMULATIVE_FIELDS.items():
+            running[field] += getattr(row, field)
+            if getattr(row, cum) != running[field]:
+                setattr(row, cum, running[field])
+                changed = True
+        if changed and row.pk:
+            moved.append(row)
+    return moved
+
+
+def latest_rollup_rows(enrollment_ids, before):
+    """The last rollup row dated before ``before`` for each enrollment, keyed by enrollment id.
+
+    One query; each enrollment costs one seek on the (enrollment, date) index.
+    """
+    last = DailyAttendance.objects.filter(
+        enrollment=OuterRef('pk'), date__lt=before,
+    ).order_by('-date').values('pk')[:1]
+    ids = Enrollment.objects.filter(pk__in=enrollment_ids).annotate(last=Subquery(last)).values('last')
+    return {row.enrollment_id: row for row in DailyAttendance.objects.filter(pk__in=ids)}
+
+
+def refresh_daily_rollup(enrollment_ids, dates):
+    """Recompute the rollup for the given enrollments on the given dates.
+
+    Running totals of the enrollments' later rows are shifted to match.
+    Call inside the same transaction as the session-record writes.
+    """
+    enrollment_ids = list(enrollment_ids)
+    dates = list(dates)
+    if not enrollment_ids or not dates:
+        return 0
+    since = min(dates)
+    DailyAttendance.objects.filter(enrollment_id__in=enrollment_ids, date__in=dates).delete()
+    records = AttendanceSessionRecord.objects.filter(enrollment_id__in=enrollment_ids, date__in=dates)
+    rows = [_row(v) for v in _aggregate(records)]
+    later = list(DailyAttendance.objects.filter(enrollment_id__in=enrollment_ids, date__gt=since))
+    moved = _running_totals(rows + later, latest_rollup_rows(enrollment_ids, since))
+    created = len(DailyAttendance.objects.bulk_create(rows))
+    if moved:
+        DailyAttendance.objects.bulk_update(moved, list(CUMULATIVE_FIELDS.values()), batch_size=2000)
+    return created
+
+
+def rebuild_daily_rollup(school_year, batch_size=2000):
+    """Rebuild every rollup row of a school year, with running totals, from its session records."""
+    DailyAttendance.objects.filter(enrollment__school_year=school_year).delete()
+    records = AttendanceSessionRecord.objects.filter(enrollment__school_year=school_year)
+    total = 0
+    batch = []
+    current, running = None, None
+    for values in _aggregate(records).order_by('enrollment_id', 'date').iterator(chunk_size=batch_size):
+        row = _row(values)
+        # Rows arrive in (enrollment, date) order, so only the current learner's totals are kept
+        if row.enrollment_id != current:
+            current, running = row.enrollment_id, dict.fromkeys(ROLLUP_FIELDS, 0)
+        for field, cum in CUMULATIVE_FIELDS.items():
+            running[field] += getattr(row, field)
+            setattr(row, cum, running[field])
+        batch.append(row)
+        if len(batch) >= batch_size:
+            total += len(DailyAttendance.objects.bulk_create(batch))
+            batch = []
+    if batch:
+        total += len(DailyAttendance.objects.bulk_create(batch))
+    return total
+
+
+def rollup_totals(enrollments, start, end):
+    """Half-day totals per enrollment id between two dates (inclusive), via SQL SUM."""
+    qs = DailyAttendance.objects.filter(enrollment__in=enrollments, date__gte=start, date__lte=end)
+    return {
+        row['enrollment_id']: row
+        for row in qs.values('enrollment_id').annotate(
+            **{f'{field}_total': Sum(field) for field in ROLLUP_FIELDS}
+        ).order_by()
+    }
+
+
+def range_totals(enrollment_ids, start, end):
+    """Half-day totals per enrollment id between two dates (inclusive), from running totals.
+
+    Two rows per learner: the last one up to ``end`` minus the last one
+    before ``start``, so the cost does not grow with the length of the range.
+    Enrollments without rows in the range get zeros.
+    """
+    enrollment_ids = list(enrollment_ids)
+    if end < start:
+        return {eid: dict.fromkeys(ROLLUP_FIELDS, 0) for eid in enrollment_ids}
+    upto = latest_rollup_rows(enrollment_ids, end + timedelta(days=1))
+    before = latest_rollup_rows(enrollment_ids, start)
+    out = {}
+    for eid in enrollment_ids:
+        hi, lo = upto.get(eid), before.get(eid)
+        out[eid] = {
+            field: (getattr(hi, cum) if hi else 0) - (getattr(lo, cum) if lo else 0)
+            for field, cum in CUMULATIVE_FIELDS.items()
+        }
+    return out
@@ -0,0 +1,84 @@
+"""Per-school-year calendar of instructional days, built once and kept in the shared cache."""
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+from django.core.cache import cache
+
+from .caching import SF2_CACHE_TIMEOUT, school_calendar_key
+from .models import NonSchoolDay
+
+
+class SchoolCalendar:
+    """The school days of one school year: weekdays in range that are not NonSchoolDays.
+
+    ``flags`` holds one byte per calendar day from the start date (1 for a
+    school day), so a single day is checked with one index. ``ordinals`` is
+    the sorted list of school-day ordinals, so a count or a slice over any
+    range takes two bisects.
+    """
+
+    def __init__(self, start_date, end_date, non_school_days=()):
+        self.start_date = start_date
+        self.end_date = end_date
+        self._base = start_date.toordinal()
+        width = max((end_date - start_date).days + 1, 0)
+        weekday = start_date.weekday()
+        self.flags = bytearray(1 if (weekday + i) % 7 < 5 else 0 for i in range(width))
+
+        self.non_school_days = sorted(
+            (n for n in non_school_days if start_date <= n.date <= end_date), key=lambda n: n.date,
+        )
+        self._nsd_dates = [n.date for n in self.non_school_days]
+        self._nsd_by_date = dict(zip(self._nsd_dates, self.non_school_days))
+        for d in self._nsd_dates:
+            self.flags[d.toordinal() - self._base] = 0
+        self.ordinals = [self._base + i for i, flag in enumerate(self.flags) if flag]
+
+    @classmethod
+    def for_school_year(cls, sy):
+        return cls(sy.start_date, sy.end_date, NonSchoolDay.objects.filter(school_year=sy))
+
+    @property
+    def first_friday(self):
+        return self.start_date + timedelta(days=(4 - self.start_date.weekday()) % 7)
+
+    def is_school_day(self, day):
+        i = day.toordinal() - self._base
+        return 0 <= i < len(self.flags) and self.flags[i] == 1
+
+    def _span(self, start, end):
+        return bisect_left(self.ordinals, start.toordinal()), bisect_right(self.ordinals, end.toordinal())
+
+    def count_school_days(self, start, end):
+        """Number of school days in [start, end]."""
+        lo, hi = self._span(start, end)
+        return max(hi - lo, 0)
+
+    def school_days(self, start, end):
+        """The school days in [start, end], in order."""
+        lo, hi = self._span(start, end)
+        return [date.fromordinal(o) for o in self.ordinals[lo:hi]]
+
+    def non_school_days_between(self, start, end):
+        """The NonSchoolDay rows dated in [start, end], in date order."""
+        lo = bisect_left(self._nsd_dates, start)
+        hi = bisect_right(self._nsd_dates, end)
+        return self.non_school_days[lo:hi]
+
+    def non_school_day(self, day):
+        """The NonSchoolDay row for ``day``, or None."""
+        return self._nsd_by_date.get(day)
+
+
+def school_calendar(sy):
+    """The SchoolCalendar for ``sy`` from the shared cache, built on a miss.
+
+    NonSchoolDay and SchoolYear writes bump the calendar's generation; the
+    date check also covers a caller holding an edited, unsaved school year.
+    """
+    key = school_calendar_key(sy.id)
+    cal = cache.get(key)
+    if cal is None or (cal.start_date, cal.end_date) != (sy.start_date, sy.end_date):
+        cal = SchoolCalendar.for_school_year(sy)
+        cache.set(key, cal, timeout=SF2_CACHE_TIMEOUT)
+    return cal
@@ -0,0 +1,74 @@
+"""Learner name search and keyset paging for the student list."""
+import base64
+import json
+import re
+import unicodedata
+
+from django.db.models import Q
+
+PAGE_SIZE = 50
+LOOKUP_SIZE = 20
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+# Length of the Student.search_name columns
+SEARCH_MAX_LENGTH = 310
+
+
+def normalize_search(text):
+    """Lower-case ASCII words separated by single spaces: "Peña-Cruz, Ma." -> "pena cruz ma"."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def search_names(last_name, first_name, middle_name=''):
+    """Values for Student.search_name and Student.search_name_rev."""
+    return (
+        normalize_search(f"{last_name} {first_name} {middle_name}")[:SEARCH_MAX_LENGTH],
+        normalize_search(f"{first_name} {middle_name} {last_name}")[:SEARCH_MAX_LENGTH],
+    )
+
+
+def student_search(q):
+    """Filter matching ``q`` against the start of the learner's name (either order) or LRN.
+
+    Every branch is a prefix match on an indexed column.
+    """
+    q = (q or '').strip()
+    norm = normalize_search(q)
+    cond = Q(lrn__startswith=q) if q else Q()
+    if norm:
+        cond |= Q(search_name__startswith=norm) | Q(search_name_rev__startswith=norm)
+    return cond
+
+
+def encode_cursor(student):
+    raw = json.dumps([student.last_name, student.first_name, student.pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """Parse an ``encode_cursor`` value into (last_name, first_name, id), or None if malformed."""
+    try:
+        last, first, pk = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+        return str(last), str(first), int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+def student_page(qs, cursor=None, size=PAGE_SIZE):
+    """One page of ``qs`` ordered by (last_name, first_name, id), resuming after ``cursor``.
+
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    qs = qs.order_by('last_name', 'first_name', 'id')
+    key = decode_cursor(cursor) if cursor else None
+    if key:
+        last, first, pk = key
+        qs = qs.filter(
+            Q(last_name__gt=last)
+            | Q(last_name=last, first_name__gt=first)
+            | Q(last_name=last, first_name=first, id__gt=pk)
+        )
+    items = list(qs[:size + 1])
+    next_cursor = encode_cursor(items[size - 1]) if len(items) > size else None
+    return items[:size], next_cursor
@@ -0,0 +1,156 @@
+"""Array-backed SF2 monthly summary engine."""
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from operator import add, itemgetter
+
+MISSING = ord('-')
+ABSENT5_HALVES = 10  # 5 school-day equivalents, counted in half-days
+
+# Byte translation tables: status code -> 1/0 indicator
+_PRESENT = bytes(1 if c in b'PLE' else 0 for c in range(256))
+_ABSENT = bytes(1 if c == ord('A') else 0 for c in range(256))
+
+
+def first_friday_of_sy(sy):
+    # Monday=0 ... Friday=4
+    return sy.start_date + timedelta(days=(4 - sy.start_date.weekday()) % 7)
+
+
+def _as_date(value):
+    # Unsaved enrollments still carry the timezone.now() default
+    return value.date() if isinstance(value, datetime) else value
+
+
+class StatusMatrix:
+    """Enrollment x day x session statuses packed into one byte per cell.
+
+    Each enrollment owns an AM row and a PM row (``bytearray`` of len(days));
+    missing records are stored as ``-``.
+    """
+
+    def __init__(self, enrollment_ids, days):
+        self.days = list(days)
+        self.columns = {d: i for i, d in enumerate(self.days)}
+        self.rows = {eid: i for i, eid in enumerate(enrollment_ids)}
+        width = len(self.days)
+        self.am = [bytearray(b'-' * width) for _ in self.rows]
+        self.pm = [bytearray(b'-' * width) for _ in self.rows]
+
+    def set(self, enrollment_id, day, session, status):
+        r = self.rows.get(enrollment_id)
+        c = self.columns.get(day)
+        if r is None or c is None or not status:
+            return
+        if session == 'AM':
+            self.am[r][c] = ord(status)
+        elif session == 'PM':
+            self.pm[r][c] = ord(status)
+
+    @classmethod
+    def from_rows(cls, enrollment_ids, days, rows):
+        """Build from ``(enrollment_id, date, session, status)`` tuples."""
+        m = cls(enrollment_ids, days)
+        for eid, d, session, status in rows:
+            m.set(eid, d, session, status)
+        return m
+
+    @classmethod
+    def from_by_key(cls, enrollment_ids, days, by_key):
+        """Build from the views' ``{(enrollment_id, date, session): record}`` map."""
+        m = cls(enrollment_ids, days)
+        for (eid, d, session), rec in by_key.items():
+            m.set(eid, d, session, rec.status)
+        return m
+
+    def select(self, days):
+        """Return a matrix restricted to the given subset of columns."""
+        days = list(days)
+        out = StatusMatrix([], days)
+        out.rows = self.rows
+        idx = [self.columns[d] for d in days]
+        if not idx:
+            out.am = [bytearray() for _ in self.am]
+            out.pm = [bytearray() for _ in self.pm]
+        elif len(idx) == 1:
+            i = idx[0]
+            out.am = [bytearray((row[i],)) for row in self.am]
+            out.pm = [bytearray((row[i],)) for row in self.pm]
+        else:
+            pick = itemgetter(*idx)
+            out.am = [bytearray(pick(row)) for row in self.am]
+            out.pm = [bytearray(pick(row)) for row in self.pm]
+        return out
+
+    def present_halves(self, enrollment_id):
+        """Number of present (P/L/E) half-days for one enrollment."""
+        r = self.rows[enrollment_id]
+        return sum(self.am[r].translate(_PRESENT)) + sum(self.pm[r].translate(_PRESENT))
+
+    def present_per_day(self, enrollment_id):
+        """Present half-days per column (0, 1 or 2)."""
+        r = self.rows[enrollment_id]
+        return bytes(map(add, self.am[r].translate(_PRESENT), self.pm[r].translate(_PRESENT)))
+
+    def has_absence_streak(self, enrollment_id, threshold=ABSENT5_HALVES):
+        """True if consecutive absent days add up to ``threshold`` half-days.
+
+        A day without any 'A' session breaks the streak.
+        """
+        r = self.rows[enrollment_id]
+        am = self.am[r].translate(_ABSENT)
+        pm = self.pm[r].translate(_ABSENT)
+        if sum(am) + sum(pm) < threshold:
+            return False
+        per_day = bytes(map(add, am, pm))
+        return any(sum(run) >= threshold for run in per_day.split(b'\x00'))
+
+
+def summarize(sy, year: int, month: int, matrix: StatusMatrix, enrollments, first_friday):
+    """Compute the SF2 monthly summary from a matrix over the month's school days.
+
+    Every learner is visited once and added to its sex bucket and to 'T'.
+    """
+    first_day = date(year, month, 1)
+    last_day = date(year, month, monthrange(year, month)[1])
+    range_end = min(last_day, sy.end_date)
+    n_school_days = len(matrix.days)
+
+    totals = {k: {'e1': 0, 'late': 0, 'reg': 0, 'present': 0, 'ab5': 0} for k in ('M', 'F', 'T')}
+    for e in enrollments:
+        enrolled = _as_date(e.date_enrolled)
+        e1 = 1 if (e.active and enrolled <= first_friday) else 0
+        late = 1 if (first_day <= enrolled <= last_day and enrolled > first_friday) else 0
+        reg = 1 if (e.active and enrolled <= range_end) else 0
+        present = matrix.present_halves(e.id)
+        ab5 = 1 if matrix.has_absence_streak(e.id) else 0
+        keys = ('T', e.student.sex) if e.student.sex in ('M', 'F') else ('T',)
+        for k in keys:
+            t = totals[k]
+            t['e1'] += e1
+            t['late'] += late
+            t['reg'] += reg
+            t['present'] += present
+            t['ab5'] += ab5
+
+    out = {
+        'school_days': n_school_days,
+        'first_friday': first_friday,
+        'by': {},
+    }
+    for key, t in totals.items():
+        e1 = t['e1']
+        reg = t['reg']
+        tda = t['present'] / 2.0
+        ada = (tda / n_school_days) if n_school_days else 0.0
+        pct_enrol = (reg / e1 * 100.0) if e1 else 0.0
+        pct_att = (ada / reg * 100.0) if reg else 0.0
+        out['by'][key] = {
+            'enrol_first_friday': e1,
+            'late_enrol': t['late'],
+            'registered_eom': reg,
+            'pct_enrol_eom': round(pct_enrol, 2),
+            'ada': round(ada, 2),
+            'pct_attendance': round(pct_att, 2),
+            'absent5': t['ab5'],
+        }
+    return out
@@ -0,0 +1,99 @@
+"""Signal handlers that keep cached data in step with the database."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .caching import (
+    bump_after_commit, bump_school_calendar, bump_sf2_school_year, bump_user_caps, invalidate_active_school_year,
+)
+from .models import Enrollment, FeatureAccess, NonSchoolDay, SchoolYear, Student
+
+User = get_user_model()
+
+
+def _bump(*user_ids):
+    try:
+        bump_after_commit(bump_user_caps, *user_ids)
+    except Exception:
+        # Cache is best-effort; ignore failures
+        pass
+
+
+@receiver([post_save, post_delete], sender=FeatureAccess)
+def feature_access_changed(sender, instance, **kwargs):
+    _bump(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # is_staff / is_superuser feed the capability map; logins only touch last_login
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    _bump(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        _bump(instance.pk)
+    elif action == 'pre_clear':
+        _bump(*instance.user_set.values_list('pk', flat=True))
+    else:
+        _bump(*(pk_set or ()))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # Renaming or deleting a group changes the roles of its members
+    if instance.pk:
+        _bump(*instance.user_set.values_list('pk', flat=True))
+
+
+def _bump_sf2(*sy_ids):
+    try:
+        bump_sf2_school_year(*sy_ids)
+    except Exception:
+        pass
+
+
+def _bump_calendar(sy_id):
+    try:
+        bump_after_commit(bump_school_calendar, sy_id)
+    except Exception:
+        pass
+
+
+@receiver([post_save, post_delete], sender=SchoolYear)
+def school_year_changed(sender, instance, **kwargs):
+    try:
+        bump_after_commit(invalidate_active_school_year)
+    except Exception:
+        pass
+    # Start and end dates move the first Friday and the month ranges
+    _bump_sf2(instance.pk)
+    _bump_calendar(instance.pk)
+
+
+# SF2 inputs. Bulk writers (QuerySet.update, bulk_create) send no signals
+# and call bump_sf2_school_year themselves.
+@receiver([post_save, post_delete], sender=Enrollment)
+def enrollment_changed(sender, instance, **kwargs):
+    _bump_sf2(instance.school_year_id)
+
+
+@receiver(post_save, sender=Student)
+def student_changed(sender, instance, created, **kwargs):
+    # Sex, name and birthdate appear in the SF2 rows and M/F buckets
+    if not created:
+        _bump_sf2(*set(instance.enrollments.values_list('school_year_id', flat=True)))
+
+
+@receiver([post_save, post_delete], sender=NonSchoolDay)
+def non_school_day_changed(sender, instance, **kwargs):
+    # An edit may move the date to another month, so drop the whole year
+    _bump_sf2(instance.school_year_id)
+    _bump_calendar(instance.school_year_id)
@@ -0,0 +1,135 @@
+from calendar import monthrange
+from datetime import date
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from attendance.models import NonSchoolDay
+from attendance.sf2 import StatusMatrix, first_friday_of_sy, summarize
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Every test starts and ends with an empty cache."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _post_session_day(client, sy, statuses, day):
+    data = {
+        'date': day.isoformat(),
+        'att-TOTAL_FORMS': len(statuses),
+        'att-INITIAL_FORMS': len(statuses),
+        'att-MIN_NUM_FORMS': 0,
+        'att-MAX_NUM_FORMS': 1000,
+    }
+    for i, (e, am, pm) in enumerate(statuses):
+        data.update({
+            f'att-{i}-enrollment_id': e.id,
+            f'att-{i}-status_am': am,
+            f'att-{i}-status_pm': pm,
+            f'att-{i}-remarks': '',
+        })
+    return client.post(reverse('attendance:take_attendance', args=[sy.id]), data)
+
+
+@pytest.fixture
+def save_day():
+    """POST a session-mode attendance formset: ``statuses`` is [(enrollment, am, pm)]."""
+    def _save(client, sy, statuses, day=date(2025, 9, 1)):
+        return _post_session_day(client, sy, statuses, day)
+    return _save
+
+
+def _reference_sf2_summary(sy, year, month, days, enrollments, by_key):
+    """Per-cell implementation the array engine replaced (kept for equivalence)."""
+    first_day = date(year, month, 1)
+    last_day = date(year, month, monthrange(year, month)[1])
+    range_end = min(last_day, sy.end_date)
+    buckets = {
+        'M': [e for e in enrollments if e.student.sex == 'M'],
+        'F': [e for e in enrollments if e.student.sex == 'F'],
+        'T': list(enrollments),
+    }
+    weekdays = [d for d in days if d.weekday() < 5]
+    excluded = set(NonSchoolDay.objects.filter(school_year=sy, date__in=weekdays).values_list('date', flat=True))
+    school_days = [d for d in weekdays if d not in excluded]
+    n_school_days = len(school_days)
+    first_friday = first_friday_of_sy(sy)
+
+    def total_daily_attendance(es):
+        total = 0.0
+        for d in school_days:
+            day_sum = 0.0
+            for e in es:
+                am = by_key.get((e.id, d, 'AM'))
+                pm = by_key.get((e.id, d, 'PM'))
+                amv = 1.0 if (am and am.status in {'P', 'L', 'E'}) else 0.0
+                pmv = 1.0 if (pm and pm.status in {'P', 'L', 'E'}) else 0.0
+                day_sum += (amv + pmv) / 2.0
+            total += day_sum
+        return total
+
+    def absent5_consecutive(es):
+        cnt = 0
+        for e in es:
+            streak = 0.0
+            for d in school_days:
+                am = by_key.get((e.id, d, 'AM'))
+                pm = by_key.get((e.id, d, 'PM'))
+                day_abs = 0.0
+                if am and am.status == 'A':
+                    day_abs += 0.5
+                if pm and pm.status == 'A':
+                    day_abs += 0.5
+                if day_abs == 0.0:
+                    streak = 0.0
+                else:
+                    streak += day_abs
+                    if streak >= 5.0:
+                        cnt += 1
+                        break
+        return cnt
+
+    out = {'school_days': n_school_days, 'first_friday': first_friday, 'by': {}}
+    for key, es in buckets.items():
+        e1 = sum(1 for e in es if (e.active and e.date_enrolled <= first_friday))
+        late = sum(1 for e in es if (first_day <= e.date_enrolled <= last_day and e.date_enrolled > first_friday))
+        reg = sum(1 for e in es if (e.active and e.date_enrolled <= range_end))
+        tda = total_daily_attendance(es)
+        ada = (tda / n_school_days) if n_school_days else 0.0
+        pct_enrol = (reg / e1 * 100.0) if e1 else 0.0
+        pct_att = (ada / reg * 100.0) if reg else 0.0
+        out['by'][key] = {
+            'enrol_first_friday': e1,
+            'late_enrol': late,
+            'registered_eom': reg,
+            'pct_enrol_eom': round(pct_enrol, 2),
+            'ada': round(ada, 2),
+            'pct_attendance': round(pct_att, 2),
+            'absent5': absent5_consecutive(es),
+        }
+    return out
+
+
+def _by_key_sf2_summary(sy, year, month, days, enrollments, by_key):
+    """Run the array engine over a {(enrollment_id, date, session): record} map."""
+    weekdays = [d for d in days if d.weekday() < 5]
+    excluded = set(NonSchoolDay.objects.filter(school_year=sy, date__in=weekdays).values_list('date', flat=True))
+    school_days = [d for d in weekdays if d not in excluded]
+    matrix = StatusMatrix.from_by_key([e.id for e in enrollments], school_days, by_key)
+    return summarize(sy, year, month, matrix, enrollments, first_friday_of_sy(sy))
+
+
+@pytest.fixture
+def reference_sf2_summary():
+    """The per-cell SF2 summary the array engine replaced, kept to check equivalence."""
+    return _reference_sf2_summary
+
+
+@pytest.fixture
+def compute_sf2_summary():
+    """SF2 summary from the array engine, fed with a by-key record map."""
+    return _by_key_sf2_summary
@@ -0,0 +1,174 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+
+from attendance.caching import active_school_year, bump_sf2_generation, cached_sf2_summary, sf2_cache_key
+from attendance.models import SchoolYear, Section, Student, Enrollment
+
+
+def test_generation_bump_invalidates_every_scope():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'n': len(calls)}
+
+    for scope in ('section:all', 'section:7', 'user:3'):
+        assert cached_sf2_summary(1, 2025, 9, scope, compute)['n'] == len(calls)
+    assert cached_sf2_summary(1, 2025, 9, 'section:7', compute)['n'] == 2
+    old_key = sf2_cache_key(1, 2025, 9, 'section:7')
+
+    bump_sf2_generation(1, 2025, 9)
+
+    assert sf2_cache_key(1, 2025, 9, 'section:7') != old_key
+    assert cached_sf2_summary(1, 2025, 9, 'section:7', compute)['n'] == 4
+    # Other months keep their generation
+    assert cached_sf2_summary(1, 2025, 10, 'section:7', compute)['n'] == 5
+    assert cached_sf2_summary(1, 2025, 10, 'section:7', compute)['n'] == 5
+
+
+def test_lost_generation_counter_never_revives_old_keys():
+    before = sf2_cache_key(1, 2025, 9, 'section:all')
+    cache.delete('sf2gen:1:2025:9')
+    assert sf2_cache_key(1, 2025, 9, 'section:all') != before
+
+
+def test_bumps_never_reuse_a_generation(monkeypatch):
+    # Simulate get-then-set incr() losing a concurrent update: bumps must not rely on it
+    monkeypatch.setattr(cache, 'incr', lambda *a, **k: (_ for _ in ()).throw(AssertionError('incr used')))
+    keys = {sf2_cache_key(1, 2025, 9, 'section:all')}
+    for _ in range(50):
+        bump_sf2_generation(1, 2025, 9)
+        keys.add(sf2_cache_key(1, 2025, 9, 'section:all'))
+    assert len(keys) == 51
+
+
+@pytest.mark.django_db
+def test_saving_a_section_refreshes_the_staff_section_summary(client, save_day):
+    sy = SchoolYear.objects.create(
+        name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31), is_active=True,
+    )
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    section = Section.objects.create(name="Rizal", school_year=sy, adviser=staff)
+    s = Student.objects.create(last_name="Cruz", first_name="Ana", sex="F")
+    e = Enrollment.objects.create(student=s, school_year=sy, section=section, date_enrolled=date(2025, 6, 16))
+    client.force_login(staff)
+    params = {'schoolyear_id': sy.id, 'year': 2025, 'month': 9, 'section_id': section.id}
+
+    save_day(client, sy, [(e, 'A', 'A')])
+    first = client.get(reverse('attendance:report_preview'), params).context['summary']
+    save_day(client, sy, [(e, 'P', 'P')])
+    second = client.get(reverse('attendance:report_preview'), params).context['summary']
+
+    assert first['by']['T']['ada'] == 0.0
+    assert second['by']['T']['ada'] > 0.0
+
+
+@pytest.mark.django_db
+def test_enrollment_and_nsd_changes_refresh_cached_summary(client, monkeypatch):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    # enroll_students stamps today's date; pin it inside the reported month
+    monkeypatch.setattr(Enrollment._meta.get_field('date_enrolled'), 'default', lambda: date(2025, 9, 1))
+
+    sy = SchoolYear.objects.create(
+        name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31), is_active=True,
+    )
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    section = Section.objects.create(name="Rizal", school_year=sy, adviser=staff)
+    first = Student.objects.create(last_name="Cruz", first_name="Ana", sex="F")
+    second = Student.objects.create(last_name="Diaz", first_name="Ben", sex="M")
+    Enrollment.objects.create(student=first, school_year=sy, date_enrolled=date(2025, 6, 16))
+    client.force_login(staff)
+    params = {'schoolyear_id': sy.id, 'year': 2025, 'month': 9}
+
+    before = client.get(reverse('attendance:report_preview'), params).context['summary']
+    assert before['by']['T']['registered_eom'] == 1
+    assert before['school_days'] == 22
+
+    client.post(reverse('attendance:enroll_students', args=[sy.id]), {'student_ids': [second.id]})
+    csv_file = SimpleUploadedFile('nsd.csv', b"date,kind,title,notes\n2025-09-15,hol,Holiday,\n")
+    client.post(reverse('attendance:non_school_days_import'), {'schoolyear_id': sy.id, 'file': csv_file})
+    client.post(reverse('attendance:non_school_days_import'), {'action': 'apply'})
+    after = client.get(reverse('attendance:report_preview'), params).context['summary']
+    assert after['by']['T']['registered_eom'] == 2
+    assert after['school_days'] == 21
+
+    # Section moves and learner edits reach the section scope too
+    section_params = dict(params, section_id=section.id)
+    assert client.get(reverse('attendance:report_preview'), section_params).context['summary']['by']['T']['registered_eom'] == 0
+    client.post(reverse('attendance:bulk_assign_section', args=[sy.id]), {
+        'section_id': section.id, 'enrollment_ids': list(Enrollment.objects.values_list('id', flat=True)),
+    })
+    by = client.get(reverse('attendance:report_preview'), section_params).context['summary']['by']
+    assert (by['M']['registered_eom'], by['F']['registered_eom']) == (1, 1)
+    second.sex = 'F'
+    second.save()
+    by = client.get(reverse('attendance:report_preview'), section_params).context['summary']['by']
+    assert (by['M']['registered_eom'], by['F']['registered_eom']) == (0, 2)
+
+
+@pytest.mark.django_db
+def test_warm_command_fills_every_scope_and_views_hit_it(client):
+    from django.core.management import call_command
+    from attendance.caching import reset_sf2_cache_stats, sf2_cache_stats
+
+    sy = SchoolYear.objects.create(
+        name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31), is_active=True,
+    )
+    adviser = get_user_model().objects.create_user('adviser', password='x')
+    section = Section.objects.create(name="Rizal", school_year=sy, adviser=adviser)
+    s = Student.objects.create(last_name="Cruz", first_name="Ana", sex="F")
+    Enrollment.objects.create(student=s, school_year=sy, section=section, date_enrolled=date(2025, 6, 16))
+
+    call_command('warm_sf2_cache', year=2025, month=9, stdout=None)
+    for scope in ('section:all', f'section:{section.id}', f'user:{adviser.id}'):
+        assert cache.get(sf2_cache_key(sy.id, 2025, 9, scope)) is not None
+
+    reset_sf2_cache_stats()
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    client.force_login(staff)
+    client.get(reverse('attendance:report_preview'), {'schoolyear_id': sy.id, 'year': 2025, 'month': 9})
+    client.get(reverse('attendance:report_preview'), {'schoolyear_id': sy.id, 'year': 2025, 'month': 10})
+    assert sf2_cache_stats() == {'hits': 1, 'misses': 1, 'hit_rate': 50.0}
+
+
+@pytest.mark.django_db
+def test_active_school_year_cached_and_invalidated(client, django_assert_num_queries):
+    old = SchoolYear.objects.create(name="2024-2025", start_date=date(2024, 6, 17), end_date=date(2025, 3, 31), is_active=True)
+    assert active_school_year() == old
+    with django_assert_num_queries(0):
+        assert active_school_year() == old
+
+    # Creating a new active year deactivates the old one with a bulk update
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    client.force_login(staff)
+    client.post(reverse('attendance:schoolyear_create'), {
+        'name': '2025-2026', 'start_date': '2025-06-16', 'end_date': '2026-03-31', 'is_active': 'on',
+    })
+    new = SchoolYear.objects.get(name='2025-2026')
+    assert active_school_year() == new
+
+    new.delete()
+    assert active_school_year() is None
+    old.is_active = True
+    old.save()
+    assert active_school_year() == old
+
+
+@pytest.mark.django_db
+def test_active_school_year_refreshed_after_commit(django_capture_on_commit_callbacks):
+    sy = SchoolYear.objects.create(name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31))
+    assert active_school_year() is None
+    with django_capture_on_commit_callbacks() as callbacks:
+        sy.is_active = True
+        sy.save()
+        # Another request reads before the commit and caches "no active year"
+        cache.set(f"activesy:v{cache.get('activesy:ver')}", (None,))
+    assert active_school_year() is None
+    for callback in callbacks:
+        callback()
+    assert active_school_year() == sy
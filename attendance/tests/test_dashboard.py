@@ -0,0 +1,133 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from attendance.models import AttendanceSessionRecord, SchoolYear, Section, Student, Enrollment
+
+
+@pytest.fixture
+def school(db, client):
+    sy = SchoolYear.objects.create(
+        name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31), is_active=True,
+    )
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    client.force_login(staff)
+    return sy
+
+
+def _learner(sy, name, birthdate=None):
+    s = Student.objects.create(last_name=name, first_name="F", sex="M", birthdate=birthdate)
+    Enrollment.objects.create(student=s, school_year=sy, date_enrolled=date(2025, 6, 16))
+    return s
+
+
+def _birthdays(client, day):
+    resp = client.get(reverse('attendance:dashboard'), {'date': day.isoformat()})
+    return [(s.last_name, when) for s, when in resp.context['upcoming_birthdays']]
+
+
+def test_birthday_key_follows_birthdate_saves(db):
+    s = Student.objects.create(last_name="A", first_name="F", sex="M", birthdate=date(2014, 12, 31))
+    assert s.birthday_key == 1231
+    s.birthdate = date(2014, 1, 2)
+    s.save(update_fields=['birthdate'])
+    s.refresh_from_db()
+    assert s.birthday_key == 102
+
+
+def test_upcoming_birthdays_wrap_past_new_year(school, client):
+    _learner(school, "Dec", date(2014, 12, 30))
+    _learner(school, "Jan", date(2015, 1, 3))
+    _learner(school, "Feb", date(2015, 2, 3))
+    _learner(school, "None")
+    assert _birthdays(client, date(2025, 12, 25)) == [("Dec", date(2025, 12, 30)), ("Jan", date(2026, 1, 3))]
+
+
+def test_leap_day_birthdays_fall_on_march_first_in_common_years(school, client):
+    _learner(school, "Leap", date(2012, 2, 29))
+    assert _birthdays(client, date(2026, 2, 20)) == [("Leap", date(2026, 3, 1))]
+    assert _birthdays(client, date(2026, 3, 1)) == [("Leap", date(2026, 3, 1))]
+    assert _birthdays(client, date(2026, 3, 2)) == []
+    assert _birthdays(client, date(2028, 2, 20)) == [("Leap", date(2028, 2, 29))]
+
+
+def _mark(enrollment, day, **sessions):
+    for session, status in sessions.items():
+        AttendanceSessionRecord.objects.create(enrollment=enrollment, date=day, session=session, status=status)
+
+
+def test_progress_breakdown_and_missing_lists(school, client):
+    day = date(2025, 9, 1)
+    learners = [_learner(school, name) for name in ("Abad", "Bato", "Cruz", "Diaz")]
+    a, b, c, d = (s.enrollments.get() for s in learners)
+    _mark(a, day, AM='A', PM='A')
+    _mark(b, day, AM='L', PM='P')
+    _mark(c, day, AM='P')
+
+    client.get(reverse('attendance:dashboard'))  # fill the per-user caches
+    with CaptureQueriesContext(connection) as small:
+        summary = client.get(reverse('attendance:dashboard'), {'date': day.isoformat()}).context['summary']
+    assert summary['recorded_sessions'] == 5
+    assert summary['status_counts'] == {'P': 2, 'A': 2, 'L': 1, 'E': 0}
+    assert summary['am_counts'] == {'P': 1, 'A': 1, 'L': 1, 'E': 0}
+    assert summary['pm_counts'] == {'P': 1, 'A': 1, 'L': 0, 'E': 0}
+    assert summary['am_lists']['A'] == [{'name': 'Abad, F', 'phone': ''}]
+    assert summary['am_lists']['L'] == [{'name': 'Bato, F', 'phone': ''}]
+    assert summary['missing_lists'] == {'AM': ['Diaz, F'], 'PM': ['Cruz, F', 'Diaz, F']}
+
+    # More learners without exceptions do not add queries
+    for i in range(20):
+        _mark(_learner(school, f"Z{i:02d}").enrollments.get(), day, AM='P', PM='P')
+    with CaptureQueriesContext(connection) as large:
+        client.get(reverse('attendance:dashboard'), {'date': day.isoformat()})
+    assert len(large.captured_queries) == len(small.captured_queries)
+
+
+def test_section_breakdown_fragment_uses_one_aggregate(school, client):
+    day = date(2025, 9, 1)
+    adviser = get_user_model().objects.get(username='staff')
+    ruby = Section.objects.create(school_year=school, name="Ruby", adviser=adviser)
+    jade = Section.objects.create(school_year=school, name="Jade", adviser=adviser)
+    a, b, c = (_learner(school, name).enrollments.get() for name in ("A", "B", "C"))
+    Enrollment.objects.filter(pk__in=[a.pk, b.pk]).update(section=ruby)
+    _learner(school, "D").enrollments.update(section=jade)
+    _mark(a, day, AM='A', PM='L')
+    _mark(b, day, AM='P', PM='P')
+    _mark(c, day, AM='E')
+
+    client.get(reverse('attendance:dashboard'))  # fill the per-user caches
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(reverse('attendance:dashboard_sections'), {'date': day.isoformat()})
+    assert len([q for q in ctx.captured_queries if 'GROUP BY' in q['sql']]) == 1
+    rows = {r['name']: r for r in resp.context['rows']}
+    assert [r['name'] for r in resp.context['rows']] == ['Jade', 'Ruby', 'Unassigned']
+    assert (rows['Ruby']['enrolled'], rows['Ruby']['recorded'], rows['Ruby']['progress_pct']) == (2, 4, 100)
+    assert (rows['Ruby']['absent'], rows['Ruby']['late'], rows['Ruby']['absence_pct']) == (1, 1, 25.0)
+    assert rows['Ruby']['is_complete']
+    assert (rows['Jade']['enrolled'], rows['Jade']['recorded']) == (1, 0)
+    assert (rows['Unassigned']['recorded'], rows['Unassigned']['excused']) == (1, 1)
+
+
+def test_panels_are_cached_until_their_data_changes(school, client, save_day):
+    day = date(2025, 9, 1)
+    s = _learner(school, "Abad", date(2014, 9, 5))
+    url = reverse('attendance:dashboard')
+    assert client.get(url, {'date': day.isoformat()})['X-Panel-Cache'] == 'birthdays=miss, top=miss'
+    assert client.get(url, {'date': day.isoformat()})['X-Panel-Cache'] == 'birthdays=hit, top=hit'
+
+    # Attendance saved in the month refreshes the top lists, not the birthdays
+    save_day(client, school, [(s.enrollments.get(), 'A', 'A')], day=date(2025, 9, 2))
+    resp = client.get(url, {'date': day.isoformat()})
+    assert resp['X-Panel-Cache'] == 'birthdays=hit, top=miss'
+    assert [r['abs_sessions'] for r in resp.context['top_absent']] == [2]
+
+    # Learner edits reach every panel
+    s.birthdate = date(2014, 9, 3)
+    s.save()
+    resp = client.get(url, {'date': day.isoformat()})
+    assert resp['X-Panel-Cache'] == 'birthdays=miss, top=miss'
+    assert resp.context['upcoming_birthdays'][0][1] == date(2025, 9, 3)
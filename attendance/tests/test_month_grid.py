@@ -0,0 +1,103 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from attendance.models import (
+    SchoolYear,
+    Student,
+    Enrollment,
+    AttendanceSessionRecord,
+    NonSchoolDay,
+)
+from attendance.reports import MonthGrid
+
+
+@pytest.fixture
+def month_data(db):
+    sy = SchoolYear.objects.create(
+        name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31), is_active=True,
+    )
+    NonSchoolDay.objects.create(school_year=sy, date=date(2025, 9, 3), title="Holiday")
+    m = Student.objects.create(last_name="Abad", first_name="Ben", sex="M", lrn="111", birthdate=date(2014, 2, 3))
+    f = Student.objects.create(last_name="Bautista", first_name="Cara", sex="F")
+    em = Enrollment.objects.create(student=m, school_year=sy, date_enrolled=date(2025, 6, 16))
+    ef = Enrollment.objects.create(student=f, school_year=sy, date_enrolled=date(2025, 6, 16))
+    marks = [
+        (em, date(2025, 9, 1), 'P', 'L'),
+        (em, date(2025, 9, 2), 'A', 'A'),
+        (ef, date(2025, 9, 1), 'E', 'P'),
+        (ef, date(2025, 9, 2), 'P', None),
+    ]
+    for e, d, am, pm in marks:
+        AttendanceSessionRecord.objects.create(enrollment=e, date=d, session='AM', status=am)
+        if pm:
+            AttendanceSessionRecord.objects.create(enrollment=e, date=d, session='PM', status=pm)
+    return sy
+
+
+@pytest.mark.django_db
+def test_month_grid_rows_and_totals(month_data, reference_sf2_summary):
+    sy = month_data
+    enrollments = list(Enrollment.objects.select_related('student'))
+    grid = MonthGrid(sy, 2025, 9, enrollments)
+
+    assert len(grid.days) == 30
+    assert grid.nsd_dates == [date(2025, 9, 3)]
+    assert date(2025, 9, 3) not in grid.school_days
+
+    (male,), (female,) = grid.rows_m, grid.rows_f
+    assert male['day_marks'][:3] == ['P/L', 'A/A', '']
+    assert male['counts'] == {'P': 1.0, 'A': 1.0, 'L': 0.5, 'E': 0.0}
+    assert female['day_pairs'][1] == {'day': date(2025, 9, 2), 'mark': 'P/'}
+    assert female['counts'] == {'P': 1.5, 'A': 0.0, 'L': 0.0, 'E': 0.5}
+    assert grid.mpd[:2] == [1.0, 0.0]
+    assert grid.fpd[:2] == [1.0, 0.5]
+    assert grid.cpd[:2] == [2.0, 0.5]
+
+    by_key = {(r.enrollment_id, r.date, r.session): r for r in AttendanceSessionRecord.objects.all()}
+    assert grid.summary() == reference_sf2_summary(sy, 2025, 9, grid.days, enrollments, by_key)
+
+
+@pytest.mark.django_db
+def test_report_views_share_the_grid(month_data, client):
+    sy = month_data
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    client.force_login(staff)
+    params = {'schoolyear_id': sy.id, 'year': 2025, 'month': 9}
+
+    preview = client.get(reverse('attendance:report_preview'), params)
+    form = client.get(reverse('attendance:report_form'), params)
+    export = client.get(reverse('attendance:export_monthly_report'), params)
+
+    assert preview.status_code == form.status_code == export.status_code == 200
+    assert preview.context['rows'] == form.context['rows']
+    assert preview.context['summary'] == form.context['summary']
+    assert export['Content-Type'].startswith('application/vnd.openxmlformats')
+
+
+@pytest.mark.django_db
+def test_write_only_export_matches_in_memory_workbook(month_data, tmp_path):
+    from openpyxl import load_workbook
+    from attendance.exports import write_sf2_workbook
+    from attendance.management.commands.bench_sf2_export import build_sf2_workbook
+
+    grid = MonthGrid(month_data, 2025, 9, Enrollment.objects.select_related('student'))
+    build_sf2_workbook(grid).save(tmp_path / 'memory.xlsx')
+    with open(tmp_path / 'stream.xlsx', 'wb') as fh:
+        write_sf2_workbook(grid, fh)
+
+    expected = load_workbook(tmp_path / 'memory.xlsx').active
+    actual = load_workbook(tmp_path / 'stream.xlsx').active
+
+    def values(ws):
+        rows = ws.iter_rows(max_row=expected.max_row, max_col=expected.max_column, values_only=True)
+        return [[None if v == '' else v for v in row] for row in rows]
+
+    assert values(actual) == values(expected)
+    for letter, dim in expected.column_dimensions.items():
+        assert actual.column_dimensions[letter].width == dim.width
+    nsd_col = 4 + grid.days.index(date(2025, 9, 3)) + 1
+    assert actual.cell(row=2, column=nsd_col).fill.fgColor.rgb.endswith('DDDDDD')
+    assert actual.cell(row=1, column=1).font.b
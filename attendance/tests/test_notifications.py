@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance.models import SchoolYear, Student, Enrollment, Notification, NotificationCounter
+from attendance.notifications import unread_count
+
+
+@pytest.fixture
+def staff_day(db, client):
+    sy = SchoolYear.objects.create(
+        name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31), is_active=True,
+    )
+    enrollments = []
+    for i in range(3):
+        s = Student.objects.create(last_name=f"L{i}", first_name="F", sex="M")
+        enrollments.append(Enrollment.objects.create(student=s, school_year=sy, date_enrolled=date(2025, 6, 16)))
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    client.force_login(staff)
+    return sy, enrollments, staff
+
+
+def test_unread_counter_follows_saves_and_mark_all_read(staff_day, client, save_day):
+    sy, (a, b, c), staff = staff_day
+    save_day(client, sy, [(a, 'A', 'A'), (b, 'L', 'P'), (c, 'P', 'P')])
+    assert NotificationCounter.objects.get(user=staff).unread == 2
+    save_day(client, sy, [(a, 'A', 'A'), (b, 'L', 'P'), (c, 'E', 'P')])
+    assert unread_count(staff) == 3
+
+    resp = client.get(reverse('attendance:notifications'))
+    assert resp.context['notif_unread'] == 3
+
+    client.post(reverse('attendance:notifications_mark_all_read'))
+    assert unread_count(staff) == 0
+    assert not Notification.objects.filter(is_read=False).exists()
+
+
+def test_recount_command_repairs_drift(staff_day):
+    _, _, staff = staff_day
+    other = get_user_model().objects.create_user('other', password='x')
+    Notification.objects.bulk_create([Notification(user=staff, message=f"m{i}") for i in range(4)])
+    Notification.objects.create(user=other, message="read", is_read=True)
+    NotificationCounter.objects.create(user=other, unread=7)
+
+    # A missing counter is rebuilt from the table on first read
+    assert unread_count(staff) == 4
+    call_command('recount_notifications', stdout=None)
+    assert dict(NotificationCounter.objects.values_list('user_id', 'unread')) == {staff.id: 4, other.id: 0}
+
+
+def test_keyset_pages_and_mark_selected(staff_day, client):
+    _, _, staff = staff_day
+    Notification.objects.bulk_create([Notification(user=staff, message=f"m{i:03d}") for i in range(120)])
+    NotificationCounter.objects.update_or_create(user=staff, defaults={'unread': 120})
+    # One shared timestamp, so every page boundary is decided by the id tie-break
+    Notification.objects.update(created=timezone.now())
+
+    seen = []
+    params = {}
+    for _ in range(5):
+        resp = client.get(reverse('attendance:notifications'), params)
+        seen += [n.id for n in resp.context['notifications']]
+        if not resp.context['next_cursor']:
+            break
+        params = {'after': resp.context['next_cursor']}
+    assert seen == sorted(Notification.objects.values_list('id', flat=True), reverse=True)
+
+    # A malformed cursor falls back to the first page without the "Newest" link
+    resp = client.get(reverse('attendance:notifications'), {'after': 'bogus'})
+    assert resp.context['is_first_page'] and resp.context['notifications'][0].id == seen[0]
+
+    client.post(reverse('attendance:notifications_mark_read'), {'ids': seen[:5]})
+    assert unread_count(staff) == 115
+    assert Notification.objects.filter(id__in=seen[:5], is_read=True).count() == 5
+
+
+def test_prune_by_age_and_count(staff_day):
+    _, _, staff = staff_day
+    Notification.objects.bulk_create([Notification(user=staff, message=f"m{i}") for i in range(10)])
+    old = Notification.objects.order_by('id')[:3]
+    Notification.objects.filter(id__in=[n.id for n in old]).update(created=timezone.now() - timedelta(days=200))
+    Notification.objects.filter(id=old[0].id).update(is_read=True)
+    call_command('recount_notifications', stdout=None)
+
+    call_command('prune_notifications', days=90, keep=4, batch_size=2, stdout=None)
+    remaining = list(Notification.objects.order_by('-id').values_list('id', flat=True))
+    assert len(remaining) == 4
+    assert remaining == sorted(remaining, reverse=True)[:4]
+    assert unread_count(staff) == 4
+
+
+def test_badge_endpoint_answers_304_until_something_changes(staff_day, client, monkeypatch):
+    sy, enrollments, staff = staff_day
+    url = reverse('attendance:notifications_badge')
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert resp.json() == {'unread': 0, 'latest': []}
+    etag = resp['ETag']
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    # A long-poll re-checks while it waits and returns as soon as the badge changes
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            Notification.objects.create(user=staff, message='new')
+            NotificationCounter.objects.filter(user=staff).update(unread=1)
+
+    monkeypatch.setattr('attendance.views.time.sleep', fake_sleep)
+    resp = client.get(url, {'wait': '10'}, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert len(sleeps) == 2
+    note = Notification.objects.get(user=staff)
+    assert resp.json() == {'unread': 1, 'latest': [note.id]}
+    assert resp['ETag'] != etag
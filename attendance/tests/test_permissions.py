@@ -0,0 +1,80 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.urls import reverse
+
+from attendance.caching import caps_cache_key
+from attendance.models import FeatureAccess
+from attendance.permissions import FEATURES, caps_for, has_feature
+
+User = get_user_model()
+
+
+def _fresh(user):
+    # A new instance behaves like request.user on the next request
+    return User.objects.get(pk=user.pk)
+
+
+@pytest.mark.django_db
+def test_caps_resolved_in_two_queries_then_memoized_and_cached(django_assert_num_queries):
+    adviser = User.objects.create_user('adv', password='x')
+    adviser.groups.add(Group.objects.create(name='Adviser'))
+    FeatureAccess.objects.create(user=adviser, feature='manage_students', allow=True)
+    FeatureAccess.objects.create(user=adviser, feature='manage_periods', allow=False)
+
+    user = _fresh(adviser)
+    with django_assert_num_queries(2):
+        caps = caps_for(user)
+        assert all(has_feature(user, key) == caps[key] for key in FEATURES)
+    assert caps['manage_students'] and not caps['manage_periods']
+    assert caps['take_attendance'] and not caps['manage_reports']
+
+    # The next request's user object is served from the shared cache
+    user = _fresh(adviser)
+    with django_assert_num_queries(0):
+        assert caps_for(user) == caps
+
+
+@pytest.mark.django_db
+def test_caps_invalidated_by_group_and_override_changes():
+    user = User.objects.create_user('officer', password='x')
+    assert caps_for(_fresh(user)) == {key: key == 'dashboard' for key in FEATURES}
+
+    officers = Group.objects.create(name='StudentOfficer')
+    officers.user_set.add(user)
+    assert caps_for(_fresh(user))['take_attendance']
+
+    FeatureAccess.objects.create(user=user, feature='take_attendance', allow=False)
+    assert not caps_for(_fresh(user))['take_attendance']
+
+    user.groups.clear()
+    FeatureAccess.objects.filter(user=user).delete()
+    assert not caps_for(_fresh(user))['view_student_history']
+
+
+@pytest.mark.django_db
+def test_access_edit_refreshes_target_caps(client):
+    admin = User.objects.create_user('admin', password='x', is_staff=True)
+    target = User.objects.create_user('t', password='x')
+    assert not caps_for(_fresh(target))['view_reports']
+
+    client.force_login(admin)
+    resp = client.post(reverse('attendance:access_edit', args=[target.id]), {'feat_allow': ['dashboard', 'view_reports']})
+    assert resp.status_code == 302
+    caps = caps_for(_fresh(target))
+    assert caps['view_reports'] and caps['dashboard'] and not caps['take_attendance']
+
+
+@pytest.mark.django_db
+def test_caps_bumped_again_after_commit(django_capture_on_commit_callbacks):
+    user = User.objects.create_user('late', password='x')
+    with django_capture_on_commit_callbacks() as callbacks:
+        FeatureAccess.objects.create(user=user, feature='view_reports', allow=True)
+        # A concurrent request caches the pre-commit map under the new version
+        stale = {key: key == 'dashboard' for key in FEATURES}
+        cache.set(caps_cache_key(user.pk), stale)
+    assert callbacks
+    for callback in callbacks:
+        callback()
+    assert caps_for(_fresh(user))['view_reports']
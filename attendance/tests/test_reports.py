@@ -1,21 +1,31 @@
 from datetime import date, timedelta
+from io import BytesIO
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 
+from attendance.caching import sf2_generation
+from attendance.exports import write_sf2_workbook
+from attendance.importers import import_sf2_attendance
 from attendance.models import (
     SchoolYear,
     Student,
     Enrollment,
     AttendanceSessionRecord,
+    DailyAttendance,
     NonSchoolDay,
 )
-from attendance.views import _compute_sf2_summary
+from attendance.reports import MonthGrid
+from attendance.rollups import rebuild_daily_rollup
 
 
 @pytest.mark.django_db
-def test_sf2_summary_half_day_absences_and_holiday_exclusion():
+def test_sf2_summary_half_day_absences_and_holiday_exclusion(compute_sf2_summary):
     # Create school year covering a full month
     sy = SchoolYear.objects.create(
         name="2025-2026",
@@ -55,7 +65,7 @@ def test_sf2_summary_half_day_absences_and_holiday_exclusion():
     by_key = {(r.enrollment_id, r.date, r.session): r for r in recs}
 
     # Compute summary for June
-    summary = _compute_sf2_summary(sy, 2025, 6, [d for d in days if sy.start_date <= d <= sy.end_date], [e], by_key)
+    summary = compute_sf2_summary(sy, 2025, 6, [d for d in days if sy.start_date <= d <= sy.end_date], [e], by_key)
 
     # School days exclude the declared holiday
     assert summary['school_days'] == len([d for d in school_days if d != nsd_day])
@@ -64,3 +74,80 @@ def test_sf2_summary_half_day_absences_and_holiday_exclusion():
     assert summary['by']['M']['absent5'] == 1
     assert summary['by']['T']['absent5'] == 1
 
+
+
+@pytest.mark.django_db
+def test_sf2_workbook_round_trips_through_the_importer():
+    sy = SchoolYear.objects.create(name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31))
+    enrollments = []
+    for i, sex in enumerate("MFM"):
+        s = Student.objects.create(last_name=f"L{i}", first_name="F", sex=sex, lrn=f"10000{i}")
+        enrollments.append(Enrollment.objects.create(student=s, school_year=sy))
+    no_lrn = Student.objects.create(last_name="Nolrn", first_name="F", sex="F")
+    Enrollment.objects.create(student=no_lrn, school_year=sy)
+    statuses = "PALEP"
+    for n, e in enumerate(enrollments):
+        for d in range(1, 6):
+            day = date(2025, 9, d)
+            AttendanceSessionRecord.objects.create(enrollment=e, date=day, session="AM", status=statuses[(n + d) % 5])
+            if d != 3:
+                AttendanceSessionRecord.objects.create(enrollment=e, date=day, session="PM", status=statuses[(n * d) % 5])
+    rebuild_daily_rollup(sy)
+
+    def snapshot():
+        return (
+            sorted(AttendanceSessionRecord.objects.values_list('enrollment_id', 'date', 'session', 'status')),
+            sorted(DailyAttendance.objects.values_list('enrollment_id', 'date', 'present', 'absent', 'late', 'excused')),
+        )
+
+    expected = snapshot()
+    buf = BytesIO()
+    write_sf2_workbook(MonthGrid(sy, 2025, 9, Enrollment.objects.filter(school_year=sy).select_related('student')), buf)
+    AttendanceSessionRecord.objects.all().delete()
+    DailyAttendance.objects.all().delete()
+
+    buf.seek(0)
+    progress = []
+    result = import_sf2_attendance(sy, buf, chunk_rows=2, progress=lambda sheet, done: progress.append(done))
+    assert snapshot() == expected
+    assert (result['sheets'], result['learners'], result['records']) == (1, 3, 27)
+    assert result['errors'] == [("SF2 2025-09", 7, 'learner row has no LRN')]
+    assert progress == [2, 3]
+
+
+@pytest.mark.django_db
+def test_non_school_days_import_previews_then_bulk_applies(client):
+    sy = SchoolYear.objects.create(name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31))
+    NonSchoolDay.objects.create(school_year=sy, date=date(2025, 8, 21), kind="HOL", title="Ninoy Aquino Day")
+    NonSchoolDay.objects.create(school_year=sy, date=date(2025, 8, 25), kind="HOL", title="Heroes Day")
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    client.force_login(staff)
+    url = reverse('attendance:non_school_days_import')
+    csv_file = SimpleUploadedFile('nsd.csv', (
+        "date,kind,title,notes\n"
+        "2025-08-21,HOL,Ninoy Aquino Day,\n"
+        "2025-08-25,sus,Heroes Day,Moved\n"
+        "2025-11-01,holiday,All Saints' Day,\n"
+        "2025-12-08,HOL,Feast,\n"
+        "2024-01-01,HOL,Old,\n"
+        "bad,HOL,Bad,\n"
+    ).encode())
+
+    resp = client.post(url, {'schoolyear_id': sy.id, 'file': csv_file})
+    preview = resp.context['preview']
+    assert [n.date for n in preview['create']] == [date(2025, 11, 1), date(2025, 12, 8)]
+    assert [(n.kind, old['kind']) for n, old in preview['update']] == [("SUS", "HOL")]
+    assert preview['unchanged'] == 1 and len(preview['skipped']) == 2
+    assert NonSchoolDay.objects.count() == 2
+
+    gens = {m: sf2_generation(sy.id, *m) for m in [(2025, 8), (2025, 9), (2025, 11), (2025, 12)]}
+    with CaptureQueriesContext(connection) as ctx:
+        client.post(url, {'action': 'apply'})
+    writes = [q['sql'].split()[0] for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE'))
+              and 'attendance_nonschoolday' in q['sql']]
+    assert writes == ['INSERT', 'UPDATE']
+    assert NonSchoolDay.objects.get(date=date(2025, 8, 25)).notes == "Moved"
+    assert NonSchoolDay.objects.count() == 4
+    # Only the months that changed get a new SF2 generation
+    assert {m for m, g in gens.items() if sf2_generation(sy.id, *m) != g} == {(2025, 8), (2025, 11), (2025, 12)}
+    assert 'nsd_import' not in client.session
@@ -0,0 +1,123 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.urls import reverse
+
+from attendance.models import (
+    SchoolYear,
+    Student,
+    Enrollment,
+    AttendanceSessionRecord,
+    DailyAttendance,
+)
+from attendance.rollups import CUMULATIVE_FIELDS, ROLLUP_FIELDS, range_totals, rollup_totals
+
+DAY = date(2025, 9, 1)
+
+
+@pytest.fixture
+def setup(db, client):
+    sy = SchoolYear.objects.create(
+        name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31), is_active=True,
+    )
+    enrollments = []
+    for i, sex in enumerate("MFM"):
+        s = Student.objects.create(last_name=f"L{i}", first_name="F", sex=sex)
+        enrollments.append(Enrollment.objects.create(student=s, school_year=sy, date_enrolled=date(2025, 6, 16)))
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    client.force_login(staff)
+    return sy, enrollments
+
+
+def test_take_attendance_maintains_rollup(setup, client, save_day):
+    sy, (a, b, c) = setup
+    resp = save_day(client, sy, [(a, 'P', 'A'), (b, 'L', 'L'), (c, 'A', 'A')])
+    assert resp.status_code == 302
+
+    rows = {r.enrollment_id: r for r in DailyAttendance.objects.filter(date=DAY)}
+    assert (rows[a.id].present, rows[a.id].absent) == (1, 1)
+    assert rows[b.id].late == 2
+    assert rows[c.id].absent == 2
+
+    # Re-saving replaces the learner-day rows instead of adding to them
+    save_day(client, sy, [(a, 'P', 'P'), (b, 'L', 'E'), (c, 'A', 'P')])
+    rows = {r.enrollment_id: r for r in DailyAttendance.objects.filter(date=DAY)}
+    assert DailyAttendance.objects.count() == 3
+    assert (rows[a.id].present, rows[a.id].absent) == (2, 0)
+    assert (rows[b.id].late, rows[b.id].excused) == (1, 1)
+
+    totals = rollup_totals([a, b, c], DAY, DAY)
+    assert totals[c.id]['absent_total'] == 1
+    assert totals[c.id]['present_total'] == 1
+
+
+def test_day_delete_clears_rollup_and_rebuild_matches(setup, client, save_day):
+    sy, (a, b, c) = setup
+    save_day(client, sy, [(a, 'P', 'A'), (b, 'L', 'L'), (c, 'A', 'A')])
+    save_day(client, sy, [(a, 'A', 'A'), (b, 'P', 'P'), (c, 'P', 'E')], day=date(2025, 9, 2))
+    expected = sorted(DailyAttendance.objects.values_list('enrollment_id', 'date', 'present', 'absent', 'late', 'excused'))
+
+    DailyAttendance.objects.all().delete()
+    call_command('rebuild_daily_rollup', schoolyear=sy.id, stdout=None)
+    assert sorted(DailyAttendance.objects.values_list('enrollment_id', 'date', 'present', 'absent', 'late', 'excused')) == expected
+
+    client.post(reverse('attendance:report_day_delete', args=[sy.id, 2025, 9, 1]))
+    assert not AttendanceSessionRecord.objects.filter(date=DAY).exists()
+    assert not DailyAttendance.objects.filter(date=DAY).exists()
+    assert DailyAttendance.objects.filter(date=date(2025, 9, 2)).count() == 3
+
+
+def test_admin_bulk_delete_refreshes_rollup_in_one_pass(setup, client, save_day, django_assert_max_num_queries):
+    sy, (a, b, c) = setup
+    for day in (DAY, date(2025, 9, 2)):
+        save_day(client, sy, [(a, 'A', 'A'), (b, 'P', 'L'), (c, 'P', 'P')], day=day)
+    admin = site._registry[AttendanceSessionRecord]
+    request = RequestFactory().post('/')
+    # 2 dates: one rollup refresh covering both, not one per learner-day
+    with django_assert_max_num_queries(12):
+        admin.delete_queryset(request, AttendanceSessionRecord.objects.filter(enrollment__in=[a, b]))
+    assert set(DailyAttendance.objects.values_list('enrollment_id', flat=True)) == {c.id}
+
+
+def test_running_totals_answer_any_date_range(setup, client, save_day):
+    sy, (a, b, c) = setup
+    days = [date(2025, 9, d) for d in (1, 2, 3, 4, 5, 8)]
+    for i, day in enumerate(days):
+        save_day(client, sy, [(a, 'P', 'A'), (b, 'LE'[i % 2], 'P'), (c, 'A', 'A')][:2 + i % 2], day=day)
+    # Editing an early day shifts the running totals of every later row
+    save_day(client, sy, [(a, 'A', 'A'), (b, 'P', 'P'), (c, 'P', 'P')], day=days[1])
+    client.post(reverse('attendance:report_day_delete', args=[sy.id, 2025, 9, 3]))
+
+    def check():
+        for start in [date(2025, 8, 30)] + days:
+            for end in days + [date(2025, 9, 30)]:
+                expected = rollup_totals([a, b, c], start, end)
+                got = range_totals([a.id, b.id, c.id], start, end)
+                for e in (a, b, c):
+                    row = expected.get(e.id, {})
+                    assert got[e.id] == {f: row.get(f'{f}_total') or 0 for f in ROLLUP_FIELDS}, (e, start, end)
+
+    check()
+    cums = sorted(DailyAttendance.objects.values_list('enrollment_id', 'date', *CUMULATIVE_FIELDS.values()))
+    call_command('rebuild_daily_rollup', schoolyear=sy.id, stdout=None)
+    assert sorted(DailyAttendance.objects.values_list('enrollment_id', 'date', *CUMULATIVE_FIELDS.values())) == cums
+    check()
+
+
+def test_range_report_view(setup, client, save_day):
+    sy, (a, b, c) = setup
+    save_day(client, sy, [(a, 'P', 'A'), (b, 'L', 'E'), (c, 'A', 'A')])
+    save_day(client, sy, [(a, 'P', 'P'), (b, 'P', 'P'), (c, 'A', 'P')], day=date(2025, 9, 2))
+    resp = client.get(reverse('attendance:report_range'), {
+        'schoolyear_id': sy.id, 'start': '2025-09-01', 'end': '2025-09-05',
+    })
+    assert resp.status_code == 200
+    assert resp.context['school_days'] == 5
+    rows = {r['enrollment'].id: r for r in resp.context['rows_m'] + resp.context['rows_f']}
+    assert rows[a.id]['counts'] == {'P': 1.5, 'A': 0.5, 'L': 0.0, 'E': 0.0}
+    assert rows[b.id]['counts'] == {'P': 2.0, 'A': 0.0, 'L': 0.5, 'E': 0.5}
+    assert rows[c.id]['rate'] == 10.0
@@ -0,0 +1,74 @@
+import io
+from datetime import date, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from attendance.importers import apply_non_school_days, iter_rows, parse_non_school_days
+from attendance.models import NonSchoolDay, SchoolYear
+from attendance.school_calendar import SchoolCalendar, school_calendar
+from attendance.sf2 import first_friday_of_sy
+
+
+@pytest.fixture
+def sy(db):
+    return SchoolYear.objects.create(
+        name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31), is_active=True,
+    )
+
+
+def _naive_school_days(sy, start, end):
+    nsd = set(NonSchoolDay.objects.filter(school_year=sy).values_list('date', flat=True))
+    days = [start + timedelta(i) for i in range((end - start).days + 1)]
+    return [d for d in days if sy.start_date <= d <= sy.end_date and d.weekday() < 5 and d not in nsd]
+
+
+def test_calendar_matches_day_by_day_filtering(sy):
+    for d in (date(2025, 8, 25), date(2025, 12, 25), date(2025, 12, 27), date(2026, 4, 9)):
+        NonSchoolDay.objects.create(school_year=sy, date=d, title="Holiday")
+    cal = SchoolCalendar.for_school_year(sy)
+
+    for start, end in [
+        (date(2025, 6, 1), date(2025, 6, 30)),
+        (date(2025, 12, 1), date(2025, 12, 31)),
+        (date(2025, 6, 16), date(2026, 3, 31)),
+        (date(2026, 3, 30), date(2026, 4, 30)),
+        (date(2025, 9, 7), date(2025, 9, 6)),
+    ]:
+        expected = _naive_school_days(sy, start, end)
+        assert cal.school_days(start, end) == expected
+        assert cal.count_school_days(start, end) == len(expected)
+
+    assert cal.is_school_day(date(2025, 8, 26))
+    assert not cal.is_school_day(date(2025, 8, 25))
+    assert not cal.is_school_day(date(2025, 8, 30))
+    assert not cal.is_school_day(date(2026, 4, 1))
+    # Rows outside the school year are not part of its calendar
+    assert [n.date for n in cal.non_school_days_between(date(2025, 12, 1), date(2026, 12, 31))] == [
+        date(2025, 12, 25), date(2025, 12, 27),
+    ]
+    assert cal.non_school_day(date(2025, 12, 25)).title == "Holiday"
+    assert cal.first_friday == first_friday_of_sy(sy) == date(2025, 6, 20)
+
+
+def test_calendar_is_cached_until_non_school_days_change(sy):
+    assert school_calendar(sy).is_school_day(date(2025, 9, 1))
+    with CaptureQueriesContext(connection) as ctx:
+        school_calendar(sy)
+    assert len(ctx.captured_queries) == 0
+
+    nsd = NonSchoolDay.objects.create(school_year=sy, date=date(2025, 9, 1), title="Holiday")
+    assert not school_calendar(sy).is_school_day(date(2025, 9, 1))
+    nsd.delete()
+    assert school_calendar(sy).is_school_day(date(2025, 9, 1))
+
+    # Bulk imports send no signals and bump the calendar themselves
+    rows = iter_rows(io.BytesIO(b"date,kind,title\n2025-09-02,SUS,Typhoon\n"), "nsd.csv")
+    entries, _ = parse_non_school_days(rows, sy)
+    apply_non_school_days(sy, entries)
+    assert not school_calendar(sy).is_school_day(date(2025, 9, 2))
+
+    sy.end_date = date(2026, 4, 30)
+    sy.save()
+    assert school_calendar(sy).is_school_day(date(2026, 4, 1))
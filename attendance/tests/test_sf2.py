@@ -0,0 +1,83 @@
+import random
+from calendar import monthrange
+from datetime import date, timedelta
+
+import pytest
+
+from attendance.models import (
+    SchoolYear,
+    Student,
+    Enrollment,
+    AttendanceSessionRecord,
+    NonSchoolDay,
+)
+
+
+def _month_days(sy, year, month):
+    start = max(date(year, month, 1), sy.start_date)
+    end = min(date(year, month, monthrange(year, month)[1]), sy.end_date)
+    return [start + timedelta(n) for n in range((end - start).days + 1)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('seed', [1, 7, 42])
+def test_array_engine_matches_reference(seed, compute_sf2_summary, reference_sf2_summary):
+    rng = random.Random(seed)
+    sy = SchoolYear.objects.create(
+        name=f"SY-{seed}", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31), is_active=True,
+    )
+    NonSchoolDay.objects.create(school_year=sy, date=date(2025, 8, 21), title="Holiday")
+    NonSchoolDay.objects.create(school_year=sy, date=date(2025, 8, 25), kind="SUS", title="Storm")
+
+    enrolment_dates = [date(2025, 6, 16), date(2025, 6, 20), date(2025, 7, 3), date(2025, 8, 12)]
+    for i in range(40):
+        s = Student.objects.create(last_name=f"L{i:02d}", first_name="F", sex=rng.choice("MF"))
+        Enrollment.objects.create(
+            student=s, school_year=sy, date_enrolled=rng.choice(enrolment_dates), active=rng.random() > 0.1,
+        )
+    enrollments = list(Enrollment.objects.filter(school_year=sy).select_related('student'))
+
+    weights = {'P': 6, 'A': 3, 'L': 1, 'E': 1, '': 1}
+    codes = [c for c, w in weights.items() for _ in range(w)]
+    recs = []
+    for e in enrollments:
+        streaky = rng.random() < 0.3
+        for d in _month_days(sy, 2025, 8):
+            for session in ('AM', 'PM'):
+                status = 'A' if streaky and rng.random() < 0.85 else rng.choice(codes)
+                if status:
+                    recs.append(AttendanceSessionRecord(enrollment=e, date=d, session=session, status=status))
+    AttendanceSessionRecord.objects.bulk_create(recs)
+
+    for year, month in [(2025, 6), (2025, 7), (2025, 8)]:
+        days = _month_days(sy, year, month)
+        by_key = {
+            (r.enrollment_id, r.date, r.session): r
+            for r in AttendanceSessionRecord.objects.filter(date__gte=days[0], date__lte=days[-1])
+        }
+        expected = reference_sf2_summary(sy, year, month, days, enrollments, by_key)
+        assert compute_sf2_summary(sy, year, month, days, enrollments, by_key) == expected
+
+
+@pytest.mark.django_db
+def test_absence_streak_is_broken_by_a_present_day(compute_sf2_summary, reference_sf2_summary):
+    sy = SchoolYear.objects.create(
+        name="2025-2026", start_date=date(2025, 9, 1), end_date=date(2025, 9, 30), is_active=True,
+    )
+    s = Student.objects.create(last_name="Cruz", first_name="Ana", sex="F")
+    Enrollment.objects.create(student=s, school_year=sy, date_enrolled=date(2025, 9, 1))
+    e = Enrollment.objects.select_related('student').get()
+    days = _month_days(sy, 2025, 9)
+    school_days = [d for d in days if d.weekday() < 5]
+    # 4.5 absent days, one clean day, then 4.5 more: never reaches 5.0 in a row
+    pattern = [('A', 'A')] * 4 + [('A', 'P'), ('P', 'P')] + [('A', 'A')] * 4 + [('P', 'A')]
+    for d, (am, pm) in zip(school_days, pattern):
+        AttendanceSessionRecord.objects.create(enrollment=e, date=d, session="AM", status=am)
+        AttendanceSessionRecord.objects.create(enrollment=e, date=d, session="PM", status=pm)
+    by_key = {(r.enrollment_id, r.date, r.session): r for r in AttendanceSessionRecord.objects.all()}
+
+    summary = compute_sf2_summary(sy, 2025, 9, days, [e], by_key)
+
+    assert summary == reference_sf2_summary(sy, 2025, 9, days, [e], by_key)
+    assert summary['by']['F']['absent5'] == 0
+    assert summary['by']['T']['ada'] == round(2.0 / len(school_days), 2)
@@ -0,0 +1,155 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from openpyxl import Workbook
+
+from attendance.importers import import_students
+from attendance.models import Enrollment, SchoolYear, Section, Student
+from attendance.search import normalize_search, student_page
+
+
+@pytest.fixture
+def staff_client(db, client):
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    client.force_login(staff)
+    return client
+
+
+def _names(students):
+    return [f"{s.last_name}, {s.first_name}" for s in students]
+
+
+def test_search_columns_follow_name_edits(db):
+    s = Student.objects.create(last_name="Peña-Cruz", first_name="Ma. José", sex="F")
+    assert (s.search_name, s.search_name_rev) == ("pena cruz ma jose", "ma jose pena cruz")
+    s.first_name = "Ana"
+    s.save(update_fields=['first_name'])
+    s.refresh_from_db()
+    assert s.search_name == "pena cruz ana"
+    assert normalize_search("  PEÑA,cruz ") == "pena cruz"
+
+
+def test_student_list_searches_by_name_prefix_and_lrn(staff_client):
+    Student.objects.create(last_name="Dela Cruz", first_name="Juan", sex="M", lrn="123456")
+    Student.objects.create(last_name="Santos", first_name="Juana", sex="F", lrn="987654")
+    Student.objects.create(last_name="Peña", first_name="Ana", sex="F")
+    url = reverse('attendance:student_list')
+    assert _names(staff_client.get(url, {'q': 'dela cruz'}).context['students']) == ["Dela Cruz, Juan"]
+    assert _names(staff_client.get(url, {'q': 'juan'}).context['students']) == ["Dela Cruz, Juan", "Santos, Juana"]
+    assert _names(staff_client.get(url, {'q': 'pena'}).context['students']) == ["Peña, Ana"]
+    assert _names(staff_client.get(url, {'q': '9876'}).context['students']) == ["Santos, Juana"]
+
+
+def test_keyset_pages_cover_every_learner_once(staff_client):
+    for i in range(7):
+        # Duplicate names force the id tie-breaker
+        Student.objects.create(last_name=f"L{i // 2}", first_name="Same", sex="M")
+    seen, cursor = [], None
+    for _ in range(10):
+        items, cursor = student_page(Student.objects.all(), cursor, size=3)
+        seen += [s.pk for s in items]
+        if not cursor:
+            break
+    assert seen == list(Student.objects.order_by('last_name', 'first_name', 'id').values_list('pk', flat=True))
+
+    resp = staff_client.get(reverse('attendance:student_list'), {'after': 'not-a-cursor'})
+    assert resp.status_code == 200 and resp.context['students']
+
+
+def test_lookup_returns_json_pages(staff_client):
+    for i in range(25):
+        Student.objects.create(last_name=f"Reyes{i:02d}", first_name="A", sex="M")
+    Student.objects.create(last_name="Ramos", first_name="B", sex="M")
+    url = reverse('attendance:student_lookup')
+    first = staff_client.get(url, {'q': 'reyes'}).json()
+    assert len(first['results']) == 20 and first['next']
+    rest = staff_client.get(url, {'q': 'reyes', 'after': first['next']}).json()
+    assert [r['name'] for r in rest['results']] == [f"Reyes{i:02d}, A" for i in range(20, 25)]
+    assert rest['next'] is None
+
+
+def test_bulk_enroll_inserts_once_and_reports_counts(staff_client):
+    sy = SchoolYear.objects.create(name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31))
+    students = [Student.objects.create(last_name=f"L{i:02d}", first_name="F", sex="M") for i in range(30)]
+    Enrollment.objects.create(student=students[0], school_year=sy)
+    url = reverse('attendance:enroll_students', args=[sy.id])
+    ids = [s.id for s in students] + [999999, 'x']
+    with CaptureQueriesContext(connection) as ctx:
+        resp = staff_client.post(url, {'student_ids': ids})
+    inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT') and 'attendance_enrollment' in q['sql']]
+    assert len(inserts) == 1
+    assert Enrollment.objects.filter(school_year=sy).count() == 30
+    assert [str(m) for m in get_messages(resp.wsgi_request)] == [
+        f'Enrolled 29 new student(s) to {sy.name}. 1 already enrolled.',
+        'Skipped 1 unknown student id(s).',
+    ]
+
+
+CSV = """lrn,last_name,first_name,middle_name,sex,birthdate,guardian_name,guardian_phone,section
+111,Dela Cruz,Juan,,M,2014-05-02,,,Ruby
+222,Reyes,Ana,,female,2014-11-20,,,Jade
+,Santos,Leo,,M,2014-01-09,,,Nowhere
+,Broken,,,M,,,,
+111,Dela Cruz,Juan,,M,2014-05-02,,,Ruby
+"""
+
+
+def test_import_view_dedupes_enrolls_and_assigns_sections(staff_client):
+    staff = get_user_model().objects.get(username='staff')
+    sy = SchoolYear.objects.create(name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31))
+    ruby = Section.objects.create(school_year=sy, name="Ruby", adviser=staff)
+    Section.objects.create(school_year=sy, name="Jade", adviser=staff)
+    reyes = Student.objects.create(lrn="222", last_name="Reyes", first_name="Ana", sex="F")
+    Enrollment.objects.create(student=reyes, school_year=sy, section=ruby)
+
+    upload = SimpleUploadedFile('learners.csv', CSV.encode())
+    resp = staff_client.post(reverse('attendance:student_import'), {'file': upload, 'schoolyear_id': sy.id})
+    assert resp.status_code == 302
+    assert Student.objects.count() == 3
+    juan = Student.objects.get(lrn="111")
+    assert juan.birthday_key == 502 and juan.search_name == "dela cruz juan"
+    sections = dict(Enrollment.objects.filter(school_year=sy).values_list('student__last_name', 'section__name'))
+    assert sections == {'Dela Cruz': 'Ruby', 'Reyes': 'Jade', 'Santos': None}
+    assert [str(m) for m in get_messages(resp.wsgi_request)] == [
+        f"Imported: created 2, already on file 2, skipped 1. Enrolled 2 in {sy.name} (1 already enrolled, 1 moved to a new section).",
+        "1 row(s) named a section that does not exist; enrolled without a section.",
+        "Row 5: last_name and first_name are required",
+    ]
+
+    # Re-importing adds nobody
+    result = import_students([{'last_name': 'Santos', 'first_name': 'Leo', 'sex': 'M', 'birthdate': '2014-01-09'}])
+    assert (result['created'], result['existing']) == (0, 1)
+
+
+def test_import_query_count_does_not_grow_with_rows(db):
+    def rows(n):
+        return [{'lrn': str(i), 'last_name': f'L{i}', 'first_name': 'F', 'sex': 'M'} for i in range(n)]
+
+    with CaptureQueriesContext(connection) as small:
+        import_students(rows(10), chunk_size=100)
+    Student.objects.all().delete()
+    with CaptureQueriesContext(connection) as large:
+        import_students(rows(60), chunk_size=100)
+    assert len(large.captured_queries) == len(small.captured_queries)
+    assert Student.objects.count() == 60
+
+
+def test_import_command_reads_xlsx(db, tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['LRN', 'Last Name', 'First Name', 'Sex', 'Birthdate'])
+    ws.append([123456789012, 'Reyes', 'Ana', 'F', date(2014, 11, 20)])
+    ws.append([None, None, None, None, None])
+    path = tmp_path / 'learners.xlsx'
+    wb.save(path)
+    call_command('import_students', str(path), stdout=None)
+    s = Student.objects.get()
+    assert (s.lrn, s.last_name, s.birthdate) == ('123456789012', 'Reyes', date(2014, 11, 20))
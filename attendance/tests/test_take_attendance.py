@@ -0,0 +1,174 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from attendance.models import (
+    SchoolYear,
+    Student,
+    Enrollment,
+    Period,
+    AttendancePeriodRecord,
+    AttendanceSessionRecord,
+    DailyAttendance,
+    Notification,
+)
+from attendance.notifications import attendance_notifications
+
+DAY = date(2025, 9, 1)
+
+
+@pytest.fixture
+def school(db, client):
+    sy = SchoolYear.objects.create(
+        name="2025-2026", start_date=date(2025, 6, 16), end_date=date(2026, 3, 31), is_active=True,
+    )
+    staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    client.force_login(staff)
+    # Fill the capability cache so query counts only cover the save itself
+    client.get(reverse('attendance:dashboard'))
+    return sy
+
+
+def _enroll(sy, n, start=0):
+    out = []
+    for i in range(start, start + n):
+        s = Student.objects.create(last_name=f"L{i:03d}", first_name="F", sex="MF"[i % 2])
+        out.append(Enrollment.objects.create(student=s, school_year=sy, date_enrolled=date(2025, 6, 16)))
+    return out
+
+
+def _write_queries(ctx):
+    return [q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith(('INSERT', 'UPDATE')) and 'attendance_attendancesessionrecord' in q['sql']]
+
+
+def test_session_save_uses_fixed_number_of_statements(school, client, save_day):
+    small = _enroll(school, 3)
+    with CaptureQueriesContext(connection) as ctx_small:
+        save_day(client, school, [(e, 'P', 'P') for e in small])
+    AttendanceSessionRecord.objects.all().delete()
+    DailyAttendance.objects.all().delete()
+
+    large = small + _enroll(school, 42, start=3)
+    with CaptureQueriesContext(connection) as ctx_large:
+        resp = save_day(client, school, [(e, 'P', 'P') for e in large])
+    assert resp.status_code == 302
+    assert AttendanceSessionRecord.objects.count() == 90
+    assert len(ctx_large.captured_queries) == len(ctx_small.captured_queries)
+    assert len(_write_queries(ctx_large)) == 1
+
+
+def test_session_save_writes_only_changed_rows(school, client, save_day):
+    a, b, c = _enroll(school, 3)
+    save_day(client, school, [(a, 'P', 'P'), (b, 'P', 'P'), (c, 'P', 'P')])
+
+    with CaptureQueriesContext(connection) as ctx:
+        save_day(client, school, [(a, 'P', 'P'), (b, 'P', 'P'), (c, 'P', 'P')])
+    assert _write_queries(ctx) == []
+
+    save_day(client, school, [(a, 'P', 'P'), (b, 'A', 'P'), (c, 'P', 'P')])
+    statuses = dict(AttendanceSessionRecord.objects.filter(session='AM').values_list('enrollment_id', 'status'))
+    assert statuses == {a.id: 'P', b.id: 'A', c.id: 'P'}
+    assert AttendanceSessionRecord.objects.count() == 6
+    assert DailyAttendance.objects.get(enrollment=b, date=DAY).absent == 1
+
+
+def _post_periods(client, sy, statuses, periods):
+    """``statuses`` maps enrollment -> one status per period, in ``periods`` order."""
+    data = {'date': DAY.isoformat()}
+    for e, codes in statuses.items():
+        for p, code in zip(periods, codes):
+            data[f"p_{e.id}_{p.id}_status"] = code
+    return client.post(reverse('attendance:take_attendance', args=[sy.id]), data)
+
+
+def test_period_save_rolls_up_in_memory(school, client):
+    periods = [
+        Period.objects.create(school_year=school, name=f"P{i}", order=i, half='AM' if i < 2 else 'PM')
+        for i in range(4)
+    ]
+    a, b = _enroll(school, 2)
+    with CaptureQueriesContext(connection) as ctx_small:
+        resp = _post_periods(client, school, {a: 'AAPL', b: 'PLPE'}, periods)
+    assert resp.status_code == 302
+    sessions = {(r.enrollment_id, r.session): r.status for r in AttendanceSessionRecord.objects.all()}
+    assert sessions == {(a.id, 'AM'): 'A', (a.id, 'PM'): 'L', (b.id, 'AM'): 'L', (b.id, 'PM'): 'E'}
+    assert DailyAttendance.objects.get(enrollment=a, date=DAY).absent == 1
+
+    # Re-saving updates in place, and the statement count does not grow with the roster
+    more = _enroll(school, 30, start=2)
+    statuses = {e: 'PPPP' for e in [a, b] + more}
+    with CaptureQueriesContext(connection) as ctx_large:
+        _post_periods(client, school, statuses, periods)
+    assert AttendancePeriodRecord.objects.count() == 32 * 4
+    assert AttendanceSessionRecord.objects.filter(status='P').count() == 64
+    assert len(ctx_large.captured_queries) == len(ctx_small.captured_queries)
+
+
+def test_rebuild_sessions_from_periods_command(school, client):
+    periods = [
+        Period.objects.create(school_year=school, name=f"P{i}", order=i, half='AM' if i < 2 else 'PM')
+        for i in range(4)
+    ]
+    a, b = _enroll(school, 2)
+    _post_periods(client, school, {a: 'AAPL', b: 'PLPE'}, periods)
+    expected = sorted(AttendanceSessionRecord.objects.values_list('enrollment_id', 'session', 'status'))
+
+    AttendanceSessionRecord.objects.update(status='P')
+    call_command('rebuild_sessions_from_periods', schoolyear=school.id, start=DAY, end=DAY, stdout=None)
+    assert sorted(AttendanceSessionRecord.objects.values_list('enrollment_id', 'session', 'status')) == expected
+    assert DailyAttendance.objects.get(enrollment=a, date=DAY).late == 1
+
+
+def test_session_save_batches_and_coalesces_notifications(school, client, save_day):
+    a, b, c = _enroll(school, 3)
+    with CaptureQueriesContext(connection) as ctx:
+        save_day(client, school, [(a, 'A', 'A'), (b, 'L', 'E'), (c, 'P', 'P')])
+    inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT') and 'attendance_notification' in q['sql']]
+    assert len(inserts) == 1
+    messages = sorted(Notification.objects.values_list('message', flat=True))
+    assert messages == [
+        f"L000, F is Absent (AM, PM) on {DAY}",
+        f"L001, F is Late (AM), Excused (PM) on {DAY}",
+    ]
+
+    # Only the half-day whose status changed is reported on a re-save
+    save_day(client, school, [(a, 'A', 'P'), (b, 'L', 'A'), (c, 'P', 'P')])
+    assert Notification.objects.count() == 3
+    assert Notification.objects.filter(message=f"L001, F is Absent (PM) on {DAY}").exists()
+
+
+def test_notifications_without_coalescing(school):
+    a, b = _enroll(school, 2)
+    changes = [(a.student, DAY, 'AM', 'A'), (a.student, DAY, 'PM', 'A'), (b.student, DAY, 'AM', 'P')]
+    notes = attendance_notifications(None, changes, '/x', coalesce=False)
+    assert [n.message for n in notes] == [f"L000, F is Absent (AM) on {DAY}", f"L000, F is Absent (PM) on {DAY}"]
+
+
+@override_settings(NOTIFY_COALESCE_SESSIONS=False)
+def test_coalescing_setting_is_read_per_call(school):
+    (a,) = _enroll(school, 1)
+    notes = attendance_notifications(None, [(a.student, DAY, 'AM', 'A'), (a.student, DAY, 'PM', 'A')], '/x')
+    assert len(notes) == 2
+
+
+def test_failed_notification_does_not_break_the_save(school, client, save_day, monkeypatch):
+    (a,) = _enroll(school, 1)
+
+    def broken(user, *args, **kwargs):
+        Notification.objects.create(user=user, message='half written')
+        raise RuntimeError
+
+    monkeypatch.setattr('attendance.views.notify_attendance_changes', broken)
+    resp = save_day(client, school, [(a, 'A', 'A')])
+    assert resp.status_code == 302
+    assert AttendanceSessionRecord.objects.filter(enrollment=a, status='A').count() == 2
+    assert DailyAttendance.objects.get(enrollment=a, date=DAY).absent == 2
+    # The savepoint discards the partial notification write
+    assert not Notification.objects.exists()
@@ -1,247 +1,275 @@
 ﻿from calendar import monthrange
 import calendar as _cal
 from datetime import date, timedelta
-from django.core.cache import cache
-import csv
-from io import TextIOWrapper
+import hashlib
+import tempfile
+import time
+from urllib.parse import urlencode
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
-from django.db.models import Q, Count
-from django.http import HttpResponse
+from django.db.models import Exists, FilteredRelation, OuterRef, Q, Count, Sum
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.utils.http import parse_etags
 from django.contrib.auth import get_user_model
 
+from .caching import (
+    active_school_year, bump_after_commit, bump_sf2_generation, bump_sf2_school_year, cached_panel,
+    cached_sf2_summary, dashboard_panel_key, invalidate_active_school_year,
+)
 from .forms import AttendanceFormSet, SchoolYearForm, StudentForm, PeriodForm
+from .importers import (
+    STUDENT_COLUMNS, apply_non_school_days, import_sf2_attendance, import_students, iter_rows,
+    parse_non_school_days, plan_non_school_days,
+)
+from .notifications import badge_state, mark_read, notifications_page, notify_attendance_changes, unread_count
 from .permissions import has_feature
-from .models import AttendanceSessionRecord, Enrollment, SchoolYear, Student, Section, NonSchoolDay, Notification, Period, AttendancePeriodRecord, SectionAccess
+from .reports import MonthGrid, month_range
+from .rollups import range_totals, refresh_daily_rollup
+from .school_calendar import school_calendar
+from .search import LOOKUP_SIZE, student_page, student_search
+from .records import session_changes, session_rows_from_periods, upsert_period_records, upsert_session_records
+from .models import AttendanceSessionRecord, DailyAttendance, Enrollment, SchoolYear, Student, Section, NonSchoolDay, Period, AttendancePeriodRecord, SectionAccess
 
 # Status codes used across reports and dashboard
 STATUS_CODES = ('P', 'A', 'L', 'E')
 PRESENT_SET = {'P', 'L', 'E'}  # Treat Late and Excused as present
 
 
-def _first_friday_of_sy(sy: SchoolYear):
-    d = sy.start_date
-    while d.weekday() != 4:  # Monday=0 ... Friday=4
-        d += timedelta(days=1)
-    return d
+def _get_active_school_year():
+    return active_school_year()
 
 
-def _school_days(days, sy: SchoolYear):
-    # Weekdays only, excluding declared NonSchoolDay for this school year within the given days
-    weekdays = [d for d in days if d.weekday() < 5]
-    if not weekdays:
-        return weekdays
-    start, end = min(weekdays), max(weekdays)
-    excluded = set(NonSchoolDay.objects.filter(school_year=sy, date__gte=start, date__lte=end).values_list('date', flat=True))
-    return [d for d in weekdays if d not in excluded]
+def _sf2_scope(user, section_id=None):
+    # Cache scope of an SF2 summary: staff by section filter, others per adviser
+    if user.is_staff or user.is_superuser:
+        return f"section:{section_id or 'all'}"
+    return f'user:{user.id}'
 
 
-def _compute_sf2_summary(sy: SchoolYear, year: int, month: int, days, enrollments, by_key):
-    from calendar import monthrange as _mr
-    first_day = date(year, month, 1)
-    last_day = date(year, month, _mr(year, month)[1])
-    range_end = min(last_day, sy.end_date)
+def _user_sections_for_sy(user, sy):
+    if user.is_staff or user.is_superuser:
+        return Section.objects.filter(school_year=sy)
+    return Section.objects.filter(school_year=sy, adviser=user)
 
-    def sex_filter(code):
-        return [e for e in enrollments if e.student.sex == code]
 
-    buckets = {
-        'M': sex_filter('M'),
-        'F': sex_filter('F'),
-        'T': list(enrollments),
-    }
+# Server-side SMS helpers removed (using phone-based SMS only)
 
-    school_days = _school_days(days, sy)
-    n_school_days = len(school_days)
-    first_friday = _first_friday_of_sy(sy)
-
-    def enrol_first_friday(es):
-        return sum(1 for e in es if (e.active and e.date_enrolled <= first_friday))
-
-    def late_enrol(es):
-        return sum(1 for e in es if (first_day <= e.date_enrolled <= last_day and e.date_enrolled > first_friday))
-
-    def registered_eom(es):
-        return sum(1 for e in es if (e.active and e.date_enrolled <= range_end))
-
-    def total_daily_attendance(es):
-        total = 0.0
-        for d in school_days:
-            day_sum = 0.0
-            for e in es:
-                am = by_key.get((e.id, d, 'AM'))
-                pm = by_key.get((e.id, d, 'PM'))
-                amv = 1.0 if (am and am.status in PRESENT_SET) else 0.0
-                pmv = 1.0 if (pm and pm.status in PRESENT_SET) else 0.0
-                day_sum += (amv + pmv) / 2.0
-            total += day_sum
-        return total
-
-    def absent5_consecutive(es):
-        """
-        Counts learners with at least 5 consecutive school-day equivalents of absence.
-        - Per day, absence value = 0.5 for each 'A' session (AM/PM), capped at 1.0 per day.
-        - Any day with absence value == 0 resets the consecutive streak.
-        - A streak reaches 5.0 when cumulative absence across successive days >= 5.0.
-        """
-        cnt = 0
-        for e in es:
-            streak = 0.0
-            flagged = False
-            for d in school_days:
-                am = by_key.get((e.id, d, 'AM'))
-                pm = by_key.get((e.id, d, 'PM'))
-                day_abs = 0.0
-                if am and am.status == 'A':
-                    day_abs += 0.5
-                if pm and pm.status == 'A':
-                    day_abs += 0.5
-                if day_abs > 1.0:
-                    day_abs = 1.0
-                if day_abs == 0.0:
-                    streak = 0.0
-                else:
-                    streak += day_abs
-                    if streak >= 5.0:
-                        flagged = True
-                        break
-            if flagged:
-                cnt += 1
-        return cnt
-
-    out = {
-        'school_days': n_school_days,
-        'first_friday': first_friday,
-        'by': {},
-    }
 
-    for key, es in buckets.items():
-        e1 = enrol_first_friday(es)
-        late = late_enrol(es)
-        reg = registered_eom(es)
-        tda = total_daily_attendance(es)
-        ada = (tda / n_school_days) if n_school_days else 0.0
-        pct_enrol = (reg / e1 * 100.0) if e1 else 0.0
-        pct_att = (ada / reg * 100.0) if reg else 0.0
-        ab5 = absent5_consecutive(es)
-        out['by'][key] = {
-            'enrol_first_friday': e1,
-            'late_enrol': late,
-            'registered_eom': reg,
-            'pct_enrol_eom': round(pct_enrol, 2),
-            'ada': round(ada, 2),
-            'pct_attendance': round(pct_att, 2),
-            'absent5': ab5,
-        }
+def _next_birthday(key, year):
+    month, day = divmod(key, 100)
+    try:
+        return date(year, month, day)
+    except ValueError:
+        # Feb 29 birthdays fall on Mar 1 in common years
+        return date(year, 3, 1)
+
+
+def _upcoming_birthdays(enrollments_qs, start, end):
+    """(student, next birthday) pairs for birthdays from ``start`` to ``end`` inclusive, soonest first."""
+    lo = Student.birthday_key_for(start)
+    hi = Student.birthday_key_for(end)
+    if lo == 301 and not _cal.isleap(start.year):
+        lo = 229
+    if start.year == end.year:
+        window = Q(student__birthday_key__gte=lo, student__birthday_key__lte=hi)
+    else:
+        # Window crosses New Year
+        window = Q(student__birthday_key__gte=lo) | Q(student__birthday_key__lte=hi)
+    out = []
+    for enr in enrollments_qs.filter(window).select_related('student'):
+        key = enr.student.birthday_key
+        year = start.year if key >= lo else end.year
+        out.append((enr.student, _next_birthday(key, year)))
+    out.sort(key=lambda x: x[1])
     return out
 
 
-def _get_active_school_year():
-    return SchoolYear.objects.filter(is_active=True).order_by('-start_date').first()
+def _dashboard_scope(user, sy):
+    """Active enrollments and sections the dashboard covers: all for staff, else advised or officer sections."""
+    enrollments_qs = Enrollment.objects.filter(school_year=sy, active=True)
+    sections_qs = Section.objects.filter(school_year=sy)
+    if not (user.is_staff or user.is_superuser):
+        officer_section_ids = list(SectionAccess.objects.filter(user=user, section__school_year=sy).values_list('section_id', flat=True))
+        enrollments_qs = enrollments_qs.filter(Q(section__adviser=user) | Q(section_id__in=officer_section_ids))
+        sections_qs = sections_qs.filter(Q(adviser=user) | Q(id__in=officer_section_ids))
+    return enrollments_qs, sections_qs
 
 
-def _user_sections_for_sy(user, sy):
+def _dashboard_date(request):
+    date_param = request.GET.get('date')
+    try:
+        if date_param:
+            y, m, d = [int(x) for x in date_param.split('-')]
+            return date(y, m, d)
+    except Exception:
+        pass
+    return date.today()
+
+
+def _section_breakdown(enrollments_qs, view_date):
+    """Per-section enrolled, recorded sessions, progress and A/L/E counts for one day, in one GROUP BY."""
+    rows = (
+        enrollments_qs
+        .annotate(day=FilteredRelation('attendance_sessions', condition=Q(attendance_sessions__date=view_date)))
+        .values('section_id', 'section__name')
+        .annotate(
+            enrolled=Count('id', distinct=True),
+            recorded=Count('day'),
+            absent=Count('day', filter=Q(day__status='A')),
+            late=Count('day', filter=Q(day__status='L')),
+            excused=Count('day', filter=Q(day__status='E')),
+        )
+        .order_by('section__name')
+    )
+    out = []
+    for row in rows:
+        total = row['enrolled'] * 2
+        out.append({
+            **row,
+            'name': row['section__name'] or 'Unassigned',
+            'total_sessions': total,
+            'progress_pct': int(row['recorded'] * 100 / total) if total else 0,
+            'absence_pct': round(row['absent'] * 100 / row['recorded'], 1) if row['recorded'] else 0,
+            'is_complete': bool(total) and row['recorded'] >= total,
+        })
+    # Unassigned learners last
+    out.sort(key=lambda r: r['section_id'] is None)
+    return out
+
+
+def _panel_scope(user, sections):
+    # Panels depend only on the visible sections, so users sharing them share entries
     if user.is_staff or user.is_superuser:
-        return Section.objects.filter(school_year=sy)
-    return Section.objects.filter(school_year=sy, adviser=user)
+        return 'all'
+    ids = ','.join(str(pk) for pk in sorted(s.pk for s in sections))
+    return 'sections:' + hashlib.sha1(ids.encode()).hexdigest()[:16]
 
 
-# Server-side SMS helpers removed (using phone-based SMS only)
+def _top_absent_late(enrollments_qs, start, end):
+    """Top five learners by absent and by late half-days between ``start`` and ``end``."""
+    top_absent = []
+    top_late = []
+    agg = (
+        DailyAttendance.objects.filter(
+            enrollment__in=enrollments_qs,
+            date__gte=start,
+            date__lte=end,
+        )
+        .values(
+            'enrollment__student__id',
+            'enrollment__student__last_name',
+            'enrollment__student__first_name',
+        )
+        .annotate(
+            abs_sess=Sum('absent'),
+            late_sess=Sum('late'),
+        )
+        .order_by()
+    )
+    for row in agg:
+        name = f"{row['enrollment__student__last_name']}, {row['enrollment__student__first_name']}"
+        sid = row['enrollment__student__id']
+        a = int(row.get('abs_sess') or 0)
+        l = int(row.get('late_sess') or 0)
+        if a > 0:
+            top_absent.append({
+                'student_id': sid,
+                'student_name': name,
+                'abs_sessions': a,
+                'days_absent_equiv': round(a / 2.0, 1),
+            })
+        if l > 0:
+            top_late.append({
+                'student_id': sid,
+                'student_name': name,
+                'late_sessions': l,
+            })
+    # Sort and keep top 5 each
+    top_absent.sort(key=lambda x: (x['abs_sessions'], x['student_name']), reverse=True)
+    top_late.sort(key=lambda x: (x['late_sessions'], x['student_name']), reverse=True)
+    return top_absent[:5], top_late[:5]
 
 
 @login_required
 def dashboard(request):
     sy = _get_active_school_year()
-    date_param = request.GET.get('date')
-    try:
-        if date_param:
-            y, m, d = [int(x) for x in date_param.split('-')]
-            view_date = date(y, m, d)
-        else:
-            view_date = date.today()
-    except Exception:
-        view_date = date.today()
+    view_date = _dashboard_date(request)
     upcoming_window = view_date + timedelta(days=14)
 
     upcoming_birthdays = []
     summary = {}
     top_absent = []
     top_late = []
+    panel_cache = {}
     if sy:
-        # Gather birthdays falling within the next 14 days using a days-until calculation
-        enrollments_qs = Enrollment.objects.filter(school_year=sy, active=True).select_related('student')
-        # Scope by adviser or officer sections if not staff
-        is_staffish = (request.user.is_staff or request.user.is_superuser)
-        if not is_staffish:
-            officer_section_ids = list(SectionAccess.objects.filter(user=request.user, section__school_year=sy).values_list('section_id', flat=True))
-            enrollments_qs = enrollments_qs.filter(Q(section__adviser=request.user) | Q(section_id__in=officer_section_ids))
-        for enr in enrollments_qs:
-            b = enr.student.birthdate
-            if not b:
-                continue
-            # Compute the next birthday occurrence from the view date
-            next_bday = b.replace(year=view_date.year)
-            if next_bday < view_date:
-                next_bday = next_bday.replace(year=view_date.year + 1)
-            days_until = (next_bday - view_date).days
-            if 0 <= days_until <= 14:
-                upcoming_birthdays.append((enr.student, next_bday))
-
-        upcoming_birthdays.sort(key=lambda x: x[1])
+        enrollments_qs, sections_qs = _dashboard_scope(request.user, sy)
+        sections = list(sections_qs)
+        scope = _panel_scope(request.user, sections)
+        # Birthdays falling within the next 14 days, matched on the indexed month/day key
+        upcoming_birthdays, panel_cache['birthdays'] = cached_panel(
+            dashboard_panel_key('birthdays', sy.id, view_date.isoformat(), scope),
+            lambda: _upcoming_birthdays(enrollments_qs, view_date, upcoming_window),
+        )
 
         # Summary cards
         total_enrolled = enrollments_qs.count()
-        sections_qs = Section.objects.filter(school_year=sy)
-        if not is_staffish:
-            sections_qs = sections_qs.filter(Q(adviser=request.user) | Q(id__in=officer_section_ids))
-        section_count = sections_qs.count()
-
-        # Attendance progress for selected day (session-based)
-        recs_today = AttendanceSessionRecord.objects.filter(
-            enrollment__in=enrollments_qs, date=view_date
-        ).select_related('enrollment__student')
-        recorded_sessions = recs_today.count()
-        total_sessions = total_enrolled * 2
-        remaining_sessions = max(0, total_sessions - recorded_sessions)
-        # Status breakdown across sessions
+        section_count = len(sections)
+
+        # Attendance progress for selected day (session-based): one grouped count
+        recs_today = AttendanceSessionRecord.objects.filter(enrollment__in=enrollments_qs, date=view_date)
         counts = {k: 0 for k in STATUS_CODES}
         am_counts = {k: 0 for k in STATUS_CODES}
         pm_counts = {k: 0 for k in STATUS_CODES}
+        recorded_sessions = 0
+        for row in recs_today.values('session', 'status').annotate(n=Count('id')).order_by():
+            n, status = row['n'], row['status']
+            recorded_sessions += n
+            counts[status] = counts.get(status, 0) + n
+            by_session = am_counts if row['session'] == 'AM' else pm_counts
+            by_session[status] = by_session.get(status, 0) + n
+        total_sessions = total_enrolled * 2
+        remaining_sessions = max(0, total_sessions - recorded_sessions)
+
+        # Names and phones only for the exceptions
         am_lists = {k: [] for k in ('A','L','E')}
         pm_lists = {k: [] for k in ('A','L','E')}
-        existing = set()
-        for r in recs_today:
-            counts[r.status] = counts.get(r.status, 0) + 1
-            existing.add((r.enrollment_id, r.session))
-            if r.session == 'AM':
-                am_counts[r.status] = am_counts.get(r.status, 0) + 1
-                if r.status in am_lists:
-                    s = r.enrollment.student
-                    am_lists[r.status].append({
-                        'name': f"{s.last_name}, {s.first_name}",
-                        'phone': s.guardian_phone or '',
-                    })
-            elif r.session == 'PM':
-                pm_counts[r.status] = pm_counts.get(r.status, 0) + 1
-                if r.status in pm_lists:
-                    s = r.enrollment.student
-                    pm_lists[r.status].append({
-                        'name': f"{s.last_name}, {s.first_name}",
-                        'phone': s.guardian_phone or '',
-                    })
-
-        # Missing records by session
+        exceptions = (
+            recs_today.filter(status__in=('A', 'L', 'E'))
+            .order_by('enrollment__student__last_name', 'enrollment__student__first_name')
+            .values_list('session', 'status', 'enrollment__student__last_name',
+                         'enrollment__student__first_name', 'enrollment__student__guardian_phone')
+        )
+        for session, status, last, first, phone in exceptions:
+            (am_lists if session == 'AM' else pm_lists)[status].append({
+                'name': f"{last}, {first}",
+                'phone': phone or '',
+            })
+
+        # Missing records by session: learners without a record, via NOT EXISTS
         missing_lists = {'AM': [], 'PM': []}
-        for e in enrollments_qs.select_related('student'):
-            name = f"{e.student.last_name}, {e.student.first_name}"
-            if (e.id, 'AM') not in existing:
-                missing_lists['AM'].append(name)
-            if (e.id, 'PM') not in existing:
-                missing_lists['PM'].append(name)
+        if recorded_sessions < total_sessions:
+            day_recs = AttendanceSessionRecord.objects.filter(enrollment=OuterRef('pk'), date=view_date)
+            missing = (
+                enrollments_qs
+                .annotate(
+                    has_am=Exists(day_recs.filter(session='AM')),
+                    has_pm=Exists(day_recs.filter(session='PM')),
+                )
+                .filter(Q(has_am=False) | Q(has_pm=False))
+                .order_by('student__last_name', 'student__first_name')
+                .values_list('student__last_name', 'student__first_name', 'has_am', 'has_pm')
+            )
+            for last, first, has_am, has_pm in missing:
+                name = f"{last}, {first}"
+                if not has_am:
+                    missing_lists['AM'].append(name)
+                if not has_pm:
+                    missing_lists['PM'].append(name)
 
         summary = {
             'total_enrolled': total_enrolled,
@@ -266,47 +294,10 @@ def dashboard(request):
         last_day = monthrange(view_date.year, view_date.month)[1]
         month_end = date(view_date.year, view_date.month, last_day)
         me = min(sy.end_date, month_end)
-        agg = (
-            AttendanceSessionRecord.objects.filter(
-                enrollment__in=enrollments_qs,
-                date__gte=ms,
-                date__lte=me,
-            )
-            .values(
-                'enrollment__student__id',
-                'enrollment__student__last_name',
-                'enrollment__student__first_name',
-            )
-            .annotate(
-                abs_sess=Count('id', filter=Q(status='A')),
-                late_sess=Count('id', filter=Q(status='L')),
-            )
+        (top_absent, top_late), panel_cache['top'] = cached_panel(
+            dashboard_panel_key('top', sy.id, f"{ms}:{me}", scope, month=(view_date.year, view_date.month)),
+            lambda: _top_absent_late(enrollments_qs, ms, me),
         )
-
-        for row in agg:
-            name = f"{row['enrollment__student__last_name']}, {row['enrollment__student__first_name']}"
-            sid = row['enrollment__student__id']
-            a = int(row.get('abs_sess') or 0)
-            l = int(row.get('late_sess') or 0)
-            if a > 0:
-                top_absent.append({
-                    'student_id': sid,
-                    'student_name': name,
-                    'abs_sessions': a,
-                    'days_absent_equiv': round(a / 2.0, 1),
-                })
-            if l > 0:
-                top_late.append({
-                    'student_id': sid,
-                    'student_name': name,
-                    'late_sessions': l,
-                })
-
-        # Sort and keep top 5 each
-        top_absent.sort(key=lambda x: (x['abs_sessions'], x['student_name']), reverse=True)
-        top_late.sort(key=lambda x: (x['late_sessions'], x['student_name']), reverse=True)
-        top_absent = top_absent[:5]
-        top_late = top_late[:5]
         top_period_label = ms.strftime('%b %Y')
         # Compute month navigation enablement
         cur_month_start = date(view_date.year, view_date.month, 1)
@@ -321,14 +312,33 @@ def dashboard(request):
         'view_date': view_date,
         'upcoming_birthdays': upcoming_birthdays,
         'summary': summary,
-        'sections': list(sections_qs) if sy else [],
+        'sections': sections if sy else [],
         'top_absent': top_absent,
         'top_late': top_late,
         'top_period_label': top_period_label if sy else None,
         'can_prev_month': can_prev_month if sy else False,
         'can_next_month': can_next_month if sy else False,
     }
-    return render(request, 'attendance/dashboard.html', context)
+    resp = render(request, 'attendance/dashboard.html', context)
+    # Which panels came from the shared cache, e.g. "birthdays=hit, top=miss"
+    resp['X-Panel-Cache'] = ', '.join(f"{name}={'hit' if hit else 'miss'}" for name, hit in sorted(panel_cache.items()))
+    return resp
+
+
+@login_required
+def dashboard_sections(request):
+    """Per-section progress table for the dashboard, loaded as a fragment after the page."""
+    sy = _get_active_school_year()
+    view_date = _dashboard_date(request)
+    rows = []
+    if sy:
+        enrollments_qs, _ = _dashboard_scope(request.user, sy)
+        rows = _section_breakdown(enrollments_qs, view_date)
+    return render(request, 'attendance/_dashboard_sections.html', {
+        'active_sy': sy,
+        'view_date': view_date,
+        'rows': rows,
+    })
 
 
 @login_required
@@ -337,18 +347,91 @@ def student_list(request):
         messages.warning(request, 'You are not allowed to view Students.')
         return redirect('attendance:dashboard')
     show_archived = request.GET.get('archived') == '1'
+    q = (request.GET.get('q') or '').strip()
     qs = Student.objects.all()
     if not show_archived:
         qs = qs.filter(is_active=True)
-    students = qs
+    if q:
+        qs = qs.filter(student_search(q))
+    cursor = request.GET.get('after')
+    students, next_cursor = student_page(qs, cursor)
     try:
-        active_sy = SchoolYear.objects.filter(is_active=True).first()
+        active_sy = active_school_year()
     except Exception:
         active_sy = None
+    params = {'q': q} if q else {}
+    if show_archived:
+        params['archived'] = '1'
     return render(request, 'attendance/students_list.html', {
         'students': students,
         'show_archived': show_archived,
         'active_sy': active_sy,
+        'q': q,
+        'is_first_page': not cursor,
+        'first_page_query': urlencode(params),
+        'next_page_query': urlencode({**params, 'after': next_cursor}) if next_cursor else '',
+    })
+
+
+@login_required
+def student_import(request):
+    if not has_feature(request.user, 'manage_students'):
+        messages.warning(request, 'You are not allowed to import Students.')
+        return redirect('attendance:dashboard')
+    schoolyears = SchoolYear.objects.all()
+    if request.method == 'POST':
+        file = request.FILES.get('file')
+        if not file or not file.name.lower().endswith(('.csv', '.xlsx')):
+            messages.error(request, 'Please choose a CSV or XLSX file to upload.')
+            return redirect('attendance:student_import')
+        sy = None
+        if request.POST.get('schoolyear_id'):
+            sy = get_object_or_404(SchoolYear, pk=request.POST.get('schoolyear_id'))
+            if not has_feature(request.user, 'enroll_students'):
+                messages.error(request, 'You are not allowed to manage enrollment.')
+                return redirect('attendance:student_import')
+        try:
+            result = import_students(iter_rows(file, file.name), school_year=sy, enroll=sy is not None)
+        except Exception:
+            messages.error(request, 'Could not read the file. Check that it is a valid CSV (UTF-8) or XLSX file with a header row.')
+            return redirect('attendance:student_import')
+        summary = (
+            f"Imported: created {result['created']}, already on file {result['existing']}, skipped {result['skipped']}."
+        )
+        if sy:
+            summary += f" Enrolled {result['enrolled']} in {sy.name} ({result['already_enrolled']} already enrolled"
+            summary += f", {result['assigned']} moved to a new section)."
+        messages.success(request, summary)
+        if result['unknown_section']:
+            messages.warning(request, f"{result['unknown_section']} row(s) named a section that does not exist; enrolled without a section.")
+        for line, error in result['errors']:
+            messages.warning(request, f'Row {line}: {error}')
+        return redirect('attendance:student_list')
+    return render(request, 'attendance/student_import.html', {
+        'schoolyears': schoolyears,
+        'active_sy': _get_active_school_year(),
+        'columns': STUDENT_COLUMNS,
+    })
+
+
+@login_required
+def student_lookup(request):
+    """Type-ahead JSON: learners whose name or LRN starts with ``q``, a keyset page at a time."""
+    if not (has_feature(request.user, 'manage_students') or has_feature(request.user, 'enroll_students')):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    q = (request.GET.get('q') or '').strip()
+    qs = Student.objects.filter(is_active=True)
+    if q:
+        qs = qs.filter(student_search(q))
+    items, next_cursor = student_page(
+        qs.only('id', 'lrn', 'last_name', 'first_name', 'middle_name'), request.GET.get('after'), size=LOOKUP_SIZE,
+    )
+    return JsonResponse({
+        'results': [
+            {'id': s.id, 'lrn': s.lrn or '', 'name': f"{s.last_name}, {s.first_name}", 'middle_name': s.middle_name}
+            for s in items
+        ],
+        'next': next_cursor,
     })
 
 
@@ -503,7 +586,7 @@ def student_history(request, pk: int):
             'sev': severity,
         })
 
-    non_school_days = set(NonSchoolDay.objects.filter(school_year=sy, date__gte=range_start, date__lte=range_end).values_list('date', flat=True))
+    non_school_days = {n.date for n in school_calendar(sy).non_school_days_between(range_start, range_end)}
     # Build calendar grid (Mon-Sun)
     month_first = date(year, month, 1)
     last_day = monthrange(year, month)[1]
@@ -555,6 +638,8 @@ def schoolyear_create(request):
             sy = form.save()
             if sy.is_active:
                 SchoolYear.objects.exclude(pk=sy.pk).update(is_active=False)
+                # Bulk update sends no signals; bump again once the switch is visible
+                bump_after_commit(invalidate_active_school_year)
             messages.success(request, f'School Year {sy.name} created.')
             return redirect('attendance:schoolyear_list')
     else:
@@ -574,6 +659,8 @@ def schoolyear_edit(request, pk: int):
             sy = form.save()
             if sy.is_active:
                 SchoolYear.objects.exclude(pk=sy.pk).update(is_active=False)
+                # Bulk update sends no signals; bump again once the switch is visible
+                bump_after_commit(invalidate_active_school_year)
             messages.success(request, f'School Year {sy.name} updated.')
             return redirect('attendance:schoolyear_list')
     else:
@@ -588,14 +675,30 @@ def enroll_students(request, schoolyear_id: int):
         return redirect('attendance:dashboard')
     sy = get_object_or_404(SchoolYear, pk=schoolyear_id)
     if request.method == 'POST':
-        student_ids = request.POST.getlist('student_ids')
-        created = 0
-        for sid in student_ids:
-            student = get_object_or_404(Student, pk=sid)
-            _, was_created = Enrollment.objects.get_or_create(student=student, school_year=sy)
-            if was_created:
-                created += 1
-        messages.success(request, f'Enrolled {created} new student(s) to {sy.name}.')
+        requested = {int(sid) for sid in request.POST.getlist('student_ids') if sid.isdigit()}
+        # One query validates every id
+        valid_ids = set(Student.objects.filter(pk__in=requested).values_list('pk', flat=True))
+        enrolled = Enrollment.objects.filter(school_year=sy, student_id__in=valid_ids)
+        already = set(enrolled.values_list('student_id', flat=True))
+        with transaction.atomic():
+            Enrollment.objects.bulk_create(
+                [Enrollment(student_id=sid, school_year=sy) for sid in valid_ids - already],
+                ignore_conflicts=True,
+                batch_size=1000,
+            )
+            # ignore_conflicts hides which rows were inserted, so count what is there now
+            created = enrolled.count() - len(already)
+        # bulk_create sends no signals
+        try:
+            bump_sf2_school_year(sy.id)
+        except Exception:
+            pass
+        msg = f'Enrolled {created} new student(s) to {sy.name}.'
+        if len(valid_ids) > created:
+            msg += f' {len(valid_ids) - created} already enrolled.'
+        messages.success(request, msg)
+        if len(requested) > len(valid_ids):
+            messages.warning(request, f'Skipped {len(requested) - len(valid_ids)} unknown student id(s).')
         # Go straight to taking attendance for convenience
         return redirect('attendance:take_attendance', schoolyear_id=sy.id)
 
@@ -686,58 +789,41 @@ def take_attendance(request, schoolyear_id: int):
     if request.method == 'POST' and not has_periods:
         formset = AttendanceFormSet(request.POST, initial=initial, prefix='att')
         if formset.is_valid():
+            allowed_ids = {e.id for e in enrollments}
+            rows = []
+            for form in formset:
+                eid = form.cleaned_data['enrollment_id']
+                # Ignore posted rows outside the learners this user may mark
+                if eid not in allowed_ids:
+                    continue
+                remarks = form.cleaned_data.get('remarks', '')
+                rows.append((eid, target_date, 'AM', form.cleaned_data['status_am'], remarks))
+                rows.append((eid, target_date, 'PM', form.cleaned_data['status_pm'], remarks))
+            # Only rows that differ from what is stored are written
+            changed = session_changes(existing, rows)
             with transaction.atomic():
-                for form in formset:
-                    eid = form.cleaned_data['enrollment_id']
-                    status_am = form.cleaned_data['status_am']
-                    status_pm = form.cleaned_data['status_pm']
-                    remarks = form.cleaned_data.get('remarks', '')
-                    # Keep previous to detect changes
-                    prev_am = existing.get((eid, 'AM'))
-                    prev_pm = existing.get((eid, 'PM'))
-                    am_obj, _ = AttendanceSessionRecord.objects.update_or_create(
-                        enrollment_id=eid, date=target_date, session='AM',
-                        defaults={'status': status_am, 'remarks': remarks}
-                    )
-                    pm_obj, _ = AttendanceSessionRecord.objects.update_or_create(
-                        enrollment_id=eid, date=target_date, session='PM',
-                        defaults={'status': status_pm, 'remarks': remarks}
-                    )
-                    # Create in-app notifications for non-Present statuses when new or changed
-                    try:
-                        e = next((x for x in enrollments if x.id == eid), None)
-                        student = e.student if e else None
-                        if student:
-                            def status_word(code):
-                                return {'P':'Present','A':'Absent','L':'Late','E':'Excused'}.get(code, code)
-                            base_url = f"{reverse('attendance:take_attendance', args=[schoolyear_id])}?date={target_date}"
-                            if status_am in {'A','L','E'} and ((not prev_am) or prev_am.status != status_am):
-                                Notification.objects.create(
-                                    user=request.user,
-                                    message=f"{student.last_name}, {student.first_name} is {status_word(status_am)} (AM) on {target_date}",
-                                    url=base_url,
-                                )
-                            if status_pm in {'A','L','E'} and ((not prev_pm) or prev_pm.status != status_pm):
-                                Notification.objects.create(
-                                    user=request.user,
-                                    message=f"{student.last_name}, {student.first_name} is {status_word(status_pm)} (PM) on {target_date}",
-                                    url=base_url,
-                                )
-                    except Exception:
-                        pass
-            # Invalidate cached monthly summaries for this SY/month
+                upsert_session_records(changed)
+                # Create in-app notifications for non-Present statuses when new or changed.
+                # The savepoint lets a failed insert roll back without breaking the save.
+                try:
+                    by_id = {e.id: e for e in enrollments}
+                    with transaction.atomic():
+                        notify_attendance_changes(
+                            request.user,
+                            [
+                                (by_id[rec.enrollment_id].student, target_date, rec.session, rec.status)
+                                for rec in changed
+                                if rec.status != getattr(existing.get((rec.enrollment_id, rec.session)), 'status', None)
+                            ],
+                            f"{reverse('attendance:take_attendance', args=[schoolyear_id])}?date={target_date}",
+                        )
+                except Exception:
+                    pass
+                refresh_daily_rollup({rec.enrollment_id for rec in changed}, [target_date])
+            # Invalidate cached monthly summaries for every scope of this SY/month
             try:
-                year = target_date.year
-                month = target_date.month
-                # 'all' scope (staff views)
-                cache.delete(f"sf2:{sy.id}:{year}:{month}:all")
-                # Adviser scopes for impacted sections
-                adviser_ids = set(e.section.adviser_id for e in enrollments if e.section_id)
-                # Include current user in case they are an adviser
-                adviser_ids.add(getattr(request.user, 'id', None))
-                for aid in adviser_ids:
-                    if aid:
-                        cache.delete(f"sf2:{sy.id}:{year}:{month}:user:{aid}")
+                if changed:
+                    bump_sf2_generation(sy.id, target_date.year, target_date.month)
             except Exception:
                 # Cache is best-effort; ignore failures
                 pass
@@ -745,39 +831,26 @@ def take_attendance(request, schoolyear_id: int):
             # Redirect to dashboard and keep the selected date context
             return redirect(f"{reverse('attendance:dashboard')}?date={target_date}")
     elif request.method == 'POST' and has_periods:
-        from django.db import transaction
+        # Period rows and the AM/PM roll-up are built from the POST values in memory
+        period_rows = []
+        period_statuses = {}
+        for e in enrollments:
+            halves = period_statuses.setdefault((e.id, target_date), {'AM': [], 'PM': []})
+            for p in periods_all:
+                status = request.POST.get(f"p_{e.id}_{p.id}_status") or 'P'
+                time_in = request.POST.get(f"ti_{e.id}_{p.id}") or None
+                period_rows.append(AttendancePeriodRecord(
+                    enrollment_id=e.id, date=target_date, period_id=p.id, status=status, time_in=time_in,
+                ))
+                halves[p.half].append(status)
         with transaction.atomic():
-            for e in enrollments:
-                for p in periods_all:
-                    status = request.POST.get(f"p_{e.id}_{p.id}_status") or 'P'
-                    time_in = request.POST.get(f"ti_{e.id}_{p.id}") or None
-                    AttendancePeriodRecord.objects.update_or_create(
-                        enrollment=e, date=target_date, period=p,
-                        defaults={'status': status, 'time_in': time_in or None}
-                    )
-                def agg(half):
-                    qs = AttendancePeriodRecord.objects.filter(enrollment=e, date=target_date, period__half=half)
-                    n = qs.count()
-                    if n == 0:
-                        return 'P'
-                    absent = sum(1 for r in qs if r.status == 'A')
-                    late_any = any(r.status == 'L' for r in qs)
-                    exc_any = any(r.status == 'E' for r in qs)
-                    if absent * 2 >= n:
-                        return 'A'
-                    if late_any:
-                        return 'L'
-                    if exc_any:
-                        return 'E'
-                    return 'P'
-                am_status = agg('AM')
-                pm_status = agg('PM')
-                AttendanceSessionRecord.objects.update_or_create(
-                    enrollment=e, date=target_date, session='AM', defaults={'status': am_status}
-                )
-                AttendanceSessionRecord.objects.update_or_create(
-                    enrollment=e, date=target_date, session='PM', defaults={'status': pm_status}
-                )
+            upsert_period_records(period_rows)
+            upsert_session_records(session_rows_from_periods(period_statuses), update_fields=('status',))
+            refresh_daily_rollup([e.id for e in enrollments], [target_date])
+        try:
+            bump_sf2_generation(sy.id, target_date.year, target_date.month)
+        except Exception:
+            pass
         messages.success(request, f"Attendance successfully saved for {target_date.strftime('%B %d, %Y') }.")
         nav = request.POST.get('nav')
         if nav == 'prev':
@@ -844,22 +917,65 @@ def edit_period(request, schoolyear_id: int, pk: int):
 
 @login_required
 def notifications(request):
-    qs = Notification.objects.filter(user=request.user).order_by('-created')
-    items = list(qs[:100])
+    items, next_cursor, cursor = notifications_page(request.user, request.GET.get('after'))
     return render(request, 'attendance/notifications.html', {
         'notifications': items,
-        'unread_count': qs.filter(is_read=False).count(),
+        'unread_count': unread_count(request.user),
+        'next_cursor': next_cursor,
+        'cursor': cursor,
+        'is_first_page': cursor is None,
     })
 
 
+@login_required
+def notifications_badge(request):
+    """Unread count and newest ids as JSON, for polling without rendering base.html.
+
+    Honours If-None-Match with a 304. ``?wait=N`` holds an unchanged response
+    for up to N seconds (capped by NOTIFY_POLL_MAX_WAIT), re-checking once per
+    NOTIFY_POLL_INTERVAL, and answers as soon as the badge changes.
+    """
+    state, etag = badge_state(request.user)
+    known = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in known:
+        try:
+            wait = min(float(request.GET.get('wait') or 0), getattr(settings, 'NOTIFY_POLL_MAX_WAIT', 25))
+        except ValueError:
+            wait = 0
+        interval = getattr(settings, 'NOTIFY_POLL_INTERVAL', 2)
+        deadline = time.monotonic() + wait
+        while etag in known and time.monotonic() < deadline:
+            time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            state, etag = badge_state(request.user)
+    if etag in known:
+        resp = HttpResponse(status=304)
+    else:
+        resp = JsonResponse(state)
+    resp['ETag'] = etag
+    resp['Cache-Control'] = 'private, no-cache'
+    return resp
+
+
 @login_required
 def notifications_mark_all_read(request):
     if request.method == 'POST':
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        mark_read(request.user)
         messages.success(request, 'All notifications marked as read.')
     return redirect('attendance:notifications')
 
 
+@login_required
+def notifications_mark_read(request):
+    if request.method == 'POST':
+        ids = [int(x) for x in request.POST.getlist('ids') if x.isdigit()]
+        n = mark_read(request.user, ids) if ids else 0
+        messages.success(request, f'{n} notification(s) marked as read.')
+        after = request.POST.get('after')
+        if after:
+            return redirect(f"{reverse('attendance:notifications')}?{urlencode({'after': after})}")
+    return redirect('attendance:notifications')
+
+
 @login_required
 def access_users(request):
     # Only admins/advisers (manage_schoolyears) can manage access; superuser ok
@@ -975,6 +1091,11 @@ def bulk_assign_section(request, schoolyear_id: int):
         if not (request.user.is_staff or request.user.is_superuser):
             updated = updated.filter(Q(section__isnull=True) | Q(section__adviser=request.user))
         count = updated.update(section=section)
+        # Learners moved between section/adviser scopes; update() sends no signals
+        try:
+            bump_sf2_school_year(sy.id)
+        except Exception:
+            pass
         messages.success(request, f'Assigned section "{section.name}" to {count} student(s).')
         return redirect('attendance:take_attendance', schoolyear_id=sy.id)
 
@@ -1033,18 +1154,15 @@ def report_form(request):
     except (TypeError, ValueError):
         sel_section_id = None
 
-    # Build preview data (days, rows) with the same logic as report_preview
+    # Build preview data (days, rows) with the same month grid as report_preview
     days = []
-    rows = []
+    rows_m, rows_f = [], []
+    mpd, fpd, cpd = [], [], []
     non_school_days = []
     summary = None
     if sel_sy:
         try:
-            first_day = date(sel_year, sel_month, 1)
-            from calendar import monthrange as _mr
-            last_day = date(sel_year, sel_month, _mr(sel_year, sel_month)[1])
-            range_start = max(first_day, sel_sy.start_date)
-            range_end = min(last_day, sel_sy.end_date)
+            range_start, range_end = month_range(sel_sy, sel_year, sel_month)
             if range_start <= range_end:
                 days = [range_start + timedelta(n) for n in range((range_end - range_start).days + 1)]
 
@@ -1057,66 +1175,14 @@ def report_form(request):
                 enrollments = list(enroll_qs)
 
                 if enrollments:
-                    recs = AttendanceSessionRecord.objects.filter(
-                        enrollment__in=enrollments,
-                        date__gte=range_start,
-                        date__lte=range_end,
-                    )
-                    by_key = {(r.enrollment_id, r.date, r.session): r for r in recs}
-
-                    rows_m, rows_f = [], []
-                    mpd = [0.0 for _ in days]
-                    fpd = [0.0 for _ in days]
-
-                    for e in enrollments:
-                        s = e.student
-                        day_marks = []
-                        day_pairs = []
-                        counts = {'P': 0.0, 'A': 0.0, 'L': 0.0, 'E': 0.0}
-                        for idx, d in enumerate(days):
-                            am = by_key.get((e.id, d, 'AM'))
-                            pm = by_key.get((e.id, d, 'PM'))
-                            ams = am.status if am else ''
-                            pms = pm.status if pm else ''
-                            if ams:
-                                counts[ams] = counts.get(ams, 0.0) + 0.5
-                                if ams in PRESENT_SET and ams != 'P':
-                                    counts['P'] += 0.5
-                            if pms:
-                                counts[pms] = counts.get(pms, 0.0) + 0.5
-                                if pms in PRESENT_SET and pms != 'P':
-                                    counts['P'] += 0.5
-                            cell = f"{ams}/{pms}" if (ams or pms) else ''
-                            day_marks.append(cell)
-                            day_pairs.append({'day': d, 'mark': cell})
-                            p_inc = (0.5 if (ams in PRESENT_SET) else 0.0) + (0.5 if (pms in PRESENT_SET) else 0.0)
-                            if s.sex == 'M':
-                                mpd[idx] += p_inc
-                            else:
-                                fpd[idx] += p_inc
-                        row = {
-                            'lrn': s.lrn or '',
-                            'name': f"{s.last_name}, {s.first_name}",
-                            'sex': s.sex,
-                            'birthdate': s.birthdate,
-                            'day_marks': day_marks,
-                            'day_pairs': day_pairs,
-                            'counts': counts,
-                        }
-                        (rows_m if s.sex == 'M' else rows_f).append(row)
+                    grid = MonthGrid(sel_sy, sel_year, sel_month, enrollments)
+                    rows_m, rows_f = grid.rows_m, grid.rows_f
+                    mpd, fpd, cpd = grid.mpd, grid.fpd, grid.cpd
                     # Compute monthly summary for preview (cached)
-                    if (request.user.is_staff or request.user.is_superuser):
-                        scope = f"section:{sel_section_id or 'all'}"
-                    else:
-                        scope = f'user:{request.user.id}'
-                    cache_key = f"sf2:{sel_sy.id}:{sel_year}:{sel_month}:{scope}"
-                    summary = cache.get(cache_key)
-                    if summary is None:
-                        summary = _compute_sf2_summary(sel_sy, sel_year, sel_month, days, enrollments, by_key)
-                        cache.set(cache_key, summary, timeout=300)
-                    non_school_days = list(NonSchoolDay.objects.filter(school_year=sel_sy, date__gte=range_start, date__lte=range_end).order_by('date'))
-                    total_cols = len(days) + 8
-                    cpd = [ (mpd[i] + fpd[i]) for i in range(len(days)) ]
+                    summary = cached_sf2_summary(
+                        sel_sy.id, sel_year, sel_month, _sf2_scope(request.user, sel_section_id), grid.summary,
+                    )
+                    non_school_days = grid.non_school_days
             else:
                 # Selected month outside the school year range â€” show message and empty preview
                 messages.error(request, 'Selected month is outside the school year range.')
@@ -1136,13 +1202,13 @@ def report_form(request):
         'month_options': month_options,
         'sections': list(Section.objects.filter(school_year=sel_sy)) if sel_sy else [],
         'days': days,
-        'rows': rows_m + rows_f if sel_sy and enrollments else rows,
-        'rows_m': locals().get('rows_m', []),
-        'rows_f': locals().get('rows_f', []),
-        'mpd': locals().get('mpd', []),
-        'fpd': locals().get('fpd', []),
-        'cpd': locals().get('cpd', []),
-        'total_cols': locals().get('total_cols', (len(days) + 8 if days else 0)),
+        'rows': rows_m + rows_f,
+        'rows_m': rows_m,
+        'rows_f': rows_f,
+        'mpd': mpd,
+        'fpd': fpd,
+        'cpd': cpd,
+        'total_cols': len(days) + 8 if days else 0,
         'summary': summary,
         'non_school_days': non_school_days,
         'nsd_dates': [d.date for d in non_school_days],
@@ -1155,8 +1221,7 @@ def export_monthly_report(request):
         messages.warning(request, 'You are not allowed to export reports.')
         return redirect('attendance:dashboard')
     try:
-        import openpyxl
-        from openpyxl.styles import Alignment, Font, PatternFill
+        from .exports import XLSX_CONTENT_TYPE, sf2_filename, write_sf2_workbook
     except ImportError:  # pragma: no cover
         messages.error(request, 'openpyxl is required. Please install dependencies: pip install -r requirements.txt')
         return redirect('attendance:report_form')
@@ -1176,31 +1241,11 @@ def export_monthly_report(request):
     sy = get_object_or_404(SchoolYear, pk=schoolyear_id)
 
     # Determine actual range within the selected month intersecting the school year
-    first_day = date(year, month, 1)
-    last_day = date(year, month, monthrange(year, month)[1])
-    range_start = max(first_day, sy.start_date)
-    range_end = min(last_day, sy.end_date)
+    range_start, range_end = month_range(sy, year, month)
     if range_start > range_end:
         messages.error(request, 'Selected month is outside the school year range.')
         return redirect('attendance:report_form')
 
-    # Build workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"SF2 {year}-{month:02d}"
-
-    days = [d for d in (range_start + timedelta(n) for n in range((range_end - range_start).days + 1))]
-
-    # Header row matching a simplified DepEd SF2 style
-    headers = [
-        'LRN', 'Learner\'s Name', 'Sex', 'Birthdate',
-    ] + [str(d.day) for d in days] + ['Present', 'Absent', 'Late', 'Excused']
-
-    for c, h in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=c, value=h)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-
     enroll_qs = Enrollment.objects.filter(school_year=sy, active=True).select_related('student', 'section')
     if not (request.user.is_staff or request.user.is_superuser):
         enroll_qs = enroll_qs.filter(section__adviser=request.user)
@@ -1210,121 +1255,17 @@ def export_monthly_report(request):
     else:
         if sel_section_id:
             enroll_qs = enroll_qs.filter(section_id=sel_section_id)
-    enrollments = list(enroll_qs)
+    grid = MonthGrid(sy, year, month, enroll_qs)
 
-    # Preload all records in this month for performance
-    recs = AttendanceSessionRecord.objects.filter(
-        enrollment__in=enrollments,
-        date__gte=range_start,
-        date__lte=range_end,
-    )
-    by_key = {(r.enrollment_id, r.date, r.session): r for r in recs}
-
-    # Non-school days for shading
-    nsd_dates = set(NonSchoolDay.objects.filter(school_year=sy, date__gte=range_start, date__lte=range_end).values_list('date', flat=True))
-    nsd_fill = PatternFill(start_color='DDDDDD', end_color='DDDDDD', fill_type='solid')
-
-    # Partition by sex for grouped output
-    males = [e for e in enrollments if e.student.sex == 'M']
-    females = [e for e in enrollments if e.student.sex == 'F']
-
-    def write_group(group, label):
-        nonlocal row
-        mpd = [0.0 for _ in days]
-        for e in group:
-            s = e.student
-            ws.cell(row=row, column=1, value=s.lrn or '')
-            ws.cell(row=row, column=2, value=f"{s.last_name}, {s.first_name}")
-            ws.cell(row=row, column=3, value=s.sex)
-            ws.cell(row=row, column=4, value=s.birthdate.strftime('%Y-%m-%d') if s.birthdate else '')
-
-            counts = {'P': 0.0, 'A': 0.0, 'L': 0.0, 'E': 0.0}
-            col = 5
-            for i, d in enumerate(days):
-                am = by_key.get((e.id, d, 'AM'))
-                pm = by_key.get((e.id, d, 'PM'))
-                ams = am.status if am else ''
-                pms = pm.status if pm else ''
-                cell = f"{ams}/{pms}" if (ams or pms) else ''
-                # Code buckets with present including L/E
-                if ams:
-                    counts[ams] = counts.get(ams, 0.0) + 0.5
-                    if ams in PRESENT_SET and ams != 'P':
-                        counts['P'] += 0.5
-                if pms:
-                    counts[pms] = counts.get(pms, 0.0) + 0.5
-                    if pms in PRESENT_SET and pms != 'P':
-                        counts['P'] += 0.5
-                # Per-day present increment
-                p_inc = (0.5 if (ams in PRESENT_SET) else 0.0) + (0.5 if (pms in PRESENT_SET) else 0.0)
-                mpd[i] += p_inc
-                c = ws.cell(row=row, column=col, value=cell)
-                if d in nsd_dates:
-                    c.fill = nsd_fill
-                col += 1
-
-            ws.cell(row=row, column=col, value=counts['P']); col += 1
-            ws.cell(row=row, column=col, value=counts['A']); col += 1
-            ws.cell(row=row, column=col, value=counts['L']); col += 1
-            ws.cell(row=row, column=col, value=counts['E']); col += 1
-
-            row += 1
-
-        # Totals row for present per day
-        ws.cell(row=row, column=2, value=f"{label} present per day").font = Font(bold=True)
-        col = 5
-        for v in mpd:
-            ws.cell(row=row, column=col, value=v); col += 1
-        row += 2
-        return mpd
-
-    row = 2
-    mpd_m = write_group(males, 'Male')
-    mpd_f = write_group(females, 'Female')
-    # Combined row
-    ws.cell(row=row, column=2, value='Combined present per day').font = Font(bold=True)
-    col = 5
-    for v in [ (mpd_m[i] + mpd_f[i]) for i in range(len(days)) ]:
-        ws.cell(row=row, column=col, value=v); col += 1
-    row += 2
-
-    # Auto width (simple heuristic)
-    for column_cells in ws.columns:
-        length = max(len(str(cell.value)) if cell.value is not None else 0 for cell in column_cells)
-        ws.column_dimensions[column_cells[0].column_letter].width = max(10, min(25, length + 2))
-
-    # Append SF2 monthly summary block
-    summary = _compute_sf2_summary(sy, year, month, days, enrollments, by_key)
-    row += 2
-    ws.cell(row=row, column=1, value='Monthly Summary (SF2)').font = Font(bold=True)
-    row += 1
-    ws.cell(row=row, column=1, value='No. of School Days in month')
-    ws.cell(row=row, column=2, value=summary['school_days'])
-    row += 1
-    ws.cell(row=row, column=2, value='M').font = Font(bold=True)
-    ws.cell(row=row, column=3, value='F').font = Font(bold=True)
-    ws.cell(row=row, column=4, value='TOTAL').font = Font(bold=True)
-    row += 1
-    def _w(label, key):
-        nonlocal row
-        ws.cell(row=row, column=1, value=label)
-        ws.cell(row=row, column=2, value=summary['by']['M'][key])
-        ws.cell(row=row, column=3, value=summary['by']['F'][key])
-        ws.cell(row=row, column=4, value=summary['by']['T'][key])
-        row += 1
-    _w("Enrolment as of 1st Friday", 'enrol_first_friday')
-    _w("Late enrolment during the month (beyond cut-off)", 'late_enrol')
-    _w("Registered learners as of end of month", 'registered_eom')
-    _w("% of enrolment as of end of month", 'pct_enrol_eom')
-    _w("Average Daily Attendance", 'ada')
-    _w("% of attendance for the month", 'pct_attendance')
-    _w("Students absent for 5 consecutive days", 'absent5')
-
-    filename = f"SF2_{sy.name}_{year}-{month:02d}.xlsx".replace('/', '-')
-    resp = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    resp['Content-Disposition'] = f'attachment; filename="{filename}"'
-    wb.save(resp)
-    return resp
+    # Stream the write-only workbook through a temporary file
+    tmp = tempfile.TemporaryFile()
+    try:
+        write_sf2_workbook(grid, tmp)
+        tmp.seek(0)
+    except Exception:
+        tmp.close()
+        raise
+    return FileResponse(tmp, as_attachment=True, filename=sf2_filename(grid), content_type=XLSX_CONTENT_TYPE)
 
 
 @login_required
@@ -1343,16 +1284,11 @@ def report_preview(request):
 
     sy = get_object_or_404(SchoolYear, pk=schoolyear_id)
 
-    first_day = date(year, month, 1)
-    last_day = date(year, month, monthrange(year, month)[1])
-    range_start = max(first_day, sy.start_date)
-    range_end = min(last_day, sy.end_date)
+    range_start, range_end = month_range(sy, year, month)
     if range_start > range_end:
         messages.error(request, 'Selected month is outside the school year range.')
         return redirect('attendance:report_form')
 
-    days = [range_start + timedelta(n) for n in range((range_end - range_start).days + 1)]
-
     enroll_qs = Enrollment.objects.filter(school_year=sy, active=True).select_related('student', 'section')
     if not (request.user.is_staff or request.user.is_superuser):
         enroll_qs = enroll_qs.filter(section__adviser=request.user)
@@ -1362,90 +1298,103 @@ def report_preview(request):
     else:
         if sel_section_id:
             enroll_qs = enroll_qs.filter(section_id=sel_section_id)
-    enrollments = list(enroll_qs)
-
-    # Use session-based attendance (AM/PM) like export and report_form
-    recs = AttendanceSessionRecord.objects.filter(
-        enrollment__in=enrollments,
-        date__gte=range_start,
-        date__lte=range_end,
-    )
-    by_key = {(r.enrollment_id, r.date, r.session): r for r in recs}
 
-    rows = []
-    rows_m, rows_f = [], []
-    non_school_days = list(NonSchoolDay.objects.filter(school_year=sy, date__gte=range_start, date__lte=range_end).order_by('date'))
-    mpd = [0.0 for _ in days]
-    fpd = [0.0 for _ in days]
-    for e in enrollments:
-        s = e.student
-        day_marks = []
-        day_pairs = []
-        counts = {'P': 0.0, 'A': 0.0, 'L': 0.0, 'E': 0.0}
-        for idx, d in enumerate(days):
-            am = by_key.get((e.id, d, 'AM'))
-            pm = by_key.get((e.id, d, 'PM'))
-            ams = am.status if am else ''
-            pms = pm.status if pm else ''
-            if ams:
-                counts[ams] = counts.get(ams, 0.0) + 0.5
-                if ams in PRESENT_SET and ams != 'P':
-                    counts['P'] += 0.5
-            if pms:
-                counts[pms] = counts.get(pms, 0.0) + 0.5
-                if pms in PRESENT_SET and pms != 'P':
-                    counts['P'] += 0.5
-            cell = f"{ams}/{pms}" if (ams or pms) else ''
-            day_marks.append(cell)
-            day_pairs.append({'day': d, 'mark': cell})
-            p_inc = (0.5 if (ams in PRESENT_SET) else 0.0) + (0.5 if (pms in PRESENT_SET) else 0.0)
-            if s.sex == 'M':
-                mpd[idx] += p_inc
-            else:
-                fpd[idx] += p_inc
-        row = {
-            'lrn': s.lrn or '',
-            'name': f"{s.last_name}, {s.first_name}",
-            'sex': s.sex,
-            'birthdate': s.birthdate,
-            'day_marks': day_marks,
-            'day_pairs': day_pairs,
-            'counts': counts,
-        }
-        rows.append(row)
-        (rows_m if s.sex == 'M' else rows_f).append(row)
+    # Session-based attendance (AM/PM) shared with export and report_form
+    grid = MonthGrid(sy, year, month, enroll_qs)
 
     # Compute SF2 summary for preview (cached)
-    if (request.user.is_staff or request.user.is_superuser):
-        scope = f"section:{sel_section_id or 'all'}"
-    else:
-        scope = f'user:{request.user.id}'
-    cache_key = f"sf2:{sy.id}:{year}:{month}:{scope}"
-    summary = cache.get(cache_key)
-    if summary is None:
-        summary = _compute_sf2_summary(sy, year, month, days, enrollments, by_key)
-        cache.set(cache_key, summary, timeout=300)
+    summary = cached_sf2_summary(sy.id, year, month, _sf2_scope(request.user, sel_section_id), grid.summary)
 
     context = {
         'schoolyear': sy,
         'year': year,
         'month': month,
         'selected_section_id': sel_section_id,
-        'days': days,
-        'rows': rows_m + rows_f,
-        'rows_m': rows_m,
-        'rows_f': rows_f,
-        'mpd': mpd,
-        'fpd': fpd,
-        'cpd': [ (mpd[i] + fpd[i]) for i in range(len(days)) ],
-        'total_cols': len(days) + 8,
+        'days': grid.days,
+        'rows': grid.rows,
+        'rows_m': grid.rows_m,
+        'rows_f': grid.rows_f,
+        'mpd': grid.mpd,
+        'fpd': grid.fpd,
+        'cpd': grid.cpd,
+        'total_cols': grid.total_cols,
         'summary': summary,
-        'non_school_days': non_school_days,
-        'nsd_dates': [d.date for d in non_school_days],
+        'non_school_days': grid.non_school_days,
+        'nsd_dates': grid.nsd_dates,
     }
     return render(request, 'attendance/report_preview.html', context)
 
 
+@login_required
+def report_range(request):
+    """Per-learner totals over any date range of a school year: a quarter, a semester or the year to date."""
+    if not has_feature(request.user, 'view_reports'):
+        messages.warning(request, 'You are not allowed to view reports.')
+        return redirect('attendance:dashboard')
+    sys = SchoolYear.objects.all()
+    try:
+        sy_id = int(request.GET['schoolyear_id'])
+    except (KeyError, TypeError, ValueError):
+        sy_id = None
+    sy = get_object_or_404(SchoolYear, pk=sy_id) if sy_id else (_get_active_school_year() or sys.first())
+    sel_section_id = request.GET.get('section_id')
+    try:
+        sel_section_id = int(sel_section_id) if sel_section_id not in (None, '', 'all') else None
+    except (TypeError, ValueError):
+        sel_section_id = None
+
+    context = {
+        'schoolyears': sys,
+        'schoolyear': sy,
+        'selected_section_id': sel_section_id,
+        'sections': list(Section.objects.filter(school_year=sy)) if sy else [],
+        'rows_m': [],
+        'rows_f': [],
+        'school_days': None,
+    }
+    if not sy:
+        return render(request, 'attendance/report_range.html', context)
+
+    # Defaults to the year to date; both ends are clamped to the school year
+    try:
+        start = date.fromisoformat(request.GET.get('start') or '')
+    except ValueError:
+        start = sy.start_date
+    try:
+        end = date.fromisoformat(request.GET.get('end') or '')
+    except ValueError:
+        end = min(date.today(), sy.end_date)
+    start, end = max(start, sy.start_date), min(end, sy.end_date)
+    context.update({'start': start, 'end': end, 'ytd_end': min(date.today(), sy.end_date)})
+    if start > end:
+        messages.error(request, 'The start date must not be after the end date.')
+        return render(request, 'attendance/report_range.html', context)
+
+    enroll_qs = Enrollment.objects.filter(school_year=sy, active=True).select_related('student', 'section')
+    if not (request.user.is_staff or request.user.is_superuser):
+        enroll_qs = enroll_qs.filter(section__adviser=request.user)
+    elif sel_section_id:
+        enroll_qs = enroll_qs.filter(section_id=sel_section_id)
+    enrollments = list(enroll_qs.order_by('student__last_name', 'student__first_name', 'id'))
+
+    school_days = school_calendar(sy).count_school_days(start, end)
+    totals = range_totals([e.id for e in enrollments], start, end)
+    for e in enrollments:
+        t = totals[e.id]
+        # Like the SF2 rows, late and excused half-days count as present
+        attended = t['present'] + t['late'] + t['excused']
+        row = {
+            'enrollment': e,
+            'lrn': e.student.lrn or '',
+            'name': f"{e.student.last_name}, {e.student.first_name}",
+            'counts': {'P': attended * 0.5, 'A': t['absent'] * 0.5, 'L': t['late'] * 0.5, 'E': t['excused'] * 0.5},
+            'rate': round(attended * 50.0 / school_days, 1) if school_days else None,
+        }
+        context['rows_m' if e.student.sex == 'M' else 'rows_f'].append(row)
+    context['school_days'] = school_days
+    return render(request, 'attendance/report_range.html', context)
+
+
 @login_required
 def report_day_delete(request, schoolyear_id: int, year: int, month: int, day: int):
     if not has_feature(request.user, 'view_reports'):
@@ -1483,23 +1432,16 @@ def report_day_delete(request, schoolyear_id: int, year: int, month: int, day: i
     if request.method == 'POST':
         deleted_sessions = sess_count
         deleted_periods = per_count
-        # Perform deletions
-        per_qs.delete()
-        sess_qs.delete()
+        # Perform deletions together with the daily rollup rows
+        with transaction.atomic():
+            per_qs.delete()
+            sess_qs.delete()
+            # Drops the day's rollup rows and shifts the running totals after it
+            refresh_daily_rollup(list(enroll_qs.values_list('id', flat=True)), [target_date])
 
-        # Invalidate cached SF2 summaries for this month
+        # Invalidate cached SF2 summaries for this month (all scopes)
         try:
-            scope_keys = []
-            # all-scope for staff
-            scope_keys.append(f"sf2:{sy.id}:{year}:{month}:all")
-            # adviser scope(s)
-            adviser_ids = set(enroll_qs.values_list('section__adviser_id', flat=True))
-            adviser_ids.add(getattr(request.user, 'id', None))
-            for aid in adviser_ids:
-                if aid:
-                    scope_keys.append(f"sf2:{sy.id}:{year}:{month}:user:{aid}")
-            for k in scope_keys:
-                cache.delete(k)
+            bump_sf2_generation(sy.id, year, month)
         except Exception:
             pass
 
@@ -1535,7 +1477,7 @@ def report_day_mark_nsd(request, schoolyear_id: int, year: int, month: int, day:
         messages.error(request, 'Selected day is outside the school year range.')
         return redirect('attendance:report_form')
 
-    existing = NonSchoolDay.objects.filter(school_year=sy, date=target_date).first()
+    existing = school_calendar(sy).non_school_day(target_date)
     if request.method == 'POST':
         kind = request.POST.get('kind') or 'HOL'
         title = (request.POST.get('title') or '').strip() or ('Holiday' if kind == 'HOL' else 'Class Suspension')
@@ -1544,16 +1486,9 @@ def report_day_mark_nsd(request, schoolyear_id: int, year: int, month: int, day:
             school_year=sy, date=target_date,
             defaults={'kind': kind, 'title': title, 'notes': notes},
         )
-        # Invalidate SF2 cache for month
+        # Invalidate SF2 cache for month (all scopes)
         try:
-            scope_keys = [f"sf2:{sy.id}:{year}:{month}:all"]
-            # Include all adviser scopes (best-effort)
-            adviser_ids = set(Enrollment.objects.filter(school_year=sy).values_list('section__adviser_id', flat=True))
-            for aid in adviser_ids:
-                if aid:
-                    scope_keys.append(f"sf2:{sy.id}:{year}:{month}:user:{aid}")
-            for k in scope_keys:
-                cache.delete(k)
+            bump_sf2_generation(sy.id, year, month)
         except Exception:
             pass
         messages.success(request, f'Marked {target_date} as a Non-School Day.')
@@ -1583,22 +1518,18 @@ def report_day_unmark_nsd(request, schoolyear_id: int, year: int, month: int, da
         messages.error(request, 'Selected day is outside the school year range.')
         return redirect('attendance:report_form')
 
-    obj = NonSchoolDay.objects.filter(school_year=sy, date=target_date).first()
+    obj = school_calendar(sy).non_school_day(target_date)
     if not obj:
         messages.info(request, 'This day is not marked as a Non-School Day.')
         return redirect(f"{reverse('attendance:report_form')}?schoolyear_id={sy.id}&year={year}&month={month}")
 
     if request.method == 'POST':
-        obj.delete()
-        # Invalidate SF2 cache for month
+        # Delete the stored row, not the cached copy, so the signal sees the real instance
+        for nsd in NonSchoolDay.objects.filter(school_year=sy, date=target_date):
+            nsd.delete()
+        # Invalidate SF2 cache for month (all scopes)
         try:
-            scope_keys = [f"sf2:{sy.id}:{year}:{month}:all"]
-            adviser_ids = set(Enrollment.objects.filter(school_year=sy).values_list('section__adviser_id', flat=True))
-            for aid in adviser_ids:
-                if aid:
-                    scope_keys.append(f"sf2:{sy.id}:{year}:{month}:user:{aid}")
-            for k in scope_keys:
-                cache.delete(k)
+            bump_sf2_generation(sy.id, year, month)
         except Exception:
             pass
         messages.success(request, f'Unmarked {target_date} as a Non-School Day.')
@@ -1612,6 +1543,49 @@ def report_day_unmark_nsd(request, schoolyear_id: int, year: int, month: int, da
         'obj': obj,
     })
 
+@login_required
+def sf2_attendance_import(request):
+    if not has_feature(request.user, 'manage_reports'):
+        messages.error(request, 'You are not allowed to import attendance.')
+        return redirect('attendance:report_form')
+    schoolyears = SchoolYear.objects.all()
+    if request.method == 'POST':
+        sy = get_object_or_404(SchoolYear, pk=request.POST.get('schoolyear_id') or 0)
+        file = request.FILES.get('file')
+        if not file or not file.name.lower().endswith('.xlsx'):
+            messages.error(request, 'Please choose an SF2 workbook (.xlsx) to upload.')
+            return redirect('attendance:sf2_attendance_import')
+        month = None
+        if request.POST.get('month'):
+            try:
+                y, m = [int(x) for x in request.POST['month'].split('-')]
+                month = (y, m)
+            except ValueError:
+                messages.error(request, 'Month must be YYYY-MM.')
+                return redirect('attendance:sf2_attendance_import')
+        try:
+            result = import_sf2_attendance(sy, file, month=month)
+        except Exception:
+            messages.error(request, 'Could not read the workbook. Upload an SF2 file as exported by this system.')
+            return redirect('attendance:sf2_attendance_import')
+        messages.success(
+            request,
+            f"Imported {result['records']} session record(s) for {result['learners']} learner row(s) "
+            f"from {result['sheets']} sheet(s); skipped {result['skipped']}.",
+        )
+        for sheet, line, error in result['errors']:
+            messages.warning(request, f'{sheet}, row {line}: {error}')
+        return redirect('attendance:report_form')
+    return render(request, 'attendance/sf2_attendance_import.html', {
+        'schoolyears': schoolyears,
+        'active_sy': _get_active_school_year(),
+    })
+
+
+# Parsed Non-School Day rows waiting for confirmation
+_NSD_SESSION_KEY = 'nsd_import'
+
+
 @login_required
 def non_school_days_import(request):
     if not has_feature(request.user, 'manage_reports'):
@@ -1619,6 +1593,21 @@ def non_school_days_import(request):
         return redirect('attendance:report_form')
 
     sys = SchoolYear.objects.all()
+    if request.method == 'POST' and request.POST.get('action') in ('apply', 'cancel'):
+        pending = request.session.pop(_NSD_SESSION_KEY, None)
+        if request.POST['action'] == 'cancel' or not pending:
+            if not pending:
+                messages.error(request, 'Nothing to import. Please upload the file again.')
+            return redirect('attendance:non_school_days_import')
+        sy = get_object_or_404(SchoolYear, pk=pending['schoolyear_id'])
+        entries = {date.fromisoformat(day): values for day, values in pending['entries'].items()}
+        created, updated, unchanged = apply_non_school_days(sy, entries)
+        messages.success(
+            request,
+            f"Imported: created {created}, updated {updated}, unchanged {unchanged}, skipped {pending['skipped']}.",
+        )
+        return redirect('attendance:report_form')
+
     if request.method == 'POST':
         try:
             schoolyear_id = int(request.POST.get('schoolyear_id'))
@@ -1630,48 +1619,27 @@ def non_school_days_import(request):
             messages.error(request, 'Please select a School Year and choose a CSV file to upload.')
             return redirect('attendance:non_school_days_import')
         try:
-            wrapper = TextIOWrapper(file.file, encoding='utf-8-sig')
-            reader = csv.DictReader(wrapper)
+            entries, skipped = parse_non_school_days(iter_rows(file, file.name), sy)
         except Exception:
             messages.error(request, 'Invalid CSV file. Ensure it has a header: date,kind,title,notes')
             return redirect('attendance:non_school_days_import')
-
-        kind_map = {
-            'hol': 'HOL', 'holiday': 'HOL', 'h': 'HOL',
-            'sus': 'SUS', 'suspension': 'SUS', 'class suspension': 'SUS', 'c': 'SUS'
+        # Dry run: show the diff and keep the parsed rows until the user confirms
+        create, update, unchanged = plan_non_school_days(sy, entries)
+        request.session[_NSD_SESSION_KEY] = {
+            'schoolyear_id': sy.id,
+            'entries': {day.isoformat(): values for day, values in entries.items()},
+            'skipped': len(skipped),
         }
-
-        created = 0
-        updated = 0
-        skipped = 0
-        for row in reader:
-            raw_date = (row.get('date') or '').strip()
-            raw_kind = (row.get('kind') or '').strip().lower()
-            title = (row.get('title') or '').strip()
-            notes = (row.get('notes') or '').strip()
-            if not raw_date or not title:
-                skipped += 1
-                continue
-            try:
-                y, m, d = [int(x) for x in raw_date.split('-')]
-                dt = date(y, m, d)
-            except Exception:
-                skipped += 1
-                continue
-            if dt < sy.start_date or dt > sy.end_date:
-                skipped += 1
-                continue
-            kind = kind_map.get(raw_kind, 'HOL')
-            _, was_created = NonSchoolDay.objects.update_or_create(
-                school_year=sy, date=dt,
-                defaults={'kind': kind, 'title': title, 'notes': notes},
-            )
-            if was_created:
-                created += 1
-            else:
-                updated += 1
-        messages.success(request, f'Imported: created {created}, updated {updated}, skipped {skipped}.')
-        return redirect('attendance:report_form')
+        return render(request, 'attendance/non_school_days_import.html', {
+            'schoolyears': sys,
+            'preview': {
+                'schoolyear': sy,
+                'create': create,
+                'update': update,
+                'unchanged': unchanged,
+                'skipped': skipped,
+            },
+        })
 
     return render(request, 'attendance/non_school_days_import.html', {
         'schoolyears': sys,
@@ -97,6 +97,41 @@ if DB_ENGINE:
         'PORT': os.environ.get('DJANGO_DB_PORT', ''),
     }
 
+# Cache shared by every worker process (gunicorn runs several), with no
+# outside service: 'file' keeps entries in a directory, 'db' in a table of the
+# main database (create it with `python manage.py createcachetable`).
+# 'locmem' is per-process and only meant for development.
+# Neither shared backend increments atomically (incr() is get-then-set), so
+# cache versions are bumped by writing fresh values, and the SF2 hit/miss
+# counters are approximate under concurrent load.
+CACHE_BACKEND = os.environ.get('DJANGO_CACHE_BACKEND', 'locmem' if DEBUG else 'file').lower()
+_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'cms'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'cms_cache'),
+}
+if CACHE_BACKEND not in _CACHE_BACKENDS:
+    raise ImproperlyConfigured('DJANGO_CACHE_BACKEND must be one of: ' + ', '.join(_CACHE_BACKENDS))
+CACHES = {
+    'default': {
+        'BACKEND': _CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', _CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('DJANGO_CACHE_MAX_ENTRIES', '5000')),
+        },
+    }
+}
+# Cached SF2 summaries are invalidated by generation bumps, so they can live long
+SF2_CACHE_TIMEOUT = int(os.environ.get('DJANGO_SF2_CACHE_TIMEOUT', '86400'))
+# Merge AM and PM attendance notifications for the same learner and day
+NOTIFY_COALESCE_SESSIONS = os.environ.get('DJANGO_NOTIFY_COALESCE_SESSIONS', 'true').lower() == 'true'
+# Retention applied by `manage.py prune_notifications` (0 disables a rule)
+NOTIFY_RETENTION_DAYS = int(os.environ.get('DJANGO_NOTIFY_RETENTION_DAYS', '90'))
+NOTIFY_MAX_PER_USER = int(os.environ.get('DJANGO_NOTIFY_MAX_PER_USER', '500'))
+# Long-poll limits for the notification badge; each waiting poll holds a worker
+NOTIFY_POLL_MAX_WAIT = float(os.environ.get('DJANGO_NOTIFY_POLL_MAX_WAIT', '25'))
+NOTIFY_POLL_INTERVAL = float(os.environ.get('DJANGO_NOTIFY_POLL_INTERVAL', '2'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',